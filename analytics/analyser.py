@@ -481,11 +481,11 @@ def calculate_average_time_spent(df):
         return "N/A"
     
     try:
-        # Convert timestamps to datetime objects
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        # Convert timestamps to datetime objects (without changing the caller's frame)
+        timestamps = pd.to_datetime(df['timestamp'])
         
         # Group by user_id and calculate time difference between first and last response
-        user_times = df.groupby('user_id')['timestamp'].agg(['min', 'max'])
+        user_times = timestamps.groupby(df['user_id']).agg(['min', 'max'])
         user_times['duration'] = (user_times['max'] - user_times['min']).dt.total_seconds() / 60  # in minutes
         
         # Calculate average duration
@@ -526,7 +526,7 @@ def generate_key_insights(df, poll_data):
     insights.append(f"The dataset contains responses from {total_responses} participants across {len(poll_data)} polls.")
     
     # Identify most and least responded-to questions
-    question_response_counts = df.groupby(['question_text'])['user_id'].nunique().sort_values(ascending=False)
+    question_response_counts = df.groupby(['question_text'], observed=True)['user_id'].nunique().sort_values(ascending=False)
     
     if not question_response_counts.empty:
         most_responded = question_response_counts.index[0]
@@ -547,7 +547,7 @@ def generate_key_insights(df, poll_data):
             rating_questions['response_numeric'] = pd.to_numeric(rating_questions['response'], errors='coerce')
             
             # Group by question and calculate average rating
-            avg_ratings = rating_questions.groupby('question_text')['response_numeric'].mean().sort_values(ascending=False)
+            avg_ratings = rating_questions.groupby('question_text', observed=True)['response_numeric'].mean().sort_values(ascending=False)
             
             if not avg_ratings.empty:
                 highest_rated = avg_ratings.index[0]
@@ -608,7 +608,7 @@ def generate_poll_insights(poll_df, poll):
     choice_questions = poll_df[poll_df['question_type'].isin(['single_choice', 'multiple_choice'])]
     if not choice_questions.empty:
         # Group by question and find most common response
-        common_responses = choice_questions.groupby('question_text')['response'].agg(
+        common_responses = choice_questions.groupby('question_text', observed=True)['response'].agg(
             lambda x: x.value_counts().index[0] if len(x.value_counts()) > 0 else None
         )
         
@@ -627,7 +627,7 @@ def generate_poll_insights(poll_df, poll):
             rating_questions['response_numeric'] = pd.to_numeric(rating_questions['response'], errors='coerce')
             
             # Find highest and lowest rated items
-            avg_ratings = rating_questions.groupby('question_text')['response_numeric'].mean().sort_values(ascending=False)
+            avg_ratings = rating_questions.groupby('question_text', observed=True)['response_numeric'].mean().sort_values(ascending=False)
             
             if len(avg_ratings) > 0:
                 highest_question = avg_ratings.index[0]
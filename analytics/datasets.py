@@ -0,0 +1,278 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from polls.models import Poll, PollResponse, Question
+
+from .models import AnalyticsJob, DataSet
+from .storage import STORAGE_ARROW, append_dataset, configured_storage, store_dataset, store_rows
+
+# Responses read per database round trip while building a dataset
+BUILD_CHUNK_SIZE = 2000
+
+# Seconds a response must have existed before it can move a dataset's mark
+DEFAULT_REFRESH_LAG = 30
+
+
+def dataset_questions(polls):
+    """
+    Nested dataset data of some polls without their responses, read in
+    one query, and ``{question_id: (question_data, hide_user)}``.
+    """
+    polls = list(polls)
+    data = [{'poll_id': poll.id, 'title': poll.title, 'questions': []} for poll in polls]
+    polls_by_id = {poll_data['poll_id']: poll_data for poll_data in data}
+    anonymous = {poll.id for poll in polls if poll.poll_type == 'anonymous'}
+
+    questions = {}
+    for question_id, poll_id, text, slug in Question.objects.filter(
+        poll__in=polls_by_id
+    ).order_by('poll', 'order').values_list('id', 'poll_id', 'text', 'question_type__slug'):
+        question_data = {
+            'question_id': question_id,
+            'text': text,
+            'type': slug,
+            'responses': []
+        }
+        questions[question_id] = (question_data, poll_id in anonymous)
+        polls_by_id[poll_id]['questions'].append(question_data)
+
+    return data, questions
+
+
+def iter_responses(poll_ids, after=None, through=None):
+    """Stream the responses of some polls, ordered by poll and question, in chunks"""
+    responses = PollResponse.objects.filter(question__poll__in=poll_ids)
+    if after is not None:
+        responses = responses.filter(id__gt=after)
+    if through is not None:
+        responses = responses.filter(id__lte=through)
+    return responses.order_by('question__poll', 'question__order', 'question', 'id').values_list(
+        'question_id', 'user_id', 'response_data', 'created_at'
+    ).iterator(chunk_size=BUILD_CHUNK_SIZE)
+
+
+def build_dataset_data(polls, after=None, through=None):
+    """
+    Nested dataset data of some polls: their questions and every response.
+
+    Questions are read in one query and responses streamed in another,
+    ordered by poll and question, so the cost does not grow with the
+    number of questions or respondents.
+
+    Args:
+        polls: Polls to include, in dataset order.
+        after: Only include responses with a greater id (for refreshes).
+        through: Only include responses up to this id.
+    """
+    data, questions = dataset_questions(polls)
+    poll_ids = [poll_data['poll_id'] for poll_data in data]
+    for question_id, user_id, response_data, created_at in iter_responses(poll_ids, after, through):
+        question_data, hide_user = questions[question_id]
+        question_data['responses'].append({
+            'user_id': None if hide_user else user_id,
+            'response': response_data,
+            'timestamp': created_at.isoformat()
+        })
+
+    return data
+
+
+def dataset_rows(polls, through=None):
+    """
+    Nested dataset data of some polls without responses, and a generator
+    of their response rows (in ``storage.COLUMNS`` order) streamed from
+    the database, for writing columnar datasets chunk by chunk.
+    """
+    data, questions = dataset_questions(polls)
+    titles = {poll_data['poll_id']: poll_data['title'] for poll_data in data}
+
+    def rows():
+        # One query per poll keeps the rows in dataset order
+        for poll_id, title in titles.items():
+            for question_id, user_id, response_data, created_at in iter_responses([poll_id], through=through):
+                question_data, hide_user = questions[question_id]
+                yield (
+                    poll_id,
+                    title,
+                    question_id,
+                    question_data['text'],
+                    question_data['type'],
+                    None if hide_user else user_id,
+                    response_data,
+                    created_at.isoformat(),
+                )
+
+    return data, rows()
+
+
+def last_response_id(polls):
+    """
+    Id of the latest settled response to any of the polls, or None.
+
+    Ids are allocated before the transactions saving them commit, so a
+    lower id can become visible after a higher one. Responses created
+    in the last ``ANALYTICS_DATASET_REFRESH_LAG`` seconds are left for
+    the next refresh rather than risk moving the mark past one of them.
+    """
+    responses = PollResponse.objects.filter(question__poll__in=polls)
+    lag = getattr(settings, 'ANALYTICS_DATASET_REFRESH_LAG', DEFAULT_REFRESH_LAG)
+    if lag:
+        responses = responses.filter(created_at__lte=timezone.now() - timedelta(seconds=lag))
+    return responses.aggregate(last=Max('id'))['last']
+
+
+def fill_dataset(dataset, polls, storage=None):
+    """
+    Store the full data of ``polls`` in a dataset and set its high-water mark.
+
+    Columnar datasets are written one record batch per chunk of
+    responses read, so the responses are never all held in memory.
+    """
+    # Without settled responses the dataset starts empty, marked at 0
+    through = last_response_id(polls) or 0
+    storage = storage or configured_storage()
+    if storage == STORAGE_ARROW:
+        data, rows = dataset_rows(polls, through=through)
+        store_rows(dataset, data, rows, batch_size=BUILD_CHUNK_SIZE)
+    else:
+        store_dataset(dataset, build_dataset_data(polls, through=through), storage)
+    dataset.last_response_id = through
+    dataset.refreshed_at = timezone.now()
+    return dataset
+
+
+def refresh_dataset(dataset):
+    """
+    Append the responses its source polls received since a dataset was
+    built or last refreshed, up to the latest settled one.
+
+    Only responses created after the dataset's high-water mark are read;
+    polls added to the sources since are read in full. Edited answers
+    keep their id, so they are not picked up. Datasets built before
+    marks were kept are rebuilt once.
+
+    The dataset row is locked for the whole refresh and re-read, so
+    concurrent refreshes apply one after the other from the latest mark
+    instead of appending the same responses twice.
+
+    Returns:
+        The number of responses added.
+    """
+    with transaction.atomic():
+        dataset.refresh_from_db(from_queryset=DataSet.objects.select_for_update())
+        polls = list(dataset.source_polls.all())
+        if dataset.last_response_id is None:
+            fill_dataset(dataset, polls, dataset.storage)
+            dataset.save()
+            return dataset.row_count
+
+        # New polls are read up to the mark too, so later refreshes pick up the rest
+        through = max(last_response_id(polls) or 0, dataset.last_response_id)
+        known = {poll.get('poll_id') for poll in dataset.data or []}
+        new_polls = [poll for poll in polls if poll.id not in known]
+        new_data = build_dataset_data(new_polls, through=through) if new_polls else []
+        if through > dataset.last_response_id:
+            new_data += build_dataset_data(
+                [poll for poll in polls if poll.id in known],
+                after=dataset.last_response_id,
+                through=through
+            )
+
+        added = sum(len(question['responses']) for poll in new_data for question in poll['questions'])
+        if added or new_polls:
+            append_dataset(dataset, new_data)
+        dataset.last_response_id = through
+        dataset.refreshed_at = timezone.now()
+        dataset.save()
+    return added
+
+
+def refresh_datasets(datasets):
+    """Refresh datasets built from polls; returns the number of responses added"""
+    added = 0
+    for dataset in datasets.exclude(source_polls=None).distinct():
+        added += refresh_dataset(dataset)
+    return added
+
+
+def build_in_background(polls, after=None):
+    """Whether the responses of these polls (after a high-water mark) are too many to read during a request"""
+    threshold = getattr(settings, 'ANALYTICS_DATASET_JOB_THRESHOLD', None)
+    if threshold is None:
+        return False
+    responses = PollResponse.objects.filter(question__poll__in=polls)
+    if after is not None:
+        responses = responses.filter(id__gt=after)
+    return responses.count() > threshold
+
+
+def queue_dataset_build(dataset, polls, user):
+    """Create the job that fills ``dataset`` with the data of ``polls``"""
+    return AnalyticsJob.objects.create(
+        job_type='dataset',
+        status='pending',
+        creator=user,
+        dataset=dataset,
+        parameters={'poll_ids': [poll.id for poll in polls]}
+    )
+
+
+def queue_dataset_refresh(dataset, user):
+    """Create the job that appends the new responses of a dataset's polls"""
+    return AnalyticsJob.objects.create(
+        job_type='dataset',
+        status='pending',
+        creator=user,
+        dataset=dataset,
+        parameters={'refresh': True}
+    )
+
+
+def process_dataset_job(job):
+    """Build and store the data of the dataset of a pending job"""
+    # Claim the job so concurrent workers do not build it twice
+    claimed = AnalyticsJob.objects.filter(id=job.id, status='pending').update(
+        status='processing',
+        started_at=timezone.now()
+    )
+    if not claimed:
+        return False
+    job.refresh_from_db()
+
+    try:
+        dataset = job.dataset
+        if job.parameters.get('refresh'):
+            added = refresh_dataset(dataset)
+        else:
+            poll_ids = job.parameters['poll_ids']
+            polls = sorted(Poll.objects.filter(id__in=poll_ids), key=lambda poll: poll_ids.index(poll.id))
+            with transaction.atomic():
+                fill_dataset(dataset, polls)
+                dataset.save()
+            added = dataset.row_count
+
+        job.status = 'completed'
+        job.result = {'dataset_uuid': str(dataset.uuid), 'rows': dataset.row_count, 'added': added}
+    except Exception as e:
+        job.status = 'failed'
+        job.error_message = str(e)
+    job.completed_at = timezone.now()
+    job.save()
+    return job.status == 'completed'
+
+
+def process_pending_dataset_jobs(limit=None):
+    """Run pending dataset jobs, oldest first; returns how many were processed"""
+    jobs = AnalyticsJob.objects.filter(job_type='dataset', status='pending').order_by('created_at')
+    if limit:
+        jobs = jobs[:limit]
+
+    processed = 0
+    for job in jobs:
+        if process_dataset_job(job):
+            processed += 1
+    return processed
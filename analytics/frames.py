@@ -0,0 +1,134 @@
+"""
+Process-local cache of dataset DataFrames.
+
+Reports, exports and insights all start from ``dataset_to_dataframe``;
+parsing a large dataset costs far more than copying the parsed frame,
+so frames are kept per process and keyed by ``(dataset.uuid,
+updated_at)``. Saving a dataset changes ``updated_at``, so stale frames
+are never served and simply age out of the LRU.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+# Total size of the cached frames per process
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Values sampled per text column to estimate the size of its strings
+SIZE_SAMPLE = 1000
+
+
+def frame_size(frame):
+    """
+    Approximate memory used by a DataFrame, strings included.
+
+    Measuring every string (``memory_usage(deep=True)``) takes about as
+    long as parsing the dataset, so text columns are sampled.
+    """
+    size = int(frame.memory_usage(deep=False).sum())
+    for name, dtype in frame.dtypes.items():
+        if dtype != object:
+            continue
+        values = frame[name].to_numpy()
+        if not len(values):
+            continue
+        sample = values[::max(1, len(values) // SIZE_SAMPLE)]
+        size += int(len(values) * sum(sys.getsizeof(value) for value in sample) / len(sample))
+    return size
+
+
+class DataFrameCache:
+    """
+    LRU cache of DataFrames bounded by their total size in bytes.
+
+    Callers always receive a copy, so adding or converting columns (as
+    the insight helpers do) never alters the cached frame. Copies share
+    the string objects of the original, so they are cheap.
+    """
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return getattr(settings, 'ANALYTICS_DATAFRAME_CACHE_BYTES', DEFAULT_MAX_BYTES)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+        return entry[0].copy()
+
+    def set(self, key, frame):
+        """Cache a frame, evicting the least recently used ones to make room"""
+        size = frame_size(frame)
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if key in self._frames:
+                self.size -= self._frames.pop(key)[1]
+            self._frames[key] = (frame, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._frames.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+        return True
+
+    def get_or_build(self, key, build):
+        """Cached copy of the frame for ``key``, building it with ``build()`` on a miss"""
+        frame = self.get(key)
+        if frame is not None:
+            return frame
+
+        frame = build()
+        if self.set(key, frame):
+            return frame.copy()
+        return frame
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._frames.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._frames),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+dataframe_cache = DataFrameCache()
+
+
+def dataset_cache_key(dataset):
+    return (str(dataset.uuid), dataset.updated_at.isoformat() if dataset.updated_at else None)
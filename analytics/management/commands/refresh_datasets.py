@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from analytics.datasets import refresh_datasets
+from analytics.models import DataSet
+
+
+class Command(BaseCommand):
+    help = 'Append new poll responses to datasets built from polls (run on a schedule)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'uuids',
+            nargs='*',
+            help='Datasets to refresh (default: every dataset built from polls)'
+        )
+
+    def handle(self, *args, **options):
+        datasets = DataSet.objects.all()
+        if options['uuids']:
+            datasets = datasets.filter(uuid__in=options['uuids'])
+
+        added = refresh_datasets(datasets)
+        self.stdout.write(self.style.SUCCESS(f'{added} responses added to datasets.'))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.datasets import process_pending_dataset_jobs
+
+
+class Command(BaseCommand):
+    help = 'Build the data of datasets queued as background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Jobs processed per pass'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep processing as new jobs are queued'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait when no job is pending (with --loop)'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_pending_dataset_jobs(options['limit'])
+            total += processed
+            if processed:
+                self.stdout.write(f"{processed} datasets built")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'{total} dataset jobs completed.'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='data_file',
+            field=models.FileField(blank=True, upload_to='datasets/', verbose_name='Data File'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='row_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Rows'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='storage',
+            field=models.CharField(choices=[('json', 'JSON'), ('arrow', 'Arrow')], default='json', max_length=10, verbose_name='Storage'),
+        ),
+    ]
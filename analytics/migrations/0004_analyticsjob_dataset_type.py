@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_dataset_columnar_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='analyticsjob',
+            name='job_type',
+            field=models.CharField(choices=[('export', 'Data Export'), ('import', 'Data Import'), ('analysis', 'Data Analysis'), ('visualization', 'Visualization Generation'), ('dataset', 'Dataset Build')], max_length=20, verbose_name='Job Type'),
+        ),
+    ]
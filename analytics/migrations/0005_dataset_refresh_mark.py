@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_analyticsjob_dataset_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='last_response_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Last Response'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Refreshed At'),
+        ),
+    ]
@@ -34,8 +34,21 @@ class DataSet(models.Model):
         verbose_name=_('Source Polls')
     )
     
-    # Dataset content
+    # Dataset content; with columnar storage the responses live in data_file
+    # and data only keeps the polls and questions
     data = models.JSONField(verbose_name=_('Dataset'))
+    storage = models.CharField(
+        max_length=10,
+        choices=[('json', _('JSON')), ('arrow', _('Arrow'))],
+        default='json',
+        verbose_name=_('Storage')
+    )
+    data_file = models.FileField(upload_to='datasets/', blank=True, verbose_name=_('Data File'))
+    row_count = models.PositiveIntegerField(default=0, verbose_name=_('Rows'))
+
+    # High-water mark of incremental refreshes: the latest response included
+    last_response_id = models.BigIntegerField(null=True, blank=True, verbose_name=_('Last Response'))
+    refreshed_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Refreshed At'))
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -52,8 +65,15 @@ class DataSet(models.Model):
     def get_absolute_url(self):
         return reverse('analytics:dataset_detail', kwargs={'uuid': self.uuid})
     
+    @property
+    def is_columnar(self):
+        return self.storage == 'arrow'
+
     def get_data(self):
         """Return the dataset content as a dictionary."""
+        if self.is_columnar:
+            from .storage import nest, read_rows
+            return nest(self.data, read_rows(self, columns=['question_id', 'user_id', 'response', 'timestamp']))
         return self.data
 
 
@@ -167,6 +187,7 @@ class AnalyticsJob(models.Model):
         ('import', _('Data Import')),
         ('analysis', _('Data Analysis')),
         ('visualization', _('Visualization Generation')),
+        ('dataset', _('Dataset Build')),
     )
     
     JOB_STATUS = (
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import DataSet
+from .storage import delete_file
+
+
+@receiver(post_delete, sender=DataSet)
+def remove_dataset_file(sender, instance, **kwargs):
+    """Columnar datasets leave no file behind when deleted"""
+    delete_file(instance)
@@ -0,0 +1,416 @@
+"""
+Columnar storage of dataset responses.
+
+Datasets normally keep everything in ``DataSet.data``. With the Arrow
+backend (``ANALYTICS_DATASET_STORAGE = 'arrow'``, requires pyarrow) the
+responses are written to an uncompressed Arrow IPC file, one row per
+response, and ``DataSet.data`` only keeps the polls and questions.
+Files are memory-mapped when read, so selecting columns or slicing rows
+only touches the pages needed.
+"""
+import logging
+import tempfile
+from itertools import islice
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Columns of the response table, in file order
+COLUMNS = (
+    'poll_id', 'poll_title', 'question_id', 'question_text', 'question_type',
+    'user_id', 'response', 'timestamp',
+)
+
+# Columns with few distinct values, loaded as pandas categoricals
+CATEGORICAL_COLUMNS = ('poll_title', 'question_text', 'question_type')
+
+# Rows per record batch when writing streamed responses
+BATCH_SIZE = 2000
+
+STORAGE_JSON = 'json'
+STORAGE_ARROW = 'arrow'
+
+
+def columnar_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def configured_storage():
+    """Backend new datasets are written with"""
+    storage = getattr(settings, 'ANALYTICS_DATASET_STORAGE', STORAGE_JSON)
+    if storage == STORAGE_ARROW and not columnar_available():
+        logger.warning('ANALYTICS_DATASET_STORAGE is "arrow" but pyarrow is not installed; using JSON.')
+        return STORAGE_JSON
+    return storage
+
+
+def flatten(data):
+    """Yield one row per response of nested dataset data"""
+    for poll in data:
+        for question in poll.get('questions', []):
+            for response in question.get('responses', []):
+                yield (
+                    poll.get('poll_id'),
+                    poll.get('poll_title', poll.get('title')),
+                    question.get('question_id'),
+                    question.get('text'),
+                    question.get('type'),
+                    response.get('user_id'),
+                    response.get('response'),
+                    response.get('timestamp'),
+                )
+
+
+def skeleton(data):
+    """Nested dataset data without the responses"""
+    return [
+        {
+            **{key: value for key, value in poll.items() if key != 'questions'},
+            'questions': [
+                {key: value for key, value in question.items() if key != 'responses'}
+                for question in poll.get('questions', [])
+            ],
+        }
+        for poll in data
+    ]
+
+
+def nest(structure, rows):
+    """Rebuild nested dataset data from its skeleton and response rows"""
+    responses = {}
+    for row in rows:
+        responses.setdefault(row['question_id'], []).append({
+            'user_id': row['user_id'],
+            'response': row['response'],
+            'timestamp': row['timestamp'],
+        })
+
+    return [
+        {
+            **poll,
+            'questions': [
+                {**question, 'responses': responses.get(question.get('question_id'), [])}
+                for question in poll.get('questions', [])
+            ],
+        }
+        for poll in structure
+    ]
+
+
+def table_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('poll_id', pa.int64()),
+        ('poll_title', pa.string()),
+        ('question_id', pa.int64()),
+        ('question_text', pa.string()),
+        ('question_type', pa.dictionary(pa.int8(), pa.string())),
+        ('user_id', pa.int64()),
+        ('response', pa.string()),
+        ('timestamp', pa.string()),
+    ])
+
+
+def _columns(rows):
+    columns = {name: [] for name in COLUMNS}
+    for row in rows:
+        for name, value in zip(COLUMNS, row):
+            columns[name].append(value)
+    # Responses are stored as text whatever their question type
+    columns['response'] = [None if value is None else str(value) for value in columns['response']]
+    return columns
+
+
+def build_table(data):
+    """Arrow table of the responses of nested dataset data"""
+    import pyarrow as pa
+
+    return pa.table(_columns(flatten(data)), schema=table_schema())
+
+
+def build_batch(rows, question_types):
+    """
+    Arrow record batch of response rows.
+
+    Question types are encoded against the fixed ``question_types``
+    dictionary: an IPC file holds one dictionary per column, shared by
+    all its batches.
+    """
+    import pyarrow as pa
+
+    schema = table_schema()
+    columns = _columns(rows)
+    codes = {question_type: code for code, question_type in enumerate(question_types)}
+    arrays = {
+        name: pa.array(values, type=schema.field(name).type)
+        for name, values in columns.items() if name != 'question_type'
+    }
+    arrays['question_type'] = pa.DictionaryArray.from_arrays(
+        pa.array([codes.get(value) for value in columns['question_type']], type=pa.int8()),
+        pa.array(question_types, type=pa.string())
+    )
+    return pa.RecordBatch.from_arrays([arrays[name] for name in COLUMNS], schema=schema)
+
+
+def write_table(table):
+    """Serialize a table as an uncompressed Arrow IPC file (memory-mappable)"""
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    # IPC files hold one dictionary per column, so appended chunks must share it
+    table = table.unify_dictionaries()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def store_dataset(dataset, data, storage=None):
+    """
+    Set the content of a dataset using the configured backend.
+
+    The Arrow file is written right away, named after the dataset's
+    uuid; the dataset itself is left for the caller to save.
+    """
+    storage = storage or configured_storage()
+    if storage != STORAGE_ARROW:
+        dataset.storage = STORAGE_JSON
+        dataset.data = data
+        dataset.row_count = sum(1 for _ in flatten(data))
+        return dataset
+
+    table = build_table(data)
+    dataset.storage = STORAGE_ARROW
+    dataset.data = skeleton(data)
+    _save_table(dataset, table)
+    return dataset
+
+
+def append_dataset(dataset, data):
+    """
+    Add polls, questions and responses to a dataset, keeping its storage.
+
+    Arrow files are extended by concatenating the new rows to the
+    memory-mapped existing ones; nothing is re-read from the database.
+    The dataset is left for the caller to save.
+    """
+    if dataset.storage != STORAGE_ARROW:
+        merge_data(dataset.data, data)
+        dataset.row_count += sum(1 for _ in flatten(data))
+        return dataset
+
+    import pyarrow as pa
+
+    table = pa.concat_tables([open_table(dataset), build_table(data)])
+    merge_data(dataset.data, skeleton(data))
+    _save_table(dataset, table)
+    return dataset
+
+
+def store_rows(dataset, structure, rows, batch_size=BATCH_SIZE):
+    """
+    Write streamed response rows to the Arrow file of a dataset.
+
+    Rows (in ``COLUMNS`` order) are written as one record batch per
+    ``batch_size`` rows to a temporary file, so only one batch is held
+    in memory at a time. ``structure`` is the nested dataset data
+    without responses; the dataset is left for the caller to save.
+    """
+    import pyarrow as pa
+
+    question_types = sorted({
+        question.get('type')
+        for poll in structure for question in poll.get('questions', [])
+        if question.get('type') is not None
+    })
+    row_count = 0
+    rows = iter(rows)
+    with tempfile.TemporaryFile() as data_file:
+        with pa.ipc.new_file(pa.PythonFile(data_file, mode='w'), table_schema()) as writer:
+            while batch := list(islice(rows, batch_size)):
+                writer.write_batch(build_batch(batch, question_types))
+                row_count += len(batch)
+
+        data_file.seek(0)
+        dataset.storage = STORAGE_ARROW
+        dataset.data = skeleton(structure)
+        _save_file(dataset, File(data_file), row_count)
+    return dataset
+
+
+def merge_data(data, new_data):
+    """Add the polls, questions and responses of ``new_data`` to nested data, in place"""
+    polls = {poll.get('poll_id'): poll for poll in data}
+    for new_poll in new_data:
+        poll = polls.get(new_poll.get('poll_id'))
+        if poll is None:
+            data.append(new_poll)
+            polls[new_poll.get('poll_id')] = new_poll
+            continue
+
+        questions = {question.get('question_id'): question for question in poll.setdefault('questions', [])}
+        for new_question in new_poll.get('questions', []):
+            question = questions.get(new_question.get('question_id'))
+            if question is None:
+                poll['questions'].append(new_question)
+            elif 'responses' in new_question:
+                question.setdefault('responses', []).extend(new_question['responses'])
+    return data
+
+
+def _save_table(dataset, table):
+    """Write the Arrow file of a dataset from a table"""
+    _save_file(dataset, ContentFile(write_table(table)), table.num_rows)
+
+
+def _save_file(dataset, content, row_count):
+    """
+    Save the Arrow file of a dataset, replacing its previous file.
+
+    The previous file is only deleted once the transaction saving the
+    dataset commits, so a rollback leaves the row pointing at a file
+    that still exists.
+    """
+    old_file = dataset.data_file.name if dataset.data_file else None
+
+    dataset.row_count = row_count
+    dataset.data_file.save(f'{dataset.uuid}.arrow', content, save=False)
+
+    if old_file and old_file != dataset.data_file.name:
+        file_storage = dataset.data_file.storage
+        transaction.on_commit(lambda: file_storage.delete(old_file))
+
+
+def open_table(dataset, columns=None):
+    """
+    Memory-mapped Arrow table of a dataset's responses.
+
+    Only the requested ``columns`` are selected; nothing is copied until
+    values are converted to Python or pandas objects.
+    """
+    import pyarrow as pa
+
+    try:
+        source = pa.memory_map(dataset.data_file.path)
+    except NotImplementedError:
+        # Remote storages have no local path; read the file into memory instead
+        with dataset.data_file.open('rb') as data_file:
+            source = pa.BufferReader(data_file.read())
+
+    table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(list(columns))
+    return table
+
+
+def read_rows(dataset, offset=0, limit=None, columns=None):
+    """Response rows of a dataset as dicts, reading only the slice asked for"""
+    if dataset.storage != STORAGE_ARROW:
+        rows = [dict(zip(COLUMNS, row)) for row in flatten(dataset.data)]
+        rows = rows[offset:None if limit is None else offset + limit]
+        if columns is not None:
+            rows = [{name: row[name] for name in columns} for row in rows]
+        return rows
+
+    table = open_table(dataset, columns)
+    return table.slice(offset, limit).to_pylist()
+
+
+def _numbers(values):
+    """Integer array of ids, float (NaN for None) when some are missing"""
+    import numpy as np
+
+    try:
+        return np.array(values, dtype=np.int64)
+    except (TypeError, ValueError):
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            return _objects(values)
+
+
+def _objects(values):
+    import numpy as np
+
+    # fromiter keeps list values (multiple choice answers) as single items
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _field(rows, key):
+    """Values of a key in a list of dicts, None where it is missing"""
+    try:
+        return [row[key] for row in rows]
+    except KeyError:
+        return [row.get(key) for row in rows]
+
+
+def frame_from_data(data):
+    """
+    DataFrame of the responses of nested dataset data.
+
+    Poll and question columns are repeated per response with numpy
+    (as categoricals); only the response fields are read row by row.
+    """
+    import numpy as np
+    import pandas as pd
+
+    questions = [
+        (poll, question)
+        for poll in data if isinstance(poll, dict)
+        for question in poll.get('questions', [])
+    ]
+    responses = [response for _, question in questions for response in question.get('responses', [])]
+    index = np.repeat(
+        np.arange(len(questions)),
+        np.array([len(question.get('responses', [])) for _, question in questions], dtype=np.int64)
+    )
+
+    def repeated(values, categorical=False):
+        if categorical:
+            return pd.Categorical(values).take(index)
+        return _numbers(values)[index]
+
+    return pd.DataFrame({
+        'poll_id': repeated([poll.get('poll_id') for poll, _ in questions]),
+        'poll_title': repeated([poll.get('poll_title', poll.get('title')) for poll, _ in questions], categorical=True),
+        'question_id': repeated([question.get('question_id') for _, question in questions]),
+        'question_text': repeated([question.get('text') for _, question in questions], categorical=True),
+        'question_type': repeated([question.get('type') for _, question in questions], categorical=True),
+        'user_id': _numbers(_field(responses, 'user_id')),
+        'response': _objects(_field(responses, 'response')),
+        'timestamp': _objects(_field(responses, 'timestamp')),
+    }, copy=False)
+
+
+def read_frame(dataset, columns=None):
+    """
+    Response rows of a dataset as a pandas DataFrame.
+
+    Poll titles, question texts and question types are categoricals
+    whatever the storage.
+    """
+    if dataset.storage != STORAGE_ARROW:
+        frame = frame_from_data(dataset.data or [])
+        return frame if columns is None else frame[list(columns)]
+
+    table = open_table(dataset, columns)
+    frame = table.to_pandas(categories=[name for name in CATEGORICAL_COLUMNS if name in table.column_names])
+    for name in CATEGORICAL_COLUMNS:
+        if name in frame:
+            # Same (sorted) categories as frames built from JSON
+            frame[name] = frame[name].cat.reorder_categories(sorted(frame[name].cat.categories))
+    return frame
+
+
+def delete_file(dataset):
+    if dataset.data_file:
+        file_storage, name = dataset.data_file.storage, dataset.data_file.name
+        transaction.on_commit(lambda: file_storage.delete(name))
@@ -1,3 +1,343 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import pandas as pd
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from polls.models import Choice, Poll, Question, QuestionType
+from polls.submissions import save_submissions
+
+from .datasets import build_dataset_data, dataset_rows, fill_dataset, refresh_dataset
+from .frames import DataFrameCache, frame_size
+from .models import DataSet
+from .storage import columnar_available, read_frame, read_rows, store_dataset, store_rows
+from .views import VisualizationCreateView, _build_dataframe, dataset_to_dataframe
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def response_ids(data):
+    """(question id, user id, response) of every response of nested dataset data"""
+    return sorted(
+        (question['question_id'], response['user_id'], str(response['response']))
+        for poll in data for question in poll['questions'] for response in question['responses']
+    )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DatasetTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.addClassCleanup(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        types = {
+            slug: QuestionType.objects.get_or_create(slug=slug, defaults={'name': slug})[0]
+            for slug in ('single_choice', 'open_ended')
+        }
+        cls.creator = User.objects.create_user('researcher', user_type='researcher')
+        cls.voters = [User.objects.create_user(f'voter{i}') for i in range(6)]
+        cls.poll = Poll.objects.create(title='Campus', description='d', creator=cls.creator, start_date=timezone.now())
+        cls.choice_question = Question.objects.create(
+            poll=cls.poll, text='Favourite', question_type=types['single_choice'], order=1
+        )
+        cls.choices = [
+            Choice.objects.create(question=cls.choice_question, text=text, order=order)
+            for order, text in enumerate(['Yes', 'No'])
+        ]
+        cls.text_question = Question.objects.create(
+            poll=cls.poll, text='Why', question_type=types['open_ended'], order=2
+        )
+        for voter in cls.voters[:4]:
+            cls.answer(voter)
+
+    @classmethod
+    def answer(cls, voter):
+        save_submissions(cls.poll, [(voter.id, {
+            cls.choice_question.id: str(cls.choices[voter.id % 2].id),
+            cls.text_question.id: f'answer of {voter.username}',
+        })])
+
+    def dataset(self, storage):
+        dataset = DataSet(title=storage, description='d', creator=self.creator)
+        store_dataset(dataset, build_dataset_data([self.poll]), storage)
+        dataset.save()
+        dataset.source_polls.add(self.poll)
+        return dataset
+
+
+@skipUnless(columnar_available(), 'pyarrow is not installed')
+class ArrowStorageTests(DatasetTestCase):
+
+    def test_round_trip_matches_json(self):
+        arrow, json_dataset = self.dataset('arrow'), self.dataset('json')
+
+        self.assertTrue(arrow.is_columnar)
+        self.assertEqual(arrow.row_count, 8)
+        self.assertEqual(response_ids(arrow.get_data()), response_ids(json_dataset.get_data()))
+        self.assertEqual(read_rows(arrow, 2, 3), read_rows(json_dataset, 2, 3))
+
+    def test_selected_columns_only(self):
+        arrow, json_dataset = self.dataset('arrow'), self.dataset('json')
+
+        frame = read_frame(arrow, columns=['question_id', 'response'])
+        self.assertEqual(list(frame.columns), ['question_id', 'response'])
+        self.assertTrue(frame.equals(read_frame(json_dataset, columns=['question_id', 'response'])))
+
+    def test_batched_file_matches_json(self):
+        import pyarrow as pa
+
+        arrow = DataSet(title='batched', description='d', creator=self.creator)
+        data, rows = dataset_rows([self.poll])
+        store_rows(arrow, data, rows, batch_size=3)
+        arrow.save()
+
+        with pa.memory_map(arrow.data_file.path) as source:
+            self.assertEqual(pa.ipc.open_file(source).num_record_batches, 3)
+        self.assertEqual(arrow.row_count, 8)
+        self.assertTrue(read_frame(arrow).equals(read_frame(self.dataset('json'))))
+
+    def test_file_is_deleted_with_dataset(self):
+        dataset = self.dataset('arrow')
+        path = dataset.data_file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            dataset.delete()
+        self.assertFalse(os.path.exists(path))
+
+
+class VisualizationDataTests(DatasetTestCase):
+
+    def test_charts_read_only_their_columns(self):
+        dataset = self.dataset('arrow' if columnar_available() else 'json')
+        config = {'category_field': 'question_type', 'value_field': 'poll_id'}
+
+        with mock.patch('analytics.views.read_rows', wraps=read_rows) as reader:
+            data = VisualizationCreateView()._generate_visualization_data(dataset, 'bar', config)
+
+        self.assertEqual(reader.call_args.kwargs['columns'], ['poll_id', 'question_type'])
+        self.assertEqual(sorted(data['labels']), ['open_ended', 'single_choice'])
+        self.assertEqual(data['datasets'][0]['data'], [4.0 * self.poll.id] * 2)
+
+    def test_other_types_get_a_sample_of_rows(self):
+        data = VisualizationCreateView()._generate_visualization_data(self.dataset('json'), 'table', {})
+
+        self.assertEqual(len(data['raw_data']), 8)
+        self.assertEqual(data['raw_data'][0]['poll_id'], self.poll.id)
+
+
+def legacy_dataframe(data):
+    """The row by row dataset_to_dataframe replaced by _build_dataframe, kept as a reference"""
+    rows = []
+    for poll in data:
+        for question in poll.get('questions', []):
+            question_type = question.get('type')
+            for response in question.get('responses', []):
+                row = {
+                    'poll_id': poll.get('poll_id'),
+                    'poll_title': poll.get('poll_title'),
+                    'question_id': question.get('question_id'),
+                    'question_text': question.get('text'),
+                    'question_type': question_type,
+                    'user_id': response.get('user_id'),
+                    'timestamp': response.get('timestamp'),
+                }
+                if question_type in ['single_choice', 'multiple_choice']:
+                    row['response_type'] = 'choice'
+                    row['response'] = response.get('response')
+                    if question_type == 'multiple_choice' and isinstance(row['response'], list):
+                        row['response'] = ', '.join(str(item) for item in row['response'])
+                elif question_type in ['rating_scale', 'likert_scale']:
+                    row['response_type'] = 'scale'
+                    row['response'] = response.get('response')
+                    row['scale_min'] = question.get('scale_min', 1)
+                    row['scale_max'] = question.get('scale_max', 5)
+                elif question_type in ['open_ended', 'short_answer', 'essay']:
+                    row['response_type'] = 'text'
+                    row['response'] = response.get('response')
+                    if response.get('response'):
+                        row['word_count'] = len(str(response.get('response')).split())
+                elif question_type == 'true_false':
+                    row['response_type'] = 'basic'
+                    row['response'] = response.get('response')
+                else:
+                    row['response_type'] = 'other'
+                    row['response'] = response.get('response')
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+class DataFrameTests(TestCase):
+
+    def frame(self, data):
+        return _build_dataframe(DataSet(data=data, storage='json'))
+
+    def assertMatchesLegacy(self, data):
+        frame = self.frame(data)
+        for name in ('poll_title', 'question_text', 'question_type', 'response_type'):
+            self.assertIsInstance(frame[name].dtype, pd.CategoricalDtype)
+            frame[name] = frame[name].astype(object)
+        pd.testing.assert_frame_equal(frame, legacy_dataframe(data))
+
+    def test_matches_legacy_frame(self):
+        def question(question_id, question_type, responses):
+            return {'question_id': question_id, 'text': f'Q{question_id}', 'type': question_type, 'responses': [
+                {'user_id': user_id, 'response': response, 'timestamp': f'2026-01-0{user_id}T10:00:00'}
+                for user_id, response in responses
+            ]}
+
+        self.assertMatchesLegacy([
+            {'poll_id': 1, 'poll_title': 'Campus', 'questions': [
+                question(1, 'single_choice', [(1, '3'), (2, '4')]),
+                question(2, 'multiple_choice', [(1, ['3', '4']), (2, '5'), (3, [])]),
+                question(3, 'rating_scale', [(1, 4), (2, None)]),
+                question(4, 'open_ended', [(1, 'campus  food is great '), (2, ''), (3, None)]),
+                question(5, 'true_false', [(1, 'True')]),
+            ]},
+            {'poll_id': 2, 'poll_title': 'Library', 'questions': [
+                question(6, 'ranking', [(4, 'a > b')]),
+                question(7, 'likert_scale', [(4, 'Agree')]),
+                {'question_id': 8, 'text': 'Unanswered', 'type': 'essay', 'responses': []},
+            ]},
+        ])
+
+    def test_missing_user_ids_are_nan(self):
+        data = [{'poll_id': 1, 'poll_title': 'Campus', 'questions': [
+            {'question_id': 1, 'text': 'Q', 'type': 'single_choice', 'responses': [
+                {'user_id': 1, 'response': '3', 'timestamp': 't'},
+                {'response': '4', 'timestamp': 't'},
+            ]},
+        ]}]
+        self.assertMatchesLegacy(data)
+        self.assertEqual(self.frame(data)['user_id'].dtype, 'float64')
+
+    def test_columns_only_present_when_used(self):
+        data = [{'poll_id': 1, 'poll_title': 'Campus', 'questions': [
+            {'question_id': 1, 'text': 'Q', 'type': 'single_choice', 'responses': [
+                {'user_id': 1, 'response': '3', 'timestamp': 't'},
+            ]},
+        ]}]
+        self.assertMatchesLegacy(data)
+        self.assertNotIn('word_count', self.frame(data))
+
+
+class DataFrameCacheTests(TestCase):
+
+    def frame(self, rows=10):
+        return pd.DataFrame({'poll_id': range(rows), 'response': [f'answer {i}' for i in range(rows)]})
+
+    def test_least_recently_used_frames_are_evicted(self):
+        frame = self.frame()
+        cache = DataFrameCache(max_bytes=2 * frame_size(frame))
+        cache.set('a', frame)
+        cache.set('b', frame)
+        cache.get('a')
+        cache.set('c', frame)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.size, 2 * frame_size(frame))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_callers_get_a_copy(self):
+        cache = DataFrameCache(max_bytes=10 ** 6)
+        frame = cache.get_or_build('a', self.frame)
+        frame['word_count'] = 1
+        frame.loc[0, 'response'] = 'changed'
+
+        cached = cache.get('a')
+        self.assertNotIn('word_count', cached)
+        self.assertEqual(cached.loc[0, 'response'], 'answer 0')
+
+    def test_stats(self):
+        cache = DataFrameCache(max_bytes=10 ** 6)
+        build = mock.Mock(side_effect=self.frame)
+        for _ in range(3):
+            cache.get_or_build('a', build)
+
+        build.assert_called_once()
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['hits'], stats['misses']), (1, 2, 1))
+        self.assertEqual(stats['hit_rate'], 0.6667)
+
+    def test_oversized_frames_are_not_cached(self):
+        cache = DataFrameCache(max_bytes=frame_size(self.frame()) - 1)
+
+        self.assertEqual(len(cache.get_or_build('a', self.frame)), 10)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.size, 0)
+
+
+class DatasetFrameCacheTests(DatasetTestCase):
+
+    def test_saving_a_dataset_rebuilds_its_frame(self):
+        dataset = self.dataset('json')
+        with mock.patch('analytics.views._build_dataframe', wraps=_build_dataframe) as build:
+            self.assertEqual(len(dataset_to_dataframe(dataset)), 8)
+            dataset_to_dataframe(dataset)
+            self.assertEqual(build.call_count, 1)
+
+            store_dataset(dataset, build_dataset_data([self.poll])[:0], 'json')
+            dataset.save()
+            self.assertTrue(dataset_to_dataframe(dataset).empty)
+            self.assertEqual(build.call_count, 2)
+
+
+@override_settings(ANALYTICS_DATASET_REFRESH_LAG=0)
+class DatasetRefreshTests(DatasetTestCase):
+
+    def filled(self, storage):
+        dataset = DataSet(title=storage, description='d', creator=self.creator)
+        fill_dataset(dataset, [self.poll], storage)
+        dataset.save()
+        dataset.source_polls.add(self.poll)
+        return dataset
+
+    def assertAppendsOnlyNewResponses(self, storage):
+        dataset = self.filled(storage)
+        self.assertEqual(dataset.row_count, 8)
+        for voter in self.voters[4:]:
+            self.answer(voter)
+
+        self.assertEqual(refresh_dataset(dataset), 4)
+        self.assertEqual(refresh_dataset(dataset), 0)
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.row_count, 12)
+        self.assertEqual(response_ids(dataset.get_data()), response_ids(build_dataset_data([self.poll])))
+
+    def test_json_refresh_appends_only_new_responses(self):
+        self.assertAppendsOnlyNewResponses('json')
+
+    @skipUnless(columnar_available(), 'pyarrow is not installed')
+    def test_arrow_refresh_appends_only_new_responses(self):
+        self.assertAppendsOnlyNewResponses('arrow')
+
+    def test_stale_copy_does_not_append_twice(self):
+        dataset = self.filled('json')
+        stale = DataSet.objects.get(pk=dataset.pk)
+        self.answer(self.voters[4])
+
+        self.assertEqual(refresh_dataset(dataset), 2)
+        self.assertEqual(refresh_dataset(stale), 0)
+        self.assertEqual(
+            response_ids(DataSet.objects.get(pk=dataset.pk).get_data()),
+            response_ids(build_dataset_data([self.poll]))
+        )
+
+    @override_settings(ANALYTICS_DATASET_REFRESH_LAG=3600)
+    def test_recent_responses_wait_for_the_lag(self):
+        dataset = self.filled('json')
+        self.answer(self.voters[4])
+
+        self.assertEqual(dataset.row_count, 0)
+        self.assertEqual(refresh_dataset(dataset), 0)
+        with self.settings(ANALYTICS_DATASET_REFRESH_LAG=0):
+            self.assertEqual(refresh_dataset(dataset), 10)
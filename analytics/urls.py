@@ -16,6 +16,7 @@ urlpatterns = [
     path('datasets/<uuid:uuid>/collaborators/add/', views.add_dataset_collaborator, name='add_dataset_collaborator'),
     path('datasets/<uuid:uuid>/collaborators/<int:user_id>/remove/', views.remove_dataset_collaborator, name='remove_dataset_collaborator'),
     path('datasets/<uuid:uuid>/export/', views.export_dataset, name='export_dataset'),
+    path('datasets/<uuid:uuid>/refresh/', views.dataset_refresh, name='dataset_refresh'),
 
     # UUID-based field retrieval (new primary method)
     path('datasets/uuid/<uuid:uuid>/fields/', views.DatasetFieldsView.as_view(), name='dataset_fields_by_uuid'),
@@ -51,4 +52,7 @@ urlpatterns = [
     # Jobs
     path('jobs/', views.AnalyticsJobListView.as_view(), name='job_list'),
     path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+    
+    # Cache
+    path('cache/stats/', views.dataframe_cache_stats, name='dataframe_cache_stats'),
 ]
\ No newline at end of file
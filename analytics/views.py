@@ -17,12 +17,19 @@ from django.db import transaction
 
 from analytics.analyser import analyze_choice_question, analyze_scale_question, analyze_text_question, calculate_average_time_spent, calculate_completion_rate, generate_key_insights, generate_poll_insights
 
+from .datasets import (
+    build_in_background, fill_dataset, queue_dataset_build, queue_dataset_refresh,
+    refresh_dataset
+)
+from .frames import dataframe_cache, dataset_cache_key
 from .models import DataSet, AnalysisReport, Visualization, AnalyticsJob
+from .storage import COLUMNS, read_frame, read_rows
 from .forms import (
     DataSetForm, CollaboratorForm, AnalysisReportForm, 
     VisualizationForm, DataImportForm, AnalyticsJobForm
 )
-from polls.models import Poll, PollResponse
+from polls.models import Poll, PollResponse, Question
+from polls.terms import top_terms
 from accounts.models import User
 
 import json
@@ -107,45 +114,19 @@ class DataSetCreateView(CreateView):
         
         # Process poll data into a dataset
         source_polls = form.cleaned_data['source_polls']
-        dataset_data = self._process_poll_data(source_polls)
-        form.instance.data = dataset_data
+        if build_in_background(source_polls):
+            # Saved empty and filled by run_dataset_jobs
+            form.instance.data = []
+            response = super().form_valid(form)
+            queue_dataset_build(self.object, source_polls, self.request.user)
+            messages.success(self.request, _('Dataset created! Its data is being collected and will be available shortly.'))
+            return response
+
+        fill_dataset(form.instance, source_polls)
         
         messages.success(self.request, _('Dataset created successfully!'))
         return super().form_valid(form)
     
-    def _process_poll_data(self, polls):
-        """Process poll data into a structured dataset"""
-        dataset = []
-        
-        for poll in polls:
-            poll_data = {
-                'poll_id': poll.id,
-                'title': poll.title,
-                'questions': []
-            }
-            
-            for question in poll.questions.all():
-                question_data = {
-                    'question_id': question.id,
-                    'text': question.text,
-                    'type': question.question_type.slug,
-                    'responses': []
-                }
-                
-                for response in question.responses.all():
-                    response_data = {
-                        'user_id': response.user.id if poll.poll_type != 'anonymous' else None,
-                        'response': response.response_data,
-                        'timestamp': response.created_at.isoformat()
-                    }
-                    question_data['responses'].append(response_data)
-                
-                poll_data['questions'].append(question_data)
-            
-            dataset.append(poll_data)
-        
-        return dataset
-    
     def get_success_url(self):
         return reverse('analytics:dataset_detail', kwargs={'uuid': self.object.uuid})
 
@@ -231,7 +212,16 @@ class DataSetDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
         # For simplicity, just return the first poll's first question's first few responses
         if data[0].get('questions') and data[0]['questions']:
             question = data[0]['questions'][0]
-            responses = question.get('responses', [])
+            if dataset.is_columnar:
+                # Rows are stored poll by poll and question by question,
+                # so the first rows belong to the first question
+                rows = read_rows(dataset, limit=5, columns=['question_id', 'user_id', 'response', 'timestamp'])
+                responses = [
+                    {key: row[key] for key in ('user_id', 'response', 'timestamp')}
+                    for row in rows if row['question_id'] == question.get('question_id')
+                ]
+            else:
+                responses = question.get('responses', [])
             return {
                 'poll_title': data[0].get('title', ''),
                 'question_text': question.get('text', ''),
@@ -292,6 +282,35 @@ def remove_dataset_collaborator(request, uuid, user_id):
     
     return redirect('analytics:dataset_detail', uuid=uuid)
 
+@login_required
+@require_POST
+def dataset_refresh(request, uuid):
+    """Append the responses the source polls received since the dataset was built"""
+    dataset = get_object_or_404(DataSet, uuid=uuid)
+    if request.user != dataset.creator:
+        return HttpResponseForbidden()
+
+    source_polls = dataset.source_polls.all()
+    if not source_polls.exists():
+        messages.error(request, _('This dataset was not built from polls and cannot be refreshed.'))
+    elif build_in_background(source_polls, after=dataset.last_response_id):
+        queue_dataset_refresh(dataset, request.user)
+        messages.success(request, _('Dataset refresh started. New responses will be available shortly.'))
+    else:
+        added = refresh_dataset(dataset)
+        messages.success(request, _('Dataset refreshed: {} new responses added.').format(added))
+
+    return redirect('analytics:dataset_detail', uuid=dataset.uuid)
+
+
+@login_required
+def dataframe_cache_stats(request):
+    """Hit and miss counts of this process's dataset DataFrame cache"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return JsonResponse(dataframe_cache.stats())
+
+
 @login_required
 def export_dataset(request, uuid):
     """Export dataset in various formats"""
@@ -307,7 +326,7 @@ def export_dataset(request, uuid):
     
     # Convert dataset to appropriate format
     if export_format == 'json':
-        response = HttpResponse(json.dumps(dataset.data, indent=2), content_type='application/json')
+        response = HttpResponse(json.dumps(dataset.get_data(), indent=2), content_type='application/json')
         response['Content-Disposition'] = f'attachment; filename="{dataset.title}.json"'
     
     elif export_format == 'csv':
@@ -791,70 +810,74 @@ def create_detailed_pdf_report(dataset, output_stream):
 
 
 
+# Response types of the question types in dataset DataFrames; other types are 'other'
+RESPONSE_TYPES = {
+    'single_choice': 'choice',
+    'multiple_choice': 'choice',
+    'rating_scale': 'scale',
+    'likert_scale': 'scale',
+    'open_ended': 'text',
+    'short_answer': 'text',
+    'essay': 'text',
+    'true_false': 'basic',
+}
+
+
 def dataset_to_dataframe(dataset):
-    """Convert dataset JSON to pandas DataFrame with proper handling of different question types"""
-    rows = []
-    
-    for poll in dataset.data:
-        poll_id = poll.get('poll_id')
-        poll_title = poll.get('poll_title')
-        
-        for question in poll.get('questions', []):
-            question_id = question.get('question_id')
-            question_text = question.get('text')
-            question_type = question.get('type')
-            
-            # Process responses based on question type
-            for response in question.get('responses', []):
-                row = {
-                    'poll_id': poll_id,
-                    'poll_title': poll_title,
-                    'question_id': question_id,
-                    'question_text': question_text,
-                    'question_type': question_type,
-                    'user_id': response.get('user_id'),
-                    'timestamp': response.get('timestamp')
-                }
-                
-                # Handle different question types and their specific response formats
-                if question_type in ['single_choice', 'multiple_choice']:
-                    # For choice questions, extract the selected option(s)
-                    row['response_type'] = 'choice'
-                    row['response'] = response.get('response')
-                    
-                    # For multiple choice, response might be a list
-                    if question_type == 'multiple_choice' and isinstance(row['response'], list):
-                        row['response'] = ', '.join(str(item) for item in row['response'])
-                
-                elif question_type in ['rating_scale', 'likert_scale']:
-                    # For scale questions, ensure response is numeric
-                    row['response_type'] = 'scale'
-                    row['response'] = response.get('response')
-                    row['scale_min'] = question.get('scale_min', 1)
-                    row['scale_max'] = question.get('scale_max', 5)
-                
-                elif question_type in ['open_ended', 'short_answer', 'essay']:
-                    # For text-based questions
-                    row['response_type'] = 'text'
-                    row['response'] = response.get('response')
-                    
-                    # Add word count for text responses
-                    if response.get('response'):
-                        row['word_count'] = len(str(response.get('response')).split())
-                
-                elif question_type == 'true_false':
-                    # For true/false questions
-                    row['response_type'] = 'basic'
-                    row['response'] = response.get('response')
-                    
-                else:
-                    # Default handling for any other question types
-                    row['response_type'] = 'other'
-                    row['response'] = response.get('response')
-                
-                rows.append(row)
-    
-    return pd.DataFrame(rows)
+    """
+    Convert dataset JSON to pandas DataFrame with proper handling of different question types.
+
+    Frames are cached per process until the dataset is saved again;
+    every call returns a copy the caller may modify.
+    """
+    return dataframe_cache.get_or_build(dataset_cache_key(dataset), lambda: _build_dataframe(dataset))
+
+
+def _build_dataframe(dataset):
+    df = read_frame(dataset)
+    # Columns of the result; the frame is assembled once at the end, without copies
+    columns = {
+        name: df[name]
+        for name in ('poll_id', 'poll_title', 'question_id', 'question_text', 'question_type', 'user_id', 'timestamp')
+    }
+
+    # Response type of each row, looked up once per question type
+    question_types = df['question_type'].cat
+    response_types = sorted(set(RESPONSE_TYPES.values()) | {'other'})
+    lookup = np.array(
+        [response_types.index(RESPONSE_TYPES.get(slug, 'other')) for slug in question_types.categories]
+        + [response_types.index('other')]
+    )
+    # Missing types have code -1, which picks the trailing 'other'
+    type_codes = lookup[question_types.codes]
+    columns['response_type'] = pd.Categorical.from_codes(type_codes, response_types)
+
+    # For multiple choice, response might be a list
+    responses = df['response'].to_numpy()
+    if 'multiple_choice' in question_types.categories:
+        multiple = np.flatnonzero(question_types.codes == question_types.categories.get_loc('multiple_choice'))
+        lists = multiple[[isinstance(value, list) for value in responses[multiple]]]
+        if len(lists):
+            responses = responses.copy()
+            responses[lists] = [', '.join(str(item) for item in items) for items in responses[lists]]
+    columns['response'] = responses
+
+    # Scale bounds of scale questions (datasets do not store them, so 1 to 5)
+    scale = type_codes == response_types.index('scale')
+    if scale.any():
+        columns['scale_min'] = np.where(scale, 1, np.nan)
+        columns['scale_max'] = np.where(scale, 5, np.nan)
+
+    # Add word count for text responses
+    text = np.flatnonzero(type_codes == response_types.index('text'))
+    values = responses[text]
+    answered = np.fromiter(map(bool, values), dtype=bool, count=len(values))
+    if answered.any():
+        word_count = np.full(len(df), np.nan)
+        word_count[text[answered]] = [len(str(value).split()) for value in values[answered]]
+        columns['word_count'] = word_count
+
+    return pd.DataFrame(columns, copy=False)
 
 @method_decorator(login_required, name='dispatch')
 class AnalysisReportListView(LoginRequiredMixin, ListView):
@@ -1176,6 +1199,16 @@ class VisualizationListView(LoginRequiredMixin, ListView):
         return context
 
 
+# Config keys naming the response columns each chart type reads
+VISUALIZATION_FIELDS = {
+    'bar': ('category_field', 'value_field'),
+    'pie': ('category_field', 'value_field'),
+    'line': ('time_field', 'value_field', 'series_field'),
+    'scatter': ('x_field', 'y_field', 'series_field'),
+    'wordcloud': ('text_field', 'weight_field'),
+}
+
+
 @method_decorator(login_required, name='dispatch')
 class VisualizationCreateView(CreateView):
     model = Visualization
@@ -1221,8 +1254,16 @@ class VisualizationCreateView(CreateView):
     
     def _generate_visualization_data(self, dataset, viz_type, config):
         """Generate visualization data based on dataset and config"""
-        # Load the dataset data
-        data = dataset.get_data()
+        # Word clouds of a poll question are served from its term index
+        if viz_type == 'wordcloud' and config.get('question_id'):
+            return self._generate_question_wordcloud_data(dataset, config)
+        
+        # Charts read the response rows, loading only the columns they use
+        if viz_type in VISUALIZATION_FIELDS:
+            fields = {config.get(key) for key in VISUALIZATION_FIELDS[viz_type]}
+            data = read_rows(dataset, columns=[name for name in COLUMNS if name in fields])
+        else:
+            data = read_rows(dataset, limit=10)
         
         if not data:
             raise ValueError("Dataset contains no data")
@@ -1240,7 +1281,7 @@ class VisualizationCreateView(CreateView):
             return self._generate_wordcloud_data(data, config)
         else:
             # Default to returning sample of raw data
-            return {'raw_data': data[:10]}  # First 10 items
+            return {'raw_data': data}  # First 10 rows
     
     def _generate_bar_chart_data(self, data, config):
         """Generate data for a bar chart."""
@@ -1481,6 +1522,24 @@ class VisualizationCreateView(CreateView):
         except Exception as e:
             raise ValueError(f"Error generating scatter plot data: {str(e)}")
     
+    def _generate_question_wordcloud_data(self, dataset, config):
+        """Generate word cloud data for a text question of a source poll."""
+        question = Question.objects.filter(
+            id=config.get('question_id'),
+            poll__in=dataset.source_polls.all()
+        ).first()
+        if question is None:
+            raise ValueError("question_id must be a question of the dataset's source polls")
+        
+        # Counts are kept up to date as answers are saved, so nothing is tokenized here
+        terms = top_terms(
+            question,
+            limit=config.get('limit', 100),
+            words=config.get('words', 1),
+            exclude=[word.lower() for word in config.get('stopwords', [])]
+        )
+        return {'words': [{'text': term, 'value': count} for term, count in terms.items()]}
+    
     def _generate_wordcloud_data(self, data, config):
         """Generate data for a word cloud."""
         try:
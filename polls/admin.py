@@ -1,7 +1,9 @@
 from django.contrib import admin
 from .models import (
     PollCategory, Poll, PollComment, QuestionType, Question, Choice,
-    PollResponse, PollTemplate
+    PollResponse, PollTemplate, QuestionTally, PollTimelineBucket,
+    PendingSubmission, PollResultsArchive, ParticipantSketch,
+    QuestionTerm
 )
 
 class PollCategoryAdmin(admin.ModelAdmin):
@@ -61,6 +63,56 @@ class PollResponseAdmin(admin.ModelAdmin):
 # Register the PollResponse model with the admin site
 admin.site.register(PollResponse, PollResponseAdmin)
 
+class QuestionTallyAdmin(admin.ModelAdmin):
+    list_display = ('question', 'key', 'count')
+    list_filter = ('question__poll',)
+    search_fields = ('question__text',)
+
+# Register the QuestionTally model with the admin site
+admin.site.register(QuestionTally, QuestionTallyAdmin)
+
+class QuestionTermAdmin(admin.ModelAdmin):
+    list_display = ('question', 'term', 'words', 'count')
+    list_filter = ('question__poll', 'words')
+    search_fields = ('term', 'question__text')
+
+# Register the QuestionTerm model with the admin site
+admin.site.register(QuestionTerm, QuestionTermAdmin)
+
+class PollTimelineBucketAdmin(admin.ModelAdmin):
+    list_display = ('poll', 'hour', 'submissions', 'participants')
+    list_filter = ('poll',)
+    date_hierarchy = 'hour'
+
+# Register the PollTimelineBucket model with the admin site
+admin.site.register(PollTimelineBucket, PollTimelineBucketAdmin)
+
+class PendingSubmissionAdmin(admin.ModelAdmin):
+    list_display = ('poll', 'user', 'attempts', 'created_at')
+    list_filter = ('poll', 'attempts')
+    search_fields = ('user__username', 'poll__title')
+
+# Register the PendingSubmission model with the admin site
+admin.site.register(PendingSubmission, PendingSubmissionAdmin)
+
+class ParticipantSketchAdmin(admin.ModelAdmin):
+    list_display = ('poll', 'day')
+    list_filter = ('poll',)
+    date_hierarchy = 'day'
+    exclude = ('registers',)
+
+# Register the ParticipantSketch model with the admin site
+admin.site.register(ParticipantSketch, ParticipantSketchAdmin)
+
+class PollResultsArchiveAdmin(admin.ModelAdmin):
+    list_display = ('poll', 'status', 'response_count', 'size', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('poll__title',)
+    exclude = ('results', 'responses')
+
+# Register the PollResultsArchive model with the admin site
+admin.site.register(PollResultsArchive, PollResultsArchiveAdmin)
+
 class PollTemplateAdmin(admin.ModelAdmin):
     list_display = ('title', 'creator', 'is_public', 'created_at')
     list_filter = ('is_public', 'creator', 'category')
@@ -0,0 +1,77 @@
+import json
+
+from .models import ResponseChoice
+
+# Question types whose answers reference Choice rows
+CHOICE_TYPES = ('single_choice', 'multiple_choice', 'true_false', 'likert_scale')
+
+# Question types whose answers are stored as numbers
+NUMERIC_TYPES = ('rating_scale',)
+
+# Question types whose answers are free text
+TEXT_TYPES = ('open_ended', 'short_answer', 'essay')
+
+
+def _to_int(value):
+    # Answers are saved as strings or floats ("12", "4.0")
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_answer(question_type, response_data):
+    """
+    Split a stored answer into its normalized parts.
+
+    Returns:
+        A ``(choice_ids, numeric_value)`` tuple. ``choice_ids`` lists the
+        selected choice ids in order without duplicates and
+        ``numeric_value`` is a float for numeric question types.
+    """
+    if question_type in NUMERIC_TYPES:
+        try:
+            return [], float(response_data)
+        except (TypeError, ValueError):
+            return [], None
+
+    if question_type not in CHOICE_TYPES:
+        return [], None
+
+    if question_type == 'multiple_choice':
+        try:
+            values = json.loads(response_data)
+        except (TypeError, ValueError):
+            return [], None
+        if not isinstance(values, list):
+            values = [values]
+    else:
+        values = [response_data]
+
+    choice_ids = []
+    for value in values:
+        choice_id = _to_int(value)
+        if choice_id is not None and choice_id not in choice_ids:
+            choice_ids.append(choice_id)
+    return choice_ids, None
+
+
+def save_selections(selections):
+    """
+    Replace the selected choices of saved responses.
+
+    Args:
+        selections: Dict mapping response ids to the choice ids they selected.
+    """
+    if not selections:
+        return
+
+    ResponseChoice.objects.filter(response_id__in=selections.keys()).delete()
+    ResponseChoice.objects.bulk_create(
+        [
+            ResponseChoice(response_id=response_id, choice_id=choice_id)
+            for response_id, choice_ids in selections.items()
+            for choice_id in choice_ids
+        ],
+        batch_size=1000
+    )
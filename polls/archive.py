@@ -0,0 +1,114 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .cache import FROZEN_STATUSES
+from .models import PollResultsArchive
+from .tallies import get_poll_tallies
+from .timeline import get_timeline
+
+# Bumped whenever the archived payload changes shape; older archives are ignored
+ARCHIVE_FORMAT = 3
+
+COMPRESSION_LEVEL = 6
+
+
+def compress(data):
+    return zlib.compress(json.dumps(data, cls=DjangoJSONEncoder).encode(), COMPRESSION_LEVEL)
+
+
+def decompress(blob):
+    return json.loads(zlib.decompress(bytes(blob)))
+
+
+def build_results(poll):
+    """Compute everything the results, analytics and export views show for a poll"""
+    # Views import this module, so their builders are imported lazily
+    from .views import PollAnalyticsView, PollResultsView
+
+    return {
+        'results': PollResultsView().get_results_data(poll),
+        'question_analytics': PollAnalyticsView().get_question_analytics(poll),
+        'timelines': {
+            resolution: get_timeline(poll, resolution=resolution, fill_gaps=True)
+            for resolution in ('day', 'hour')
+        },
+        'tallies': get_poll_tallies(poll),
+    }
+
+
+def freeze_poll(poll):
+    """
+    Store the final results of a closed or archived poll as a compressed
+    archive, replacing any previous one.
+
+    Polls are frozen when their creator closes them; the
+    archive_poll_results command covers polls closed any other way and
+    rebuilds stale archives. Raw responses are not archived; exports
+    stream them from the database.
+
+    Returns:
+        The archive, or None if the poll can still receive responses.
+    """
+    # The counters change through F() updates, so read the stored values
+    poll.refresh_from_db(fields=['status', 'updated_at', 'response_count'])
+    if poll.status not in FROZEN_STATUSES:
+        return None
+
+    results = compress(build_results(poll))
+
+    with transaction.atomic():
+        archive, _ = PollResultsArchive.objects.update_or_create(
+            poll=poll,
+            defaults={
+                'status': poll.status,
+                'poll_updated_at': poll.updated_at,
+                'response_count': poll.response_count,
+                'format_version': ARCHIVE_FORMAT,
+                'results': results,
+                'size': len(results),
+            }
+        )
+    return archive
+
+
+def discard_archive(poll):
+    """Drop the archive of a poll that is open for responses again"""
+    return PollResultsArchive.objects.filter(poll=poll).delete()[0]
+
+
+def get_archive(poll):
+    """
+    Return the archive of a poll if it still matches the poll, else None.
+
+    An archive goes stale when the poll is reopened, edited or receives
+    responses after it was frozen (its response counter moved past the
+    value recorded at freeze time); callers then compute live results.
+    """
+    if poll.status not in FROZEN_STATUSES:
+        return None
+
+    archive = PollResultsArchive.objects.filter(poll=poll).first()
+    if (
+        archive is None
+        or archive.format_version != ARCHIVE_FORMAT
+        or archive.status != poll.status
+        or archive.poll_updated_at != poll.updated_at
+        or archive.response_count != poll.response_count
+    ):
+        return None
+    return archive
+
+
+def get_archived_results(poll):
+    """Decompressed ``build_results`` payload of a frozen poll, or None"""
+    archive = get_archive(poll)
+    if archive is None:
+        return None
+
+    data = decompress(archive.results)
+    # JSON object keys are strings; tallies are keyed by question id
+    data['tallies'] = {int(question_id): tally for question_id, tally in data['tallies'].items()}
+    return data
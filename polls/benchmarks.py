@@ -0,0 +1,151 @@
+import json
+import statistics
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from .models import Poll
+
+
+class Rollback(Exception):
+    """Raised to undo the writes of a benchmark run"""
+
+
+def poll_answers(poll):
+    """POST data answering every question of a poll with its first option"""
+    data = {}
+    for question in poll.questions.prefetch_related('choices'):
+        field_name = f'question_{question.id}'
+        slug = question.question_type_slug
+        choices = sorted(question.choices.all(), key=lambda choice: choice.order)
+        if slug == 'multiple_choice':
+            data[field_name] = [str(choices[0].id)] if choices else []
+        elif slug == 'rating_scale':
+            data[field_name] = str(question.min_value if question.min_value is not None else 1)
+        elif choices:
+            data[field_name] = str(choices[0].id)
+        else:
+            data[field_name] = 'Benchmark answer'
+    return data
+
+
+def measure(request, repeat, rollback=False):
+    """
+    Time ``request()`` ``repeat`` times and count its queries.
+
+    ``request`` returns the response; streaming responses are consumed so
+    their queries are counted. With ``rollback`` every run is undone.
+    """
+    timings = []
+    queries = []
+    status_code = None
+
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    response = request()
+                    if response.streaming:
+                        for _chunk in response.streaming_content:
+                            pass
+                    if rollback:
+                        raise Rollback()
+            except Rollback:
+                pass
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context.captured_queries))
+        status_code = response.status_code
+
+    return {
+        'runs': repeat,
+        'status_code': status_code,
+        'queries': max(queries),
+        'min_ms': round(min(timings), 2),
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+    }
+
+
+def run_benchmarks(poll, user, repeat=5):
+    """
+    Time the results page, a submission, the exports and the poll list
+    against a poll, as seen by ``user`` (who should be its creator).
+
+    Returns:
+        Dict of scenario names to timings and query counts.
+    """
+    # Failing views are reported with their status code instead of aborting the run
+    client = Client(raise_request_exception=False)
+    client.force_login(user)
+
+    # One respondent answers in every submit run; each run is rolled back
+    User = get_user_model()
+    respondent = User.objects.create_user(f'benchmark_{int(time.time() * 1000)}')
+    respondent_client = Client(raise_request_exception=False)
+    respondent_client.force_login(respondent)
+    answers = poll_answers(poll)
+
+    scenarios = {
+        'results': lambda: client.get(reverse('polls:results', kwargs={'slug': poll.slug})),
+        'submit': lambda: respondent_client.post(reverse('polls:respond', kwargs={'slug': poll.slug}), answers),
+        'export_json': lambda: client.get(reverse('polls:export_data', kwargs={'slug': poll.slug}), {'format': 'json'}),
+        'export_csv': lambda: client.get(reverse('polls:export_data', kwargs={'slug': poll.slug}), {'format': 'csv'}),
+        'list': lambda: client.get(reverse('polls:poll_list')),
+        'list_search': lambda: client.get(reverse('polls:poll_list'), {'q': poll.title.split()[0]}),
+        'list_popular': lambda: client.get(reverse('polls:poll_list'), {'sort': 'popular'}),
+    }
+
+    results = {}
+    try:
+        # The test client talks to the 'testserver' host
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, request in scenarios.items():
+                results[name] = measure(request, repeat, rollback=name == 'submit')
+    finally:
+        respondent.delete()
+
+    return results
+
+
+def benchmark_report(poll, user, repeat=5):
+    """Benchmark results with the context needed to compare runs"""
+    return {
+        'created_at': datetime.now().isoformat(),
+        'database': connection.vendor,
+        'poll': poll.slug,
+        'poll_responses': poll.response_count,
+        'polls': Poll.objects.count(),
+        'repeat': repeat,
+        'scenarios': run_benchmarks(poll, user, repeat),
+    }
+
+
+def compare_reports(previous, current):
+    """
+    Per scenario change of median time and query count between two reports.
+
+    Returns:
+        Dict of scenario names to ``{'median_ms', 'queries'}`` differences.
+    """
+    changes = {}
+    for name, result in current['scenarios'].items():
+        before = previous.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        changes[name] = {
+            'median_ms': round(result['median_ms'] - before['median_ms'], 2),
+            'queries': result['queries'] - before['queries'],
+        }
+    return changes
+
+
+def load_report(path):
+    with open(path) as report_file:
+        return json.load(report_file)
@@ -0,0 +1,183 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from .answers import CHOICE_TYPES
+from .models import Choice, Question
+from .registry import question_types
+
+# Choices given to questions of these types when none are provided
+DEFAULT_CHOICES = {
+    'true_false': [_('True'), _('False')],
+    'likert_scale': [
+        _('Strongly Disagree'),
+        _('Disagree'),
+        _('Neutral'),
+        _('Agree'),
+        _('Strongly Agree'),
+    ],
+}
+
+# Question fields written when existing questions are updated
+QUESTION_FIELDS = [
+    'text', 'question_type', 'is_required', 'order',
+    'min_value', 'max_value', 'step_value', 'settings'
+]
+
+
+def needs_choices(question_type):
+    return question_type.requires_choices or question_type.slug in CHOICE_TYPES
+
+
+def questions_from_data(questions_data):
+    """
+    Build unsaved questions from serialized template data.
+
+    Args:
+        questions_data: List of question dicts as stored in
+            ``PollTemplate.template_data['questions']``.
+
+    Returns:
+        List of ``(question, choices)`` pairs for ``save_questions``.
+
+    Raises:
+        ValidationError: If a question refers to an unknown question type.
+    """
+    entries = []
+    errors = []
+    for number, q_data in enumerate(questions_data, start=1):
+        question_type = question_types.by_slug(q_data.get('question_type'))
+        if question_type is None:
+            errors.append(ValidationError(
+                _('Question %(number)s has an unknown type "%(type)s".'),
+                params={'number': number, 'type': q_data.get('question_type')}
+            ))
+            continue
+
+        question = Question(
+            text=q_data.get('text', ''),
+            question_type=question_type,
+            is_required=q_data.get('is_required', True),
+            order=q_data.get('order', 0),
+            min_value=q_data.get('min_value'),
+            max_value=q_data.get('max_value'),
+            step_value=q_data.get('step_value'),
+            settings=q_data.get('settings')
+        )
+        choices = [
+            c_data['text'] if isinstance(c_data, dict) else c_data
+            for c_data in sorted(
+                q_data.get('choices', []),
+                key=lambda c_data: c_data.get('order', 0) if isinstance(c_data, dict) else 0
+            )
+        ]
+        entries.append((question, choices or None))
+
+    if errors:
+        raise ValidationError(errors)
+    return entries
+
+
+def validate_questions(entries):
+    """
+    Check a poll structure before anything is written.
+
+    Fills in the default rating scale bounds and raises ValidationError
+    listing every problem found.
+    """
+    errors = []
+    for number, (question, choices) in enumerate(entries, start=1):
+        question_type = question.question_type
+
+        if not (question.text or '').strip():
+            errors.append(ValidationError(
+                _('Question %(number)s has no text.'), params={'number': number}
+            ))
+
+        if question_type.slug == 'rating_scale':
+            if question.min_value is None:
+                question.min_value = 1
+            if question.max_value is None:
+                question.max_value = 5
+            if question.min_value >= question.max_value:
+                errors.append(ValidationError(
+                    _('Question %(number)s needs a minimum value below its maximum value.'),
+                    params={'number': number}
+                ))
+
+        # Existing questions without new choices keep the ones they have
+        if (
+            question.pk is None
+            and needs_choices(question_type)
+            and not choices
+            and question_type.slug not in DEFAULT_CHOICES
+        ):
+            errors.append(ValidationError(
+                _('Question %(number)s needs at least one choice.'), params={'number': number}
+            ))
+
+    if errors:
+        raise ValidationError(errors)
+
+
+@transaction.atomic
+def save_questions(poll, entries):
+    """
+    Save the questions of a poll and their choices with bulk queries.
+
+    Args:
+        poll: Saved poll the questions belong to.
+        entries: ``(question, choices)`` pairs. Questions may be new or
+            existing. ``choices`` is a list of choice texts replacing the
+            current choices, or None to keep them; questions left without
+            choices get the defaults of their type (True/False, Likert).
+
+    Returns:
+        The saved questions.
+
+    Raises:
+        ValidationError: If the structure is invalid; nothing is saved.
+    """
+    validate_questions(entries)
+
+    for question, _choices in entries:
+        question.poll = poll
+
+    new_questions = [question for question, _choices in entries if question.pk is None]
+    existing_questions = [question for question, _choices in entries if question.pk is not None]
+
+    existing_ids = {question.pk for question in existing_questions}
+    if existing_questions:
+        Question.objects.bulk_update(existing_questions, QUESTION_FIELDS)
+
+    if new_questions:
+        Question.objects.bulk_create(new_questions)
+        if any(question.pk is None for question in new_questions):
+            # Some backends (MySQL) do not return primary keys from bulk
+            # inserts; the rows just inserted are the newest of this poll
+            ids = list(poll.questions.order_by('-id').values_list('id', flat=True)[:len(new_questions)])
+            for question, pk in zip(new_questions, reversed(ids)):
+                question.pk = pk
+
+    replaced = [question.pk for question, choices in entries if question.pk in existing_ids and choices]
+    kept = [question.pk for question, choices in entries if question.pk in existing_ids and not choices]
+    with_choices = set(
+        Choice.objects.filter(question_id__in=kept).values_list('question_id', flat=True).distinct()
+    ) if kept else set()
+
+    if replaced:
+        Choice.objects.filter(question_id__in=replaced).delete()
+
+    new_choices = []
+    for question, choices in entries:
+        if not choices:
+            if question.pk in with_choices:
+                continue
+            choices = DEFAULT_CHOICES.get(question.question_type.slug, [])
+        new_choices.extend(
+            Choice(question=question, text=str(text), order=order)
+            for order, text in enumerate(choices, start=1)
+        )
+    Choice.objects.bulk_create(new_choices, batch_size=1000)
+
+    return [question for question, _choices in entries]
@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Statuses whose results can no longer change through new submissions
+FROZEN_STATUSES = ('closed', 'archived')
+
+# How long an open poll's results snapshot is kept
+RESULTS_TIMEOUT = 60 * 60
+
+
+def _version_key(poll_id):
+    return f'polls:poll:{poll_id}:version'
+
+
+def get_poll_version(poll_id):
+    """
+    Return the response version of a poll.
+
+    The version changes whenever responses to the poll are saved, so it can
+    be embedded in cache keys of anything derived from those responses.
+    """
+    version = cache.get(_version_key(poll_id))
+    if version is None:
+        # Seed with the current time so a lost counter never repeats an old version
+        version = int(time.time() * 1000)
+        cache.add(_version_key(poll_id), version, None)
+        version = cache.get(_version_key(poll_id), version)
+    return version
+
+
+def bump_poll_version(poll_id):
+    """Invalidate everything cached against the current response version of a poll"""
+    try:
+        return cache.incr(_version_key(poll_id))
+    except ValueError:
+        return get_poll_version(poll_id)
+
+
+def versioned_key(poll_id, name):
+    """Cache key for data derived from the current responses of a poll"""
+    return f'polls:poll:{poll_id}:v{get_poll_version(poll_id)}:{name}'
+
+
+def get_results_snapshot(poll, build):
+    """
+    Return the cached results of a poll, calling ``build()`` when stale.
+
+    A snapshot is reused while the response version, status and last
+    modification of the poll are unchanged. Active polls may also serve a
+    snapshot a few seconds behind the latest response
+    (``POLL_RESULTS_MAX_STALENESS``), so a burst of submissions does not
+    trigger a rebuild per page view. Closed and archived polls keep their
+    snapshot without expiry.
+    """
+    key = f'polls:poll:{poll.id}:results'
+    version = get_poll_version(poll.id)
+    updated_at = poll.updated_at.isoformat()
+    frozen = poll.status in FROZEN_STATUSES
+
+    snapshot = cache.get(key)
+    if snapshot and snapshot['status'] == poll.status and snapshot['updated_at'] == updated_at:
+        if snapshot['version'] == version:
+            return snapshot['data']
+        max_staleness = getattr(settings, 'POLL_RESULTS_MAX_STALENESS', 0)
+        if not frozen and time.time() - snapshot['built_at'] < max_staleness:
+            return snapshot['data']
+
+    data = build()
+    cache.set(key, {
+        'version': version,
+        'status': poll.status,
+        'updated_at': updated_at,
+        'built_at': time.time(),
+        'data': data,
+    }, None if frozen else RESULTS_TIMEOUT)
+    return data
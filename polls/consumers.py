@@ -0,0 +1,65 @@
+import asyncio
+from collections import Counter, defaultdict
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from .live import results_group
+from .models import Poll
+
+
+class PollResultsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes tally changes of a poll to its results page.
+
+    Deltas received from the channel layer are merged and sent to the
+    client at most once every ``POLL_LIVE_RESULTS_INTERVAL_MS``, so a burst
+    of submissions turns into a single small update per client.
+    """
+
+    async def connect(self):
+        self.group_name = None
+        self.flush_task = None
+        self.pending = defaultdict(Counter)
+
+        poll_id = await self.get_poll_id(self.scope['url_route']['kwargs']['slug'])
+        if poll_id is None:
+            await self.close()
+            return
+
+        self.group_name = results_group(poll_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def tally_delta(self, event):
+        for question_id, deltas in event['deltas'].items():
+            self.pending[question_id].update(deltas)
+
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_later())
+
+    async def flush_later(self):
+        interval = getattr(settings, 'POLL_LIVE_RESULTS_INTERVAL_MS', 500)
+        await asyncio.sleep(interval / 1000)
+
+        pending, self.pending = self.pending, defaultdict(Counter)
+        self.flush_task = None
+
+        deltas = {
+            question_id: {key: delta for key, delta in counts.items() if delta}
+            for question_id, counts in pending.items()
+        }
+        deltas = {question_id: counts for question_id, counts in deltas.items() if counts}
+        if deltas:
+            await self.send_json({'type': 'tally_delta', 'deltas': deltas})
+
+    @database_sync_to_async
+    def get_poll_id(self, slug):
+        return Poll.objects.filter(slug=slug).values_list('id', flat=True).first()
@@ -0,0 +1,151 @@
+import math
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+
+from .cache import versioned_key
+from .models import ResponseChoice
+
+# Question types compared against each other
+CORRELATION_TYPES = ('single_choice', 'multiple_choice')
+
+# A question needs this many respondents before its correlations are shown
+MIN_RESPONSES = 10
+
+# Choice pairs picked together fewer times than this are not reported
+MIN_JOINT_COUNT = 3
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def association(observed):
+    """
+    Chi-square test of independence for a contingency table.
+
+    Returns:
+        Dict with the expected counts, chi-square statistic, degrees of
+        freedom and Cramér's V, or None if the table has a single row or
+        column.
+    """
+    observed = np.asarray(observed, dtype=float)
+    total = observed.sum()
+    if total == 0 or min(observed.shape) < 2:
+        return None
+
+    expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / total
+    chi_square = float(((observed - expected) ** 2 / expected).sum())
+    dof = (observed.shape[0] - 1) * (observed.shape[1] - 1)
+    cramers_v = math.sqrt(chi_square / (total * (min(observed.shape) - 1)))
+
+    return {
+        'expected': expected,
+        'chi_square': chi_square,
+        'dof': dof,
+        'cramers_v': cramers_v,
+    }
+
+
+def compute_correlations(questions):
+    """
+    Find choices that are picked together across the questions of a poll.
+
+    All selected choices are loaded in one query and every pair of
+    questions is cross-tabulated by respondent.
+
+    Args:
+        questions: Questions of a single poll, with choices already loaded.
+
+    Returns:
+        Dict mapping question ids to a list of correlation dicts, strongest
+        joint counts first.
+    """
+    questions = {
+        question.id: question for question in questions
+        if question.question_type_slug in CORRELATION_TYPES
+    }
+    if len(questions) < 2:
+        return {}
+
+    rows = ResponseChoice.objects.filter(
+        response__question_id__in=questions.keys()
+    ).values_list('response__user_id', 'response__question_id', 'choice_id')
+
+    frame = pd.DataFrame.from_records(
+        list(rows.iterator(chunk_size=5000)),
+        columns=['user', 'question', 'choice']
+    )
+    if frame.empty:
+        return {}
+
+    respondents = frame.groupby('question')['user'].nunique()
+    answers = {question_id: group[['user', 'choice']] for question_id, group in frame.groupby('question')}
+    choice_texts = {
+        choice.id: choice.text
+        for question in questions.values()
+        for choice in question.choices.all()
+    }
+
+    correlations = defaultdict(list)
+
+    for first, second in combinations(sorted(answers), 2):
+        pairs = answers[first].merge(answers[second], on='user', suffixes=('_first', '_second'))
+        if pairs.empty:
+            continue
+
+        table = pd.crosstab(pairs['choice_first'], pairs['choice_second'])
+        stats = association(table.to_numpy())
+        if stats is None:
+            continue
+
+        observed = table.to_numpy()
+        expected = stats['expected']
+
+        # Only pairs chosen together more often than independence would predict
+        cells = np.argwhere((observed >= MIN_JOINT_COUNT) & (observed > expected))
+
+        for row, column in cells:
+            first_choice = choice_texts.get(table.index[row])
+            second_choice = choice_texts.get(table.columns[column])
+            if first_choice is None or second_choice is None:
+                continue
+
+            details = {
+                'count': int(observed[row, column]),
+                'expected': round(float(expected[row, column]), 1),
+                'chi_square': round(stats['chi_square'], 2),
+                'dof': stats['dof'],
+                'cramers_v': round(stats['cramers_v'], 3),
+            }
+
+            if respondents[first] >= MIN_RESPONSES:
+                correlations[first].append({
+                    'question': questions[second].text,
+                    'this_choice': first_choice,
+                    'other_choice': second_choice,
+                    **details
+                })
+            if respondents[second] >= MIN_RESPONSES:
+                correlations[second].append({
+                    'question': questions[first].text,
+                    'this_choice': second_choice,
+                    'other_choice': first_choice,
+                    **details
+                })
+
+    for question_correlations in correlations.values():
+        question_correlations.sort(key=lambda correlation: correlation['count'], reverse=True)
+
+    return dict(correlations)
+
+
+def get_poll_correlations(poll, questions):
+    """Correlations of a poll, cached until its next response"""
+    key = versioned_key(poll.id, 'correlations')
+    correlations = cache.get(key)
+    if correlations is None:
+        correlations = compute_correlations(questions)
+        cache.set(key, correlations, CACHE_TIMEOUT)
+    return correlations
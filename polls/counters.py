@@ -0,0 +1,30 @@
+from django.db.models import Count
+
+from .models import Poll
+
+
+def reconcile_counters(polls=None):
+    """
+    Recount the stored response and participant counters of polls.
+
+    Args:
+        polls: Poll queryset to check (defaults to every poll).
+
+    Returns:
+        List of the polls whose counters had drifted and were corrected.
+    """
+    polls = (polls if polls is not None else Poll.objects.all()).annotate(
+        actual_responses=Count('questions__responses'),
+        actual_participants=Count('questions__responses__user', distinct=True)
+    ).only('id', 'slug', 'response_count', 'participant_count')
+
+    drifted = []
+    for poll in polls.iterator(chunk_size=500):
+        if (poll.response_count, poll.participant_count) == (poll.actual_responses, poll.actual_participants):
+            continue
+        poll.response_count = poll.actual_responses
+        poll.participant_count = poll.actual_participants
+        drifted.append(poll)
+
+    Poll.objects.bulk_update(drifted, ['response_count', 'participant_count'], batch_size=500)
+    return drifted
@@ -0,0 +1,154 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .archive import get_archived_results
+from .models import PollResponse
+from .tallies import get_poll_tallies, labelled_counts, tally_total
+
+# Rows fetched per database round-trip while streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+# Lines sent per switch to the worker thread when streaming under ASGI
+ASYNC_BATCH_SIZE = 500
+
+CSV_HEADER = ['Question ID', 'Question Text', 'Question Type', 'User ID', 'Response', 'Timestamp']
+
+
+class Echo:
+    """File-like object that hands back what is written, for csv.writer"""
+    def write(self, value):
+        return value
+
+
+def export_questions(poll):
+    """Questions of a poll in export order, with choices loaded"""
+    return list(
+        poll.questions.prefetch_related('choices').order_by('order', 'id')
+    )
+
+
+def iter_responses(poll):
+    """
+    Stream every response of a poll from a single query.
+
+    Yields:
+        (question_id, user_id, response_data, created_at) tuples ordered
+        like ``export_questions``. ``user_id`` is None for anonymous polls.
+    """
+    responses = PollResponse.objects.filter(
+        question__poll=poll
+    ).order_by(
+        'question__order', 'question_id', 'id'
+    ).values_list(
+        'question_id', 'user_id', 'response_data', 'created_at'
+    )
+
+    hide_users = poll.poll_type == 'anonymous'
+    for question_id, user_id, response_data, created_at in responses.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield question_id, None if hide_users else user_id, response_data, created_at
+
+
+def stream_csv(poll):
+    """Yield the CSV export of a poll line by line"""
+    questions = {question.id: question for question in export_questions(poll)}
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(CSV_HEADER)
+    for question_id, user_id, response_data, created_at in iter_responses(poll):
+        question = questions[question_id]
+        yield writer.writerow([
+            question_id,
+            question.text,
+            question.question_type_slug,
+            user_id,
+            response_data,
+            created_at.isoformat()
+        ])
+
+
+def stream_ndjson(poll):
+    """Yield one JSON object per response, newline delimited"""
+    questions = {question.id: question for question in export_questions(poll)}
+
+    for question_id, user_id, response_data, created_at in iter_responses(poll):
+        question = questions[question_id]
+        yield json.dumps({
+            'poll_id': poll.id,
+            'question_id': question_id,
+            'question_text': question.text,
+            'question_type': question.question_type_slug,
+            'user_id': user_id,
+            'response_data': response_data,
+            'created_at': created_at.isoformat()
+        }) + '\n'
+
+
+def stream_json(poll):
+    """Yield the nested JSON export of a poll without building it in memory"""
+    questions = export_questions(poll)
+    archived = get_archived_results(poll)
+    poll_tallies = archived['tallies'] if archived else get_poll_tallies(poll)
+
+    header = json.dumps({
+        'poll_id': poll.id,
+        'title': poll.title,
+        'description': poll.description,
+        'creator': poll.creator.username,
+        'category': poll.category.name if poll.category else None,
+        'poll_type': poll.poll_type,
+        'status': poll.status,
+        'created_at': poll.created_at.isoformat(),
+    })
+    # Reopen the header object to append the questions array
+    yield header[:-1] + ', "questions": ['
+
+    responses = iter_responses(poll)
+    pending = next(responses, None)
+
+    for index, question in enumerate(questions):
+        tally = poll_tallies.get(question.id, {})
+        q_header = json.dumps({
+            'question_id': question.id,
+            'text': question.text,
+            'type': question.question_type_slug,
+            'is_required': question.is_required,
+            'response_count': tally_total(tally),
+            'answer_counts': labelled_counts(question, tally),
+        })
+        yield (', ' if index else '') + q_header[:-1] + ', "responses": ['
+
+        # Responses arrive in question order, so consume the ones for this question
+        first = True
+        while pending is not None and pending[0] == question.id:
+            _, user_id, response_data, created_at = pending
+            yield ('' if first else ', ') + json.dumps({
+                'user_id': user_id,
+                'response_data': response_data,
+                'created_at': created_at.isoformat()
+            })
+            first = False
+            pending = next(responses, None)
+
+        yield ']}'
+
+    yield ']}'
+
+
+async def stream_async(lines):
+    """
+    Serve an export generator to an ASGI server.
+
+    Django reads synchronous iterators into memory before sending them
+    under ASGI, so the lines are pulled in batches on the sync thread
+    (where the generator's database cursor lives) as they are sent.
+    """
+    lines = iter(lines)
+    next_batch = sync_to_async(lambda: list(islice(lines, ASYNC_BATCH_SIZE)))
+    try:
+        while batch := await next_batch():
+            yield ''.join(batch)
+    finally:
+        await sync_to_async(getattr(lines, 'close', lambda: None))()
@@ -3,7 +3,6 @@ from django.utils.translation import gettext_lazy as _
 from django.forms import inlineformset_factory
 from taggit.forms import TagField
 import json
-from django.db import transaction
 
 from accounts.models import InstitutionProfile
 
@@ -15,8 +14,10 @@ from .models import (
     PollComment, 
     QuestionType,
     PollTemplate,
-    PollResponse
+    PendingSubmission
 )
+from .registry import question_types
+from .submissions import save_submissions
 
 class PollCategoryForm(forms.ModelForm):
     class Meta:
@@ -115,6 +116,41 @@ class PollForm(forms.ModelForm):
         
         return cleaned_data
 
+class QuestionTypeChoiceIterator(forms.models.ModelChoiceIterator):
+    """Choices read from the question type registry when rendered"""
+    
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for question_type in question_types.all():
+            yield self.choice(question_type)
+    
+    def __len__(self):
+        return len(question_types.all()) + (self.field.empty_label is not None)
+    
+    def __bool__(self):
+        return True
+
+
+class QuestionTypeChoiceField(forms.ModelChoiceField):
+    """Question type field answered from the registry instead of the database"""
+    iterator = QuestionTypeChoiceIterator
+    
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        question_type = question_types.get(
+            value.pk if isinstance(value, QuestionType) else value, refresh=True
+        )
+        if question_type is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value}
+            )
+        return question_type
+
+
 class QuestionForm(forms.ModelForm):
     class Meta:
         model = Question
@@ -122,6 +158,9 @@ class QuestionForm(forms.ModelForm):
             'text', 'question_type', 'is_required', 'order',
             'min_value', 'max_value', 'step_value', 'settings'
         ]
+        field_classes = {
+            'question_type': QuestionTypeChoiceField,
+        }
         widgets = {
             'text': forms.Textarea(attrs={
                 'rows': 3, 
@@ -226,9 +265,13 @@ class PollResponseForm(forms.Form):
         # Get all questions for this poll, respecting the order specified during creation
         questions = self.poll.questions.all().order_by('order')
         
+        # Question type of each field, used to format the answers
+        self.field_types = {}
+        
         for question in questions:
             field_name = f'question_{question.id}'
-            question_type = question.question_type.slug
+            question_type = question.question_type_slug
+            self.field_types[field_name] = question_type
             
             # Parse any custom settings defined during poll creation
             settings = {}
@@ -370,50 +413,49 @@ class PollResponseForm(forms.Form):
                     help_text=f"Question type '{question_type}' may not be fully supported"
                 )
 
+    def _format_response(self, question_type, response_value):
+        """Convert a cleaned field value into the stored response data"""
+        if question_type == 'multiple_choice':
+            # For multiple choice, store as JSON array
+            return json.dumps(list(response_value))
+        elif question_type in ['rating_scale', 'likert_scale']:
+            # Store numeric values as numbers, not strings
+            try:
+                return float(response_value)
+            except (ValueError, TypeError):
+                return str(response_value)
+        # For other types, store as string
+        return str(response_value)
+
+    def get_answers(self):
+        """Formatted response data of every answered question, keyed by question id"""
+        return {
+            int(field_name.split('_')[1]): self._format_response(
+                self.field_types[field_name], response_value
+            )
+            for field_name, response_value in self.cleaned_data.items()
+            if field_name.startswith('question_')
+        }
+    
     def save(self):
         """Save user responses to all questions in this poll."""
         if not self.is_valid():
             raise ValueError("Form must be valid before saving")
         
-        saved_responses = []
+        saved = save_submissions(self.poll, [(self.user.id, self.get_answers())])
+        return saved.get(self.user.id, [])
+    
+    def enqueue(self):
+        """
+        Queue the responses to be saved by the next batch flush.
         
-        # Begin a transaction to ensure all responses are saved atomically
-        with transaction.atomic():
-            for field_name, response_value in self.cleaned_data.items():
-                if field_name.startswith('question_'):
-                    question_id = int(field_name.split('_')[1])
-                    
-                    try:
-                        question = Question.objects.get(id=question_id)
-                    except Question.DoesNotExist:
-                        continue  # Skip if question was deleted
-                    
-                    # Format response data based on question type
-                    question_type = question.question_type.slug
-                    
-                    if question_type == 'multiple_choice':
-                        # For multiple choice, store as JSON array
-                        response_data = json.dumps(list(response_value))
-                    elif question_type in ['rating_scale', 'likert_scale']:
-                        # Store numeric values as numbers, not strings
-                        try:
-                            response_data = float(response_value)
-                        except (ValueError, TypeError):
-                            response_data = str(response_value)
-                    else:
-                        # For other types, store as string
-                        response_data = str(response_value)
-                    
-                    # Create or update the response - don't include poll directly
-                    response, created = PollResponse.objects.update_or_create(
-                        question=question,
-                        user=self.user,
-                        defaults={'response_data': response_data}
-                    )
-                    
-                    saved_responses.append(response)
+        Raises IntegrityError if the user already has a queued submission
+        for this poll.
+        """
+        if not self.is_valid():
+            raise ValueError("Form must be valid before saving")
         
-        return saved_responses
+        return PendingSubmission.objects.create(poll=self.poll, user=self.user, answers=self.get_answers())
 
 class PollTemplateForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,40 @@
+import logging
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+
+def results_group(poll_id):
+    """Channel layer group of the clients watching a poll's results"""
+    return f'poll_{poll_id}_results'
+
+
+def publish_tally_deltas(poll_id, deltas):
+    """
+    Send tally changes of a poll to its live results clients.
+
+    Args:
+        poll_id: Poll the responses belong to.
+        deltas: Dict of ``{(question_id, key): delta}`` as returned by
+            ``polls.tallies.record_responses``.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not deltas:
+        return
+
+    # Channel layer messages need string keys
+    payload = defaultdict(dict)
+    for (question_id, key), delta in deltas.items():
+        payload[str(question_id)][key] = delta
+
+    try:
+        async_to_sync(channel_layer.group_send)(results_group(poll_id), {
+            'type': 'tally.delta',
+            'deltas': dict(payload),
+        })
+    except Exception:
+        # Live updates are best effort; the response itself is already saved
+        logger.exception('Could not publish live results for poll %s', poll_id)
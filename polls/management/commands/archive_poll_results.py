@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from polls.archive import freeze_poll, get_archive
+from polls.cache import FROZEN_STATUSES
+from polls.models import Poll
+
+
+class Command(BaseCommand):
+    help = 'Store the final results of closed and archived polls as compressed archives (run on a schedule)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Slugs of the polls to archive (defaults to every closed or archived poll)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild archives that are still up to date'
+        )
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.filter(status__in=FROZEN_STATUSES)
+        if options['slugs']:
+            polls = polls.filter(slug__in=options['slugs'])
+
+        archived = 0
+        for poll in polls.iterator():
+            if not options['force'] and get_archive(poll) is not None:
+                continue
+            archive = freeze_poll(poll)
+            if archive is None:
+                continue  # Reopened since it was listed
+            archived += 1
+            self.stdout.write(f"{poll.slug}: {archive.response_count} responses, {archive.size} bytes")
+
+        self.stdout.write(self.style.SUCCESS(f'{archived} poll results archived.'))
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.benchmarks import benchmark_report, compare_reports, load_report
+from polls.models import Poll
+
+
+class Command(BaseCommand):
+    help = 'Time the main poll views with query counts and write the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll',
+            help='Slug of the poll to benchmark (defaults to the active poll with most responses)'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per scenario')
+        parser.add_argument('--output', help='File to write the JSON report to (defaults to stdout)')
+        parser.add_argument('--compare', help='Earlier JSON report to compare the results with')
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.select_related('creator')
+        if options['poll']:
+            poll = polls.filter(slug=options['poll']).first()
+        else:
+            poll = polls.filter(status='active').order_by('-response_count').first()
+        if poll is None:
+            raise CommandError('No poll to benchmark; create one with seed_polls first.')
+
+        report = benchmark_report(poll, poll.creator, repeat=options['repeat'])
+        if options['compare']:
+            report['changes'] = compare_reports(load_report(options['compare']), report)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
+
+        for name, result in report['scenarios'].items():
+            change = report.get('changes', {}).get(name)
+            line = f"{name}: {result['median_ms']} ms, {result['queries']} queries"
+            if change:
+                line += f" ({change['median_ms']:+} ms, {change['queries']:+} queries)"
+            self.stderr.write(line)
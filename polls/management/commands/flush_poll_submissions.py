@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from polls.submissions import FLUSH_BATCH_SIZE, flush_pending_submissions
+
+
+class Command(BaseCommand):
+    help = 'Save queued poll submissions to the database in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=FLUSH_BATCH_SIZE,
+            help='Submissions written per transaction'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep flushing as new submissions arrive'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty (with --loop)'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            flushed = flush_pending_submissions(options['batch_size'])
+            total += flushed
+            if flushed:
+                self.stdout.write(f"{flushed} submissions saved")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'{total} queued submissions saved.'))
@@ -0,0 +1,44 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from polls.models import Poll, PollResponse
+from polls.sketches import rebuild_sketches
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily participant sketches from stored poll responses (run on a schedule)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Slugs of the polls to rebuild (defaults to every poll)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Only recompute the sketches of the last DAYS days, for polls answered since then'
+        )
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.all()
+        if options['slugs']:
+            polls = polls.filter(slug__in=options['slugs'])
+
+        since = None
+        if options['days'] is not None:
+            # Days are UTC, like the sketches; 1 is today only
+            since = (timezone.now() - timedelta(days=max(options['days'] - 1, 0))).date()
+            answered = PollResponse.objects.filter(
+                created_at__gte=datetime.combine(since, time.min, tzinfo=dt_timezone.utc)
+            ).values('question__poll')
+            polls = polls.filter(id__in=answered)
+
+        for poll in polls.iterator():
+            days = rebuild_sketches(poll, since=since)
+            self.stdout.write(f"{poll.slug}: {days} daily sketches")
+
+        self.stdout.write(self.style.SUCCESS('Participant sketches rebuilt.'))
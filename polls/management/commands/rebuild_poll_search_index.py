@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from polls.models import Poll
+from polls.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of polls'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Slugs of the polls to reindex (defaults to every poll)'
+        )
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.all()
+        if options['slugs']:
+            polls = polls.filter(slug__in=options['slugs'])
+
+        count = rebuild_index(polls)
+        self.stdout.write(self.style.SUCCESS(f'{count} polls indexed.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from polls.models import Poll
+from polls.tallies import rebuild_poll_tallies
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-question answer tallies from stored poll responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Slugs of the polls to rebuild (defaults to every poll)'
+        )
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.all()
+        if options['slugs']:
+            polls = polls.filter(slug__in=options['slugs'])
+
+        for poll in polls.iterator():
+            rows = rebuild_poll_tallies(poll)
+            self.stdout.write(f"{poll.slug}: {rows} tally rows")
+
+        self.stdout.write(self.style.SUCCESS('Poll tallies rebuilt.'))
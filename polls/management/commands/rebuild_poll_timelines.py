@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from polls.models import Poll
+from polls.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the hourly response timeline buckets from stored poll responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Slugs of the polls to rebuild (defaults to every poll)'
+        )
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.all()
+        if options['slugs']:
+            polls = polls.filter(slug__in=options['slugs'])
+
+        for poll in polls.iterator():
+            buckets = rebuild_timeline(poll)
+            self.stdout.write(f"{poll.slug}: {buckets} hourly buckets")
+
+        self.stdout.write(self.style.SUCCESS('Poll timelines rebuilt.'))
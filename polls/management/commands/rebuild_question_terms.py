@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from polls.models import Poll
+from polls.terms import rebuild_terms
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the word and phrase counts of text answers from stored poll responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Slugs of the polls to rebuild (defaults to every poll)'
+        )
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.all()
+        if options['slugs']:
+            polls = polls.filter(slug__in=options['slugs'])
+
+        for poll in polls.iterator():
+            rows = rebuild_terms(poll.questions.all())
+            self.stdout.write(f"{poll.slug}: {rows} terms")
+
+        self.stdout.write(self.style.SUCCESS('Question terms rebuilt.'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from polls.counters import reconcile_counters
+from polls.models import Poll
+
+
+class Command(BaseCommand):
+    help = 'Recount the stored response and participant counters of polls'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Slugs of the polls to reconcile (defaults to every poll)'
+        )
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.all()
+        if options['slugs']:
+            polls = polls.filter(slug__in=options['slugs'])
+
+        drifted = reconcile_counters(polls)
+        for poll in drifted:
+            self.stdout.write(
+                f"{poll.slug}: {poll.response_count} responses, {poll.participant_count} participants"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{len(drifted)} poll counters corrected.'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.seeding import SEED_BATCH_SIZE, seed_database
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with synthetic users, polls and responses for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Users to create')
+        parser.add_argument('--polls', type=int, default=100, help='Polls to create')
+        parser.add_argument('--questions', type=int, default=10, help='Questions per poll')
+        parser.add_argument('--choices', type=int, default=5, help='Choices per single and multiple choice question')
+        parser.add_argument('--respondents', type=int, default=1000, help='Users answering each poll')
+        parser.add_argument('--batch-size', type=int, default=SEED_BATCH_SIZE, help='Rows written per INSERT')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for repeatable data')
+        parser.add_argument('--prefix', default=None, help='Prefix of the usernames and poll slugs created')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['polls'] < 1 or options['questions'] < 1 or options['choices'] < 2:
+            raise CommandError('At least one user, poll and question and two choices are needed.')
+
+        counts = seed_database(
+            users=options['users'],
+            polls=options['polls'],
+            questions=options['questions'],
+            choices=options['choices'],
+            respondents=options['respondents'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            log=self.stdout.write
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {counts['users']} users, {counts['polls']} polls, {counts['questions']} questions "
+            f"and {counts['responses']} responses (prefix {counts['prefix']})."
+        ))
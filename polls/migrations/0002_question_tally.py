@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, verbose_name='Answer Key')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='polls.question', verbose_name='Question')),
+            ],
+            options={
+                'verbose_name': 'Question Tally',
+                'verbose_name_plural': 'Question Tallies',
+                'unique_together': {('question', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:47
+
+import json
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+CHOICE_TYPES = ('single_choice', 'multiple_choice', 'true_false', 'likert_scale')
+NUMERIC_TYPES = ('rating_scale',)
+
+
+def backfill_answers(apps, schema_editor):
+    """Fill numeric_value and ResponseChoice rows from existing response_data"""
+    PollResponse = apps.get_model('polls', 'PollResponse')
+    ResponseChoice = apps.get_model('polls', 'ResponseChoice')
+    Choice = apps.get_model('polls', 'Choice')
+
+    valid_choices = set(Choice.objects.values_list('question_id', 'id'))
+    responses = PollResponse.objects.filter(
+        question__question_type__slug__in=CHOICE_TYPES + NUMERIC_TYPES
+    ).values_list('id', 'question_id', 'question__question_type__slug', 'response_data')
+
+    selections = []
+    numeric_values = []
+    for response_id, question_id, question_type, response_data in responses.iterator(chunk_size=2000):
+        if question_type in NUMERIC_TYPES:
+            try:
+                numeric_values.append(PollResponse(id=response_id, numeric_value=float(response_data)))
+            except (TypeError, ValueError):
+                pass
+            continue
+
+        if question_type == 'multiple_choice':
+            try:
+                values = json.loads(response_data)
+            except (TypeError, ValueError):
+                continue
+            if not isinstance(values, list):
+                values = [values]
+        else:
+            values = [response_data]
+
+        choice_ids = set()
+        for value in values:
+            try:
+                choice_ids.add(int(float(value)))
+            except (TypeError, ValueError):
+                continue
+
+        selections.extend(
+            ResponseChoice(response_id=response_id, choice_id=choice_id)
+            for choice_id in choice_ids
+            if (question_id, choice_id) in valid_choices
+        )
+
+    PollResponse.objects.bulk_update(numeric_values, ['numeric_value'], batch_size=1000)
+    ResponseChoice.objects.bulk_create(selections, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0002_question_tally'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pollresponse',
+            name='numeric_value',
+            field=models.FloatField(blank=True, null=True, verbose_name='Numeric Value'),
+        ),
+        migrations.CreateModel(
+            name='ResponseChoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='response_choices', to='polls.choice', verbose_name='Choice')),
+                ('response', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='response_choices', to='polls.pollresponse', verbose_name='Response')),
+            ],
+            options={
+                'verbose_name': 'Response Choice',
+                'verbose_name_plural': 'Response Choices',
+            },
+        ),
+        migrations.AddField(
+            model_name='pollresponse',
+            name='selected_choices',
+            field=models.ManyToManyField(blank=True, related_name='selections', through='polls.ResponseChoice', to='polls.choice', verbose_name='Selected Choices'),
+        ),
+        migrations.AddIndex(
+            model_name='pollresponse',
+            index=models.Index(fields=['question', 'numeric_value'], name='polls_pollr_questio_c7e51e_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='responsechoice',
+            unique_together={('response', 'choice')},
+        ),
+        migrations.RunPython(backfill_answers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_normalized_answers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollTimelineBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Hour')),
+                ('submissions', models.PositiveIntegerField(default=0, verbose_name='Submissions')),
+                ('participants', models.PositiveIntegerField(default=0, verbose_name='New Participants')),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_buckets', to='polls.poll', verbose_name='Poll')),
+            ],
+            options={
+                'verbose_name': 'Poll Timeline Bucket',
+                'verbose_name_plural': 'Poll Timeline Buckets',
+                'ordering': ['poll', 'hour'],
+                'unique_together': {('poll', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    """Count the responses and participants already stored for each poll"""
+    Poll = apps.get_model('polls', 'Poll')
+
+    polls = Poll.objects.annotate(
+        actual_responses=Count('questions__responses'),
+        actual_participants=Count('questions__responses__user', distinct=True)
+    )
+    updated = []
+    for poll in polls.iterator(chunk_size=500):
+        poll.response_count = poll.actual_responses
+        poll.participant_count = poll.actual_participants
+        updated.append(poll)
+
+    Poll.objects.bulk_update(updated, ['response_count', 'participant_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_poll_timeline_bucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Participants'),
+        ),
+        migrations.AddField(
+            model_name='poll',
+            name='response_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Responses'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
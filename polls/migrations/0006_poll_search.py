@@ -0,0 +1,115 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:03
+
+import re
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FIELD_WEIGHTS = {'title': 3.0, 'tags': 2.0, 'category': 2.0, 'description': 1.0}
+
+# Frozen copy of polls.text.tokenize as of this migration, so later changes
+# to the tokenizer do not alter what the backfill produces
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same
+she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself
+yourselves
+""".split())
+
+WORD_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+
+MAX_TERM_LENGTH = 64
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [
+        word[:MAX_TERM_LENGTH]
+        for word in WORD_RE.findall(text.lower())
+        if len(word) > 1 and not word.isdigit() and word not in STOPWORDS
+    ]
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('CREATE FULLTEXT INDEX polls_poll_title_ft ON polls_poll (title)')
+    schema_editor.execute('CREATE FULLTEXT INDEX polls_poll_search_ft ON polls_poll (search_document)')
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('DROP INDEX polls_poll_title_ft ON polls_poll')
+    schema_editor.execute('DROP INDEX polls_poll_search_ft ON polls_poll')
+
+
+def backfill_search_index(apps, schema_editor):
+    """Index the polls that already exist"""
+    Poll = apps.get_model('polls', 'Poll')
+    PollSearchTerm = apps.get_model('polls', 'PollSearchTerm')
+    build_terms = schema_editor.connection.vendor != 'mysql'
+
+    polls = []
+    terms = []
+    for poll in Poll.objects.select_related('category').prefetch_related('tags'):
+        fields = {
+            'title': poll.title,
+            'tags': ' '.join(tag.name for tag in poll.tags.all()),
+            'category': poll.category.name if poll.category else '',
+            'description': poll.description,
+        }
+        poll.search_document = ' '.join(text for text in fields.values() if text)
+        polls.append(poll)
+
+        if build_terms:
+            weights = Counter()
+            for field, text in fields.items():
+                for term in tokenize(text):
+                    weights[term] += FIELD_WEIGHTS[field]
+            terms.extend(
+                PollSearchTerm(poll=poll, term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+
+    Poll.objects.bulk_update(polls, ['search_document'], batch_size=500)
+    PollSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_poll_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Search Document'),
+        ),
+        migrations.CreateModel(
+            name='PollSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Term')),
+                ('weight', models.FloatField(default=0, verbose_name='Weight')),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='polls.poll', verbose_name='Poll')),
+            ],
+            options={
+                'verbose_name': 'Poll Search Term',
+                'verbose_name_plural': 'Poll Search Terms',
+                'indexes': [models.Index(fields=['term', 'poll'], name='polls_polls_term_30883a_idx')],
+                'unique_together': {('poll', 'term')},
+            },
+        ),
+        migrations.RunPython(add_fulltext_indexes, drop_fulltext_indexes),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0006_poll_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answers', models.JSONField(verbose_name='Answers')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_submissions', to='polls.poll', verbose_name='Poll')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_submissions', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Pending Submission',
+                'verbose_name_plural': 'Pending Submissions',
+                'ordering': ['id'],
+                'unique_together': {('poll', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_pending_submission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollResultsArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20, verbose_name='Status')),
+                ('poll_updated_at', models.DateTimeField(verbose_name='Poll Updated At')),
+                ('response_count', models.PositiveIntegerField(default=0, verbose_name='Responses')),
+                ('format_version', models.PositiveSmallIntegerField(default=1, verbose_name='Format Version')),
+                ('results', models.BinaryField(verbose_name='Results')),
+                ('responses', models.BinaryField(verbose_name='Responses')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Size (bytes)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('poll', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='results_archive', to='polls.poll', verbose_name='Poll')),
+            ],
+            options={
+                'verbose_name': 'Poll Results Archive',
+                'verbose_name_plural': 'Poll Results Archives',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0008_poll_results_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipantSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('registers', models.BinaryField(verbose_name='Registers')),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participant_sketches', to='polls.poll', verbose_name='Poll')),
+            ],
+            options={
+                'verbose_name': 'Participant Sketch',
+                'verbose_name_plural': 'Participant Sketches',
+                'ordering': ['poll', 'day'],
+                'unique_together': {('poll', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0009_participant_sketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=130, verbose_name='Term')),
+                ('words', models.PositiveSmallIntegerField(default=1, verbose_name='Words')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='polls.question', verbose_name='Question')),
+            ],
+            options={
+                'verbose_name': 'Question Term',
+                'verbose_name_plural': 'Question Terms',
+                'indexes': [models.Index(fields=['question', '-count'], name='polls_quest_questio_77b5c9_idx')],
+                'unique_together': {('question', 'term')},
+            },
+        ),
+    ]
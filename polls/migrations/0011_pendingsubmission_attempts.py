@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0010_question_term'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingsubmission',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Attempts'),
+        ),
+        migrations.AddField(
+            model_name='pendingsubmission',
+            name='error',
+            field=models.TextField(blank=True, verbose_name='Error'),
+        ),
+    ]
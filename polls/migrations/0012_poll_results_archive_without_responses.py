@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0011_pendingsubmission_attempts'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='pollresultsarchive',
+            name='responses',
+        ),
+    ]
@@ -32,6 +32,10 @@ class PollCategory(models.Model):
         return reverse('polls:category', kwargs={'slug': self.slug})
 
 
+# Poll columns maintained with F() updates only (see Poll.count_submissions)
+COUNTER_FIELDS = ('response_count', 'participant_count')
+
+
 class Poll(models.Model):
     POLL_TYPE_CHOICES = (
         ('public', _('Public')),
@@ -94,6 +98,14 @@ class Poll(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Title, tags, category and description flattened for full-text search
+    search_document = models.TextField(blank=True, default='', editable=False, verbose_name=_('Search Document'))
+
+    # Counters added to on submission and recounted when questions or responses
+    # are deleted; reconcile_poll_counters repairs rows changed outside the ORM
+    response_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('Responses'))
+    participant_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('Participants'))
+
     # Tagging
     tags = TaggableManager(blank=True)
 
@@ -111,6 +123,14 @@ class Poll(models.Model):
             # Ensure uniqueness
             if Poll.objects.filter(slug=self.slug).exists():
                 self.slug = f"{self.slug}-{uuid.uuid4().hex[:8]}"
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # The counters only change through F() updates; writing back the values
+            # loaded with the poll would undo submissions saved since
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS and field.attname not in deferred
+            ]
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -118,17 +138,47 @@ class Poll(models.Model):
 
     @property
     def total_responses(self):
-        return PollResponse.objects.filter(question__poll=self).count()
+        return self.response_count
 
     @property
     def total_participants(self):
-        return PollResponse.objects.filter(question__poll=self).values('user').distinct().count()
+        return self.participant_count
+
+    def count_submissions(self, responses, participants):
+        """Add saved responses and new participants to the stored counters without reading them first"""
+        Poll.objects.filter(pk=self.pk).update(
+            response_count=models.F('response_count') + responses,
+            participant_count=models.F('participant_count') + participants
+        )
 
     @property
     def is_active(self):
         return self.status == 'active'
 
 
+class PollSearchTerm(models.Model):
+    """Inverted index entry used to search polls without a FULLTEXT index"""
+    poll = models.ForeignKey(
+        Poll,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name=_('Poll')
+    )
+    term = models.CharField(max_length=64, verbose_name=_('Term'))
+    weight = models.FloatField(default=0, verbose_name=_('Weight'))
+    
+    class Meta:
+        verbose_name = _('Poll Search Term')
+        verbose_name_plural = _('Poll Search Terms')
+        unique_together = ('poll', 'term')
+        indexes = [
+            models.Index(fields=['term', 'poll']),
+        ]
+    
+    def __str__(self):
+        return f"{self.term} ({self.weight})"
+
+
 class PollComment(models.Model):
     poll = models.ForeignKey(
         Poll,
@@ -165,6 +215,34 @@ class QuestionType(models.Model):
     def __str__(self):
         return self.name
 
+class QuestionQuerySet(models.QuerySet):
+    def with_tallies(self):
+        """
+        Prefetch the choices, tallies and top answer terms of the questions,
+        so ``total_responses``, ``top_terms`` and the ``response_data`` of
+        choice and rating questions run no further queries.
+        """
+        from .terms import top_terms_prefetch
+        
+        return self.prefetch_related('choices', 'tallies', top_terms_prefetch())
+    
+    def with_text_responses(self):
+        """Prefetch the answers of text questions, read by their ``response_data``"""
+        from .answers import TEXT_TYPES
+        from .registry import question_types
+        
+        text_type_ids = [question_type.id for question_type in question_types.with_slugs(TEXT_TYPES)]
+        return self.prefetch_related(
+            models.Prefetch(
+                'responses',
+                queryset=PollResponse.objects.filter(
+                    question__question_type_id__in=text_type_ids
+                ).only('id', 'question_id', 'response_data').order_by('id'),
+                to_attr='text_responses'
+            )
+        )
+
+
 class Question(models.Model):
     poll = models.ForeignKey(
         Poll,
@@ -190,6 +268,8 @@ class Question(models.Model):
     # Additional settings as JSON
     settings = models.JSONField(blank=True, null=True, verbose_name=_('Settings'))
     
+    objects = QuestionQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('Question')
         verbose_name_plural = _('Questions')
@@ -200,49 +280,55 @@ class Question(models.Model):
     
     @property
     def total_responses(self):
-        return self.responses.count()
+        from .tallies import tally_total
+        
+        return tally_total(self.tally)
+    
+    @property
+    def tally(self):
+        """``{key: count}`` of the question, prefetched by ``with_tallies()`` if used"""
+        if 'tallies' in getattr(self, '_prefetched_objects_cache', {}):
+            return {tally.key: tally.count for tally in self.tallies.all()}
+        
+        from .tallies import get_question_tally
+        return get_question_tally(self)
+    
+    @property
+    def question_type_slug(self):
+        """Slug of the question type, from the in-process registry"""
+        from .registry import question_types
+        
+        slug = question_types.slug_for(self.question_type_id)
+        if slug is None:
+            # Created by another process since the registry was loaded
+            slug = self.question_type.slug
+        return slug
     
     @property
     def response_data(self):
         """Returns aggregated response data for analytics"""
-        question_type = self.question_type.slug
-        responses = self.responses.all()
-        
-        if question_type in ['multiple_choice', 'single_choice']:
-            choices = Choice.objects.filter(question=self)
-            result = {choice.text: 0 for choice in choices}
-            
-            for response in responses:
-                if question_type == 'multiple_choice':
-                    selected_choices = json.loads(response.response_data)
-                    for choice_id in selected_choices:
-                        choice = Choice.objects.get(id=choice_id)
-                        result[choice.text] += 1
-                else:
-                    choice = Choice.objects.get(id=int(response.response_data))
-                    result[choice.text] += 1
-            
-            return result
+        from .answers import CHOICE_TYPES, NUMERIC_TYPES, TEXT_TYPES
+        from .tallies import labelled_counts
         
-        elif question_type == 'rating':
-            result = {i: 0 for i in range(self.min_value, self.max_value + 1)}
-            for response in responses:
-                value = int(response.response_data)
-                result[value] += 1
-            return result
+        question_type = self.question_type_slug
         
-        elif question_type == 'likert':
-            options = ['strongly_disagree', 'disagree', 'neutral', 'agree', 'strongly_agree']
-            result = {option: 0 for option in options}
-            for response in responses:
-                value = response.response_data
-                result[value] += 1
-            return result
+        # Choice and rating counts are read from the maintained tally table
+        if question_type in CHOICE_TYPES or question_type in NUMERIC_TYPES:
+            return labelled_counts(self, self.tally)
         
-        elif question_type == 'open_ended':
-            return [response.response_data for response in responses]
+        elif question_type in TEXT_TYPES:
+            if hasattr(self, 'text_responses'):
+                return [response.response_data for response in self.text_responses]
+            return list(self.responses.values_list('response_data', flat=True))
         
         return None
+    
+    @property
+    def top_terms(self):
+        """``{term: count}`` of the most frequent words and phrases in the answers"""
+        from .terms import top_terms
+        
+        return top_terms(self)
 
 
 class Choice(models.Model):
@@ -278,17 +364,213 @@ class PollResponse(models.Model):
         verbose_name=_('User')
     )
     response_data = models.TextField(verbose_name=_('Response Data'))
+    
+    # Normalized answer, filled from response_data by polls.answers
+    selected_choices = models.ManyToManyField(
+        Choice,
+        through='ResponseChoice',
+        related_name='selections',
+        blank=True,
+        verbose_name=_('Selected Choices')
+    )
+    numeric_value = models.FloatField(blank=True, null=True, verbose_name=_('Numeric Value'))
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         verbose_name = _('Poll Response')
         verbose_name_plural = _('Poll Responses')
         unique_together = ('question', 'user')
+        indexes = [
+            models.Index(fields=['question', 'numeric_value']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.question.text[:30]}"
 
 
+class ResponseChoice(models.Model):
+    """A choice selected in a poll response"""
+    response = models.ForeignKey(
+        PollResponse,
+        on_delete=models.CASCADE,
+        related_name='response_choices',
+        verbose_name=_('Response')
+    )
+    choice = models.ForeignKey(
+        Choice,
+        on_delete=models.CASCADE,
+        related_name='response_choices',
+        verbose_name=_('Choice')
+    )
+    
+    class Meta:
+        verbose_name = _('Response Choice')
+        verbose_name_plural = _('Response Choices')
+        unique_together = ('response', 'choice')
+    
+    def __str__(self):
+        return f"{self.response_id} - {self.choice_id}"
+
+
+class QuestionTally(models.Model):
+    """Running count of answers per question and answer key.
+
+    Choice-based questions are keyed by choice id, rating scales by the
+    rated value, and every question keeps a ``_total`` row counting its
+    responses. Rows are maintained by ``polls.tallies`` as responses are
+    saved and can be rebuilt with ``manage.py rebuild_poll_tallies``.
+    """
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='tallies',
+        verbose_name=_('Question')
+    )
+    key = models.CharField(max_length=64, verbose_name=_('Answer Key'))
+    count = models.PositiveIntegerField(default=0, verbose_name=_('Count'))
+
+    class Meta:
+        verbose_name = _('Question Tally')
+        verbose_name_plural = _('Question Tallies')
+        unique_together = ('question', 'key')
+
+    def __str__(self):
+        return f"{self.question_id} - {self.key}: {self.count}"
+
+
+class QuestionTerm(models.Model):
+    """Running count of a word or phrase across the text answers of a question.
+
+    Rows are maintained by ``polls.terms`` as responses are saved and can
+    be rebuilt with ``manage.py rebuild_question_terms``.
+    """
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='terms',
+        verbose_name=_('Question')
+    )
+    # Up to MAX_NGRAM words of MAX_TERM_LENGTH characters (see polls.text)
+    term = models.CharField(max_length=130, verbose_name=_('Term'))
+    words = models.PositiveSmallIntegerField(default=1, verbose_name=_('Words'))
+    count = models.PositiveIntegerField(default=0, verbose_name=_('Count'))
+
+    class Meta:
+        verbose_name = _('Question Term')
+        verbose_name_plural = _('Question Terms')
+        unique_together = ('question', 'term')
+        indexes = [
+            models.Index(fields=['question', '-count']),
+        ]
+
+    def __str__(self):
+        return f"{self.question_id} - {self.term}: {self.count}"
+
+
+class PendingSubmission(models.Model):
+    """Validated answers waiting to be written to PollResponse in a batch"""
+    poll = models.ForeignKey(
+        Poll,
+        on_delete=models.CASCADE,
+        related_name='pending_submissions',
+        verbose_name=_('Poll')
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='pending_submissions',
+        verbose_name=_('User')
+    )
+    # Question ids mapped to formatted response data
+    answers = models.JSONField(verbose_name=_('Answers'))
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    # Failed flushes; rows that keep failing are left aside for review
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_('Attempts'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+    
+    class Meta:
+        verbose_name = _('Pending Submission')
+        verbose_name_plural = _('Pending Submissions')
+        unique_together = ('poll', 'user')
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.user} - {self.poll} (pending)"
+
+
+class PollTimelineBucket(models.Model):
+    """Submissions and new participants of a poll within one hour"""
+    poll = models.ForeignKey(
+        Poll,
+        on_delete=models.CASCADE,
+        related_name='timeline_buckets',
+        verbose_name=_('Poll')
+    )
+    hour = models.DateTimeField(verbose_name=_('Hour'))
+    submissions = models.PositiveIntegerField(default=0, verbose_name=_('Submissions'))
+    participants = models.PositiveIntegerField(default=0, verbose_name=_('New Participants'))
+    
+    class Meta:
+        verbose_name = _('Poll Timeline Bucket')
+        verbose_name_plural = _('Poll Timeline Buckets')
+        unique_together = ('poll', 'hour')
+        ordering = ['poll', 'hour']
+    
+    def __str__(self):
+        return f"{self.poll_id} - {self.hour:%Y-%m-%d %H:00}: {self.submissions}"
+
+
+class ParticipantSketch(models.Model):
+    """HyperLogLog sketch of the users who answered a poll on one day"""
+    poll = models.ForeignKey(
+        Poll,
+        on_delete=models.CASCADE,
+        related_name='participant_sketches',
+        verbose_name=_('Poll')
+    )
+    day = models.DateField(verbose_name=_('Day'))
+    # zlib compressed registers, see polls.sketches
+    registers = models.BinaryField(verbose_name=_('Registers'))
+    
+    class Meta:
+        verbose_name = _('Participant Sketch')
+        verbose_name_plural = _('Participant Sketches')
+        unique_together = ('poll', 'day')
+        ordering = ['poll', 'day']
+    
+    def __str__(self):
+        return f"{self.poll_id} - {self.day}"
+
+
+class PollResultsArchive(models.Model):
+    """Final results of a closed or archived poll, stored compressed"""
+    poll = models.OneToOneField(
+        Poll,
+        on_delete=models.CASCADE,
+        related_name='results_archive',
+        verbose_name=_('Poll')
+    )
+    # State of the poll the results were computed for
+    status = models.CharField(max_length=20, verbose_name=_('Status'))
+    poll_updated_at = models.DateTimeField(verbose_name=_('Poll Updated At'))
+    # Value of the poll's response counter when the results were computed
+    response_count = models.PositiveIntegerField(default=0, verbose_name=_('Responses'))
+    format_version = models.PositiveSmallIntegerField(default=1, verbose_name=_('Format Version'))
+    # zlib compressed JSON of the results
+    results = models.BinaryField(verbose_name=_('Results'))
+    size = models.PositiveIntegerField(default=0, verbose_name=_('Size (bytes)'))
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('Poll Results Archive')
+        verbose_name_plural = _('Poll Results Archives')
+    
+    def __str__(self):
+        return f"{self.poll} ({self.status})"
+
+
 class PollTemplate(models.Model):
     title = models.CharField(max_length=255, verbose_name=_('Title'))
     description = models.TextField(verbose_name=_('Description'))
@@ -0,0 +1,195 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from urllib.parse import urlencode
+
+from django.db.models import Q
+
+# Query parameters that carry the position within a listing
+CURSOR_PARAMS = ('after', 'before', 'page')
+
+# Approximate totals stop counting past this many rows
+APPROXIMATE_COUNT_LIMIT = 1000
+
+
+def encode_cursor(values):
+    """Opaque, URL safe token for the ordering values of a row"""
+    values = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Ordering values of a cursor token, or None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+class CursorPage:
+    """One page of a keyset paginated listing"""
+
+    def __init__(self, paginator, object_list, next_cursor=None, previous_cursor=None, params=None):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.params = params or {}
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _query(self, **position):
+        return urlencode({**self.params, **position}, doseq=True)
+
+    @property
+    def next_query(self):
+        """Query string of the next page, keeping the other request parameters"""
+        return self._query(after=self.next_cursor) if self.has_next() else ''
+
+    @property
+    def previous_query(self):
+        """Query string of the previous page, keeping the other request parameters"""
+        return self._query(before=self.previous_cursor) if self.has_previous() else ''
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by the values of its ordering fields (keyset
+    pagination) instead of OFFSET, so every page costs the same.
+
+    The last ordering field must be unique; ``id`` by default. Totals are
+    not counted unless ``approximate_total`` is set, in which case counting
+    stops at ``APPROXIMATE_COUNT_LIMIT`` rows.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'), approximate_total=False):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.approximate_total = approximate_total
+        self._count = None
+
+    @property
+    def fields(self):
+        return [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+
+    @property
+    def count(self):
+        """Number of rows, counted up to APPROXIMATE_COUNT_LIMIT + 1"""
+        if not self.approximate_total:
+            return None
+        if self._count is None:
+            self._count = self.queryset.order_by()[:APPROXIMATE_COUNT_LIMIT + 1].count()
+        return min(self._count, APPROXIMATE_COUNT_LIMIT)
+
+    @property
+    def count_is_exact(self):
+        return self.count is not None and self._count <= APPROXIMATE_COUNT_LIMIT
+
+    def _seek(self, values, forward):
+        """Condition selecting the rows after (or before) the given position"""
+        condition = Q()
+        for index, (field, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            # Ties on the earlier fields fall through to the next one
+            for (previous, _), value in zip(self.fields[:index], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _values(self, obj):
+        # Rows are model instances, or dicts for values() querysets
+        if isinstance(obj, dict):
+            return [obj[field] for field, _ in self.fields]
+        return [getattr(obj, field) for field, _ in self.fields]
+
+    def page(self, after=None, before=None, params=None):
+        """
+        Return the page following the ``after`` cursor, or preceding the
+        ``before`` cursor, or the first page when neither is valid.
+        """
+        after = decode_cursor(after, len(self.fields)) if after else None
+        before = decode_cursor(before, len(self.fields)) if before else None
+        forward = before is None
+
+        queryset = self.queryset
+        if after is not None:
+            queryset = queryset.filter(self._seek(after, forward=True))
+        elif before is not None:
+            queryset = queryset.filter(self._seek(before, forward=False))
+
+        if forward:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.order_by(*[
+                field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering
+            ])
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if forward:
+            has_next, has_previous = has_more, after is not None
+        else:
+            has_next, has_previous = True, has_more
+
+        return CursorPage(
+            self,
+            rows,
+            next_cursor=encode_cursor(self._values(rows[-1])) if rows and has_next else None,
+            previous_cursor=encode_cursor(self._values(rows[0])) if rows and has_previous else None,
+            params=params
+        )
+
+    def page_for_request(self, request):
+        """Page selected by the ``after``/``before`` parameters of a request"""
+        params = {
+            key: request.GET.getlist(key)
+            for key in request.GET
+            if key not in CURSOR_PARAMS
+        }
+        return self.page(request.GET.get('after'), request.GET.get('before'), params)
+
+
+class CursorPaginationMixin:
+    """ListView mixin replacing OFFSET pagination with CursorPaginator"""
+    paginate_ordering = ('-created_at', '-id')
+    paginate_approximate_total = False
+
+    def get_paginate_ordering(self):
+        return self.paginate_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(
+            queryset,
+            page_size,
+            ordering=self.get_paginate_ordering(),
+            approximate_total=self.paginate_approximate_total
+        )
+        page = paginator.page_for_request(self.request)
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,110 @@
+import threading
+import time
+from types import MappingProxyType
+
+from django.db.models import Count, Max
+
+from .models import QuestionType
+
+# Seconds between checks that another process has not added or removed types
+GENERATION_CHECK_INTERVAL = 30
+
+# Seconds after which the types are reloaded anyway, to pick up edits made
+# by another process that leave the number of types unchanged
+RELOAD_INTERVAL = 300
+
+
+class QuestionTypeRegistry:
+    """
+    In-process copy of the QuestionType table.
+
+    Question types change rarely and are looked up for every question that
+    is rendered, saved or analysed, so they are loaded once per process.
+    Saving or deleting a type clears this process's copy immediately. Other
+    processes compare the number and highest id of the types in the
+    database every ``GENERATION_CHECK_INTERVAL`` seconds, so they see added
+    or deleted types within that time, and reload every ``RELOAD_INTERVAL``
+    seconds to see edited ones. The instances returned are shared and must
+    not be modified.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (by_id, by_slug) mappings, replaced as a whole and never modified
+        self._snapshot = None
+        self._generation = None
+        self._checked_at = 0
+        self._loaded_at = 0
+
+    def _load(self, force=False):
+        """Current ``(by_id, by_slug)`` snapshot, reloaded when the types changed"""
+        snapshot = self._snapshot
+        if (
+            not force
+            and snapshot is not None
+            and time.monotonic() - self._checked_at < GENERATION_CHECK_INTERVAL
+        ):
+            return snapshot
+
+        with self._lock:
+            now = time.monotonic()
+            generation = tuple(QuestionType.objects.aggregate(count=Count('id'), last=Max('id')).values())
+            if (
+                self._snapshot is None
+                or generation != self._generation
+                or now - self._loaded_at >= RELOAD_INTERVAL
+            ):
+                types = list(QuestionType.objects.order_by('id'))
+                self._snapshot = (
+                    MappingProxyType({question_type.id: question_type for question_type in types}),
+                    MappingProxyType({question_type.slug: question_type for question_type in types}),
+                )
+                self._generation = generation
+                self._loaded_at = now
+            self._checked_at = now
+            return self._snapshot
+
+    def all(self):
+        """Every question type, in creation order"""
+        by_id, _ = self._load()
+        return list(by_id.values())
+
+    def get(self, type_id, refresh=False):
+        """
+        Question type by id, or None. With ``refresh``, an id missing from
+        this process's copy is looked up again in the database, in case
+        another process has just created it.
+        """
+        try:
+            type_id = int(type_id)
+        except (TypeError, ValueError):
+            return None
+        by_id, _ = self._load()
+        if type_id not in by_id and refresh:
+            by_id, _ = self._load(force=True)
+        return by_id.get(type_id)
+
+    def by_slug(self, slug):
+        """Question type by slug, or None"""
+        _, by_slug = self._load()
+        return by_slug.get(slug)
+
+    def with_slugs(self, slugs):
+        """Question types having one of the given slugs, in creation order"""
+        by_id, _ = self._load()
+        slugs = set(slugs)
+        return [question_type for question_type in by_id.values() if question_type.slug in slugs]
+
+    def slug_for(self, type_id):
+        """Slug of the question type with the given id, or None"""
+        question_type = self.get(type_id)
+        return question_type.slug if question_type else None
+
+    def invalidate(self):
+        """Reload the types on next use in this process"""
+        with self._lock:
+            # Readers keep using the current snapshot until the reload replaces it
+            self._generation = None
+            self._checked_at = 0
+
+question_types = QuestionTypeRegistry()
@@ -0,0 +1,7 @@
+# polls/routing.py
+from django.urls import path
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/polls/poll/<slug:slug>/results/', consumers.PollResultsConsumer.as_asgi()),
+]
@@ -0,0 +1,131 @@
+import math
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Poll, PollSearchTerm
+from .text import tokenize
+
+# How much a match in each field counts towards the relevance of a poll
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'tags': 2.0,
+    'category': 2.0,
+    'description': 1.0,
+}
+
+INDEX_BATCH_SIZE = 500
+
+
+def uses_fulltext():
+    """Whether the database searches polls through its own FULLTEXT indexes"""
+    return connection.vendor == 'mysql'
+
+
+def poll_fields(poll):
+    """Searchable text of a poll by field (tags and category should be preloaded)"""
+    return {
+        'title': poll.title,
+        'tags': ' '.join(tag.name for tag in poll.tags.all()),
+        'category': poll.category.name if poll.category else '',
+        'description': poll.description,
+    }
+
+
+def term_weights(fields):
+    """Weight of every term in the searchable fields of a poll"""
+    weights = Counter()
+    for field, text in fields.items():
+        for term in tokenize(text):
+            weights[term] += FIELD_WEIGHTS[field]
+    return weights
+
+
+def index_polls(polls):
+    """
+    Refresh the search document of polls, and their inverted index terms
+    when the database has no FULLTEXT support.
+    """
+    polls = list(polls.select_related('category').prefetch_related('tags'))
+    if not polls:
+        return
+
+    terms = []
+    for poll in polls:
+        fields = poll_fields(poll)
+        poll.search_document = ' '.join(text for text in fields.values() if text)
+        if not uses_fulltext():
+            terms.extend(
+                PollSearchTerm(poll=poll, term=term, weight=weight)
+                for term, weight in term_weights(fields).items()
+            )
+
+    with transaction.atomic():
+        # bulk_update leaves updated_at alone, so cached results stay valid
+        Poll.objects.bulk_update(polls, ['search_document'], batch_size=INDEX_BATCH_SIZE)
+        if not uses_fulltext():
+            PollSearchTerm.objects.filter(poll__in=polls).delete()
+            PollSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+def index_poll(poll_id):
+    """Refresh the search index entry of a single poll"""
+    index_polls(Poll.objects.filter(pk=poll_id))
+
+
+def rebuild_index(polls=None):
+    """Reindex polls in batches, returning how many were indexed"""
+    polls = polls if polls is not None else Poll.objects.all()
+    poll_ids = list(polls.order_by('pk').values_list('pk', flat=True))
+
+    for start in range(0, len(poll_ids), INDEX_BATCH_SIZE):
+        index_polls(Poll.objects.filter(pk__in=poll_ids[start:start + INDEX_BATCH_SIZE]))
+
+    return len(poll_ids)
+
+
+def search_polls(queryset, query):
+    """
+    Restrict a poll queryset to polls matching a search query.
+
+    Matches are annotated with ``search_rank``; higher is more relevant.
+    MySQL ranks with its natural language FULLTEXT search, other databases
+    with the PollSearchTerm inverted index, weighting rarer terms higher.
+    """
+    if uses_fulltext():
+        # MATCH needs the exact column list of a FULLTEXT index
+        rank = RawSQL(
+            'MATCH (polls_poll.title) AGAINST (%s IN NATURAL LANGUAGE MODE) * %s + '
+            'MATCH (polls_poll.search_document) AGAINST (%s IN NATURAL LANGUAGE MODE)',
+            [query, FIELD_WEIGHTS['title'], query],
+            output_field=FloatField()
+        )
+        return queryset.annotate(search_rank=rank).filter(search_rank__gt=0)
+
+    # Empty results keep the annotation so they can still be ordered by rank
+    no_results = queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    terms = set(tokenize(query))
+    if not terms:
+        return no_results
+
+    frequencies = dict(
+        PollSearchTerm.objects.filter(term__in=terms).values_list('term').annotate(count=Count('id')).order_by()
+    )
+    if not frequencies:
+        return no_results
+
+    total = Poll.objects.count()
+    rank = Sum(
+        Case(
+            *[
+                When(search_terms__term=term, then=F('search_terms__weight') * math.log(1 + total / count))
+                for term, count in frequencies.items()
+            ],
+            default=0.0,
+            output_field=FloatField()
+        )
+    )
+    return queryset.filter(search_terms__term__in=frequencies.keys()).annotate(search_rank=rank)
@@ -0,0 +1,269 @@
+import json
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from gamification.models import UserPoints
+
+from .builder import DEFAULT_CHOICES
+from .counters import reconcile_counters
+from .models import Choice, Poll, PollResponse, Question, QuestionType, ResponseChoice
+from .registry import question_types
+from .search import rebuild_index
+from .sketches import rebuild_sketches
+from .tallies import rebuild_tallies
+from .terms import rebuild_terms
+from .timeline import rebuild_timeline
+
+# Question types given to seeded questions, in rotation
+SEED_QUESTION_TYPES = (
+    'single_choice', 'multiple_choice', 'rating_scale',
+    'likert_scale', 'true_false', 'open_ended',
+)
+
+WORDS = (
+    'campus', 'library', 'transport', 'housing', 'food', 'course', 'exam',
+    'lecture', 'community', 'health', 'water', 'market', 'internet', 'safety',
+    'sports', 'events', 'research', 'funding', 'clinic', 'school', 'youth',
+    'energy', 'climate', 'farming', 'jobs', 'training', 'mentors', 'access',
+)
+
+# Rows written per INSERT
+SEED_BATCH_SIZE = 5000
+
+# Seeded responses are spread over this many days before now
+RESPONSE_DAYS = 30
+
+
+def _sentence(rng, words=8):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _question_type(slug):
+    question_type = question_types.by_slug(slug)
+    if question_type is None:
+        question_type, _ = QuestionType.objects.get_or_create(
+            slug=slug,
+            defaults={'name': slug.replace('_', ' ').title()}
+        )
+        question_types.invalidate()
+    return question_type
+
+
+def seed_users(count, prefix, batch_size=SEED_BATCH_SIZE):
+    """Create ``count`` users sharing one password hash; returns their ids"""
+    User = get_user_model()
+    password = make_password(prefix)
+    for start in range(0, count, batch_size):
+        User.objects.bulk_create([
+            User(username=f'{prefix}_user_{number}', password=password, email=f'{prefix}_user_{number}@example.com')
+            for number in range(start, min(start + batch_size, count))
+        ], batch_size=batch_size)
+
+    user_ids = list(
+        User.objects.filter(username__startswith=f'{prefix}_user_').order_by('id').values_list('id', flat=True)
+    )
+    # Normally created by a post_save signal, which bulk_create skips
+    for start in range(0, len(user_ids), batch_size):
+        UserPoints.objects.bulk_create(
+            [UserPoints(user_id=user_id) for user_id in user_ids[start:start + batch_size]],
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+    return user_ids
+
+
+def seed_polls(count, creator_ids, prefix, rng, batch_size=SEED_BATCH_SIZE):
+    """Create ``count`` active polls owned by the given users; returns their ids"""
+    now = timezone.now()
+    for start in range(0, count, batch_size):
+        Poll.objects.bulk_create([
+            Poll(
+                title=f'{_sentence(rng, 5)} {number}',
+                slug=f'{prefix}-poll-{number}',
+                description=_sentence(rng, 20),
+                creator_id=rng.choice(creator_ids),
+                start_date=now - timedelta(days=RESPONSE_DAYS),
+            )
+            for number in range(start, min(start + batch_size, count))
+        ], batch_size=batch_size)
+
+    return list(Poll.objects.filter(slug__startswith=f'{prefix}-poll-').order_by('id').values_list('id', flat=True))
+
+
+def seed_questions(poll_ids, per_poll, choices, batch_size=SEED_BATCH_SIZE):
+    """
+    Create the questions and choices of the given polls.
+
+    Returns:
+        Dict mapping poll ids to lists of ``(question, choice_ids)`` pairs.
+    """
+    types = [_question_type(slug) for slug in SEED_QUESTION_TYPES]
+    structure = {}
+
+    polls_per_batch = max(1, batch_size // per_poll)
+    for start in range(0, len(poll_ids), polls_per_batch):
+        chunk = poll_ids[start:start + polls_per_batch]
+        questions = []
+        for poll_id in chunk:
+            for order in range(1, per_poll + 1):
+                question_type = types[(poll_id + order) % len(types)]
+                rating = question_type.slug == 'rating_scale'
+                questions.append(Question(
+                    poll_id=poll_id,
+                    text=f'Question {order}',
+                    question_type=question_type,
+                    order=order,
+                    min_value=1 if rating else None,
+                    max_value=5 if rating else None,
+                ))
+        Question.objects.bulk_create(questions, batch_size=batch_size)
+        if any(question.pk is None for question in questions):
+            # Some backends (MySQL) do not return primary keys from bulk inserts
+            ids = Question.objects.filter(poll_id__in=chunk).order_by('id').values_list('id', flat=True)
+            for question, pk in zip(questions, ids):
+                question.pk = pk
+
+        new_choices = []
+        for question in questions:
+            texts = DEFAULT_CHOICES.get(question.question_type.slug)
+            if texts is None and question.question_type.slug in ('single_choice', 'multiple_choice'):
+                texts = [f'Option {number}' for number in range(1, choices + 1)]
+            new_choices.extend(
+                Choice(question=question, text=str(text), order=order)
+                for order, text in enumerate(texts or [], start=1)
+            )
+        Choice.objects.bulk_create(new_choices, batch_size=batch_size)
+
+        choice_ids = {}
+        for question_id, choice_id in Choice.objects.filter(
+            question_id__in=[question.pk for question in questions]
+        ).order_by('order', 'id').values_list('question_id', 'id'):
+            choice_ids.setdefault(question_id, []).append(choice_id)
+
+        for question in questions:
+            structure.setdefault(question.poll_id, []).append((question, choice_ids.get(question.pk, [])))
+
+    return structure
+
+
+def random_answer(question, choice_ids, rng):
+    """Response data and selected choice ids stored for a random answer"""
+    slug = question.question_type.slug
+    if slug == 'multiple_choice':
+        selected = rng.sample(choice_ids, rng.randint(1, len(choice_ids)))
+        return json.dumps([str(choice_id) for choice_id in selected]), selected, None
+    if slug == 'likert_scale':
+        choice_id = rng.choice(choice_ids)
+        return str(float(choice_id)), [choice_id], None
+    if choice_ids:
+        choice_id = rng.choice(choice_ids)
+        return str(choice_id), [choice_id], None
+    if slug == 'rating_scale':
+        value = float(rng.randint(question.min_value, question.max_value))
+        return str(value), [], value
+    return _sentence(rng, rng.randint(3, 15)), [], None
+
+
+def seed_responses(structure, user_ids, respondents, rng, batch_size=SEED_BATCH_SIZE):
+    """
+    Answer every question of the seeded polls by ``respondents`` users each.
+
+    Responses are written in batches of about ``batch_size`` rows, each
+    batch stamped with a time within the last ``RESPONSE_DAYS`` days.
+
+    Returns:
+        The number of responses created.
+    """
+    now = timezone.now()
+    created = 0
+
+    for poll_id, questions in structure.items():
+        if not questions:
+            continue
+        users = rng.sample(user_ids, min(respondents, len(user_ids)))
+        users_per_batch = max(1, batch_size // len(questions))
+
+        for start in range(0, len(users), users_per_batch):
+            batch_users = users[start:start + users_per_batch]
+            responses = []
+            selections = {}
+            for user_id in batch_users:
+                for question, choice_ids in questions:
+                    response_data, selected, numeric_value = random_answer(question, choice_ids, rng)
+                    responses.append(PollResponse(
+                        question_id=question.pk,
+                        user_id=user_id,
+                        response_data=response_data,
+                        numeric_value=numeric_value
+                    ))
+                    selections[(question.pk, user_id)] = selected
+
+            with transaction.atomic():
+                PollResponse.objects.bulk_create(responses, batch_size=batch_size)
+                ids = PollResponse.objects.filter(
+                    question_id__in=[question.pk for question, _ in questions],
+                    user_id__in=batch_users
+                )
+                # bulk_create always stamps auto_now_add fields with the current time
+                ids.update(created_at=now - timedelta(seconds=rng.randint(0, RESPONSE_DAYS * 24 * 3600)))
+                ResponseChoice.objects.bulk_create([
+                    ResponseChoice(response_id=response_id, choice_id=choice_id)
+                    for question_id, user_id, response_id in ids.values_list('question_id', 'user_id', 'id')
+                    for choice_id in selections[(question_id, user_id)]
+                ], batch_size=batch_size)
+            created += len(responses)
+
+    return created
+
+
+def finalize(poll_ids):
+    """Build the tallies, term index, timelines, sketches, counters and search index of seeded polls"""
+    polls = Poll.objects.filter(id__in=poll_ids)
+    rebuild_tallies(Question.objects.filter(poll_id__in=poll_ids))
+    rebuild_terms(Question.objects.filter(poll_id__in=poll_ids))
+    for poll in polls.iterator():
+        rebuild_timeline(poll)
+        rebuild_sketches(poll)
+    reconcile_counters(polls)
+    rebuild_index(polls)
+
+
+def seed_database(users, polls, questions, choices, respondents, batch_size=SEED_BATCH_SIZE, seed=None, prefix=None, log=None):
+    """
+    Fill the database with synthetic users, polls and responses.
+
+    Every table is written with bulk inserts, so millions of responses
+    take minutes rather than hours. Derived data (tallies, timelines,
+    counters, search index) is rebuilt once at the end.
+
+    Returns:
+        Dict with the prefix used and the number of rows of each kind.
+    """
+    rng = random.Random(seed)
+    prefix = prefix or f'seed{uuid.uuid4().hex[:6]}'
+    log = log or (lambda message: None)
+
+    user_ids = seed_users(users, prefix, batch_size)
+    log(f'{len(user_ids)} users')
+    poll_ids = seed_polls(polls, user_ids, prefix, rng, batch_size)
+    log(f'{len(poll_ids)} polls')
+    structure = seed_questions(poll_ids, questions, choices, batch_size)
+    log(f'{sum(len(entries) for entries in structure.values())} questions')
+    responses = seed_responses(structure, user_ids, respondents, rng, batch_size)
+    log(f'{responses} responses')
+    finalize(poll_ids)
+    log('tallies, terms, timelines, sketches, counters and search index built')
+
+    return {
+        'prefix': prefix,
+        'users': len(user_ids),
+        'polls': len(poll_ids),
+        'questions': sum(len(entries) for entries in structure.values()),
+        'responses': responses,
+    }
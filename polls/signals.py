@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_poll_version
+from .counters import reconcile_counters
+from .models import Poll, PollCategory, PollResponse, Question, QuestionType
+from .registry import question_types
+from .search import index_poll, index_polls
+from .tallies import record_responses
+from .terms import record_answers
+
+# Poll fields copied into the search index
+INDEXED_FIELDS = {'title', 'description', 'category'}
+
+
+@receiver(post_save, sender=Poll)
+def reindex_saved_poll(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the search index of a poll in step with its text"""
+    if raw or (update_fields is not None and not INDEXED_FIELDS & set(update_fields)):
+        return
+    # Wait for the commit so tags saved later in the same request are included
+    transaction.on_commit(lambda: index_poll(instance.pk))
+
+
+@receiver(m2m_changed, sender=Poll.tags.through)
+def reindex_tagged_poll(sender, instance, action, **kwargs):
+    """Reindex a poll when its tags change"""
+    if isinstance(instance, Poll) and action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(lambda: index_poll(instance.pk))
+
+
+@receiver(post_save, sender=PollCategory)
+def reindex_category_polls(sender, instance, raw=False, created=False, **kwargs):
+    """Reindex the polls of a renamed category"""
+    if raw or created:
+        return
+    transaction.on_commit(lambda: index_polls(Poll.objects.filter(category=instance)))
+
+
+@receiver(post_save, sender=QuestionType)
+@receiver(post_delete, sender=QuestionType)
+def invalidate_question_types(sender, **kwargs):
+    """Reload the question type registry after a type changes"""
+    question_types.invalidate()
+
+
+def _origin_model(origin):
+    """Model whose delete() started a cascade (origin is an instance or a queryset)"""
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def recount_poll_on_commit(poll_id):
+    def recount():
+        reconcile_counters(Poll.objects.filter(pk=poll_id))
+        bump_poll_version(poll_id)
+    transaction.on_commit(recount)
+
+
+@receiver(post_delete, sender=Question)
+def recount_after_question_delete(sender, instance, origin=None, **kwargs):
+    """Drop the responses of a deleted question from its poll's counters"""
+    if _origin_model(origin) is Poll:
+        return
+    recount_poll_on_commit(instance.poll_id)
+
+
+@receiver(post_delete, sender=PollResponse)
+def recount_after_response_delete(sender, instance, origin=None, **kwargs):
+    """
+    Drop a deleted response from its poll's counters, its question's
+    tallies and the term index. Responses also go when their user is
+    deleted.
+    """
+    # Responses deleted along with their question or poll are recounted there,
+    # and the tallies and terms of the question are deleted with it
+    if _origin_model(origin) in (Poll, Question):
+        return
+    question = Question.objects.filter(pk=instance.question_id).only('id', 'poll_id', 'question_type_id').first()
+    if question is None:
+        return
+    changes = [(question.id, question.question_type_slug, instance.response_data, None)]
+    record_responses(changes)
+    record_answers(changes)
+    recount_poll_on_commit(question.poll_id)
@@ -0,0 +1,231 @@
+import logging
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+
+from .answers import parse_answer, save_selections
+from .cache import bump_poll_version
+from .live import publish_tally_deltas
+from .models import Choice, PendingSubmission, Poll, PollResponse, Question
+from .tallies import record_responses
+from .terms import record_answers
+from .timeline import record_submissions
+
+# Queued submissions written per flush transaction
+FLUSH_BATCH_SIZE = 500
+
+# Failed flushes after which a queued submission is left aside
+MAX_FLUSH_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+def save_submissions(poll, submissions):
+    """
+    Save the answers of one or more users to a poll with bulk queries.
+
+    The cost of a call depends on the number of distinct answers, not on
+    the number of users or questions, so queued submissions are cheaper
+    to write together than one by one. Answers replace earlier answers of
+    the same user (upsert semantics).
+
+    Args:
+        poll: Poll the answers belong to.
+        submissions: List of ``(user_id, answers)`` pairs, ``answers``
+            mapping question ids to formatted response data.
+
+    Returns:
+        Dict mapping user ids to their saved responses.
+    """
+    with transaction.atomic():
+        question_ids = {int(question_id) for _, answers in submissions for question_id in answers}
+        user_ids = {user_id for user_id, _ in submissions}
+
+        # Load questions, previous answers and valid choices in one query each
+        questions = Question.objects.filter(poll=poll).in_bulk(question_ids)
+        existing = {
+            (response.user_id, response.question_id): response
+            for response in PollResponse.objects.filter(user_id__in=user_ids, question_id__in=questions.keys())
+        }
+        returning_users = {user_id for user_id, _ in existing}
+        valid_choices = set(
+            Choice.objects.filter(question_id__in=questions.keys()).values_list('question_id', 'id')
+        )
+
+        saved_responses = defaultdict(list)
+        new_responses = []
+        updated_responses = []
+        previous_data = {}
+        selected_choices = {}
+
+        for user_id, answers in submissions:
+            for question_id, response_data in answers.items():
+                question = questions.get(int(question_id))
+                if question is None:
+                    continue  # Skip if question was deleted
+
+                choice_ids, numeric_value = parse_answer(question.question_type_slug, response_data)
+                key = (user_id, question.id)
+                selected_choices[key] = [
+                    choice_id for choice_id in choice_ids
+                    if (question.id, choice_id) in valid_choices
+                ]
+
+                response = existing.get(key)
+                if response is None:
+                    response = PollResponse(question=question, user_id=user_id)
+                    new_responses.append(response)
+                else:
+                    previous_data[key] = response.response_data
+                    response.question = question
+                    updated_responses.append(response)
+
+                response.response_data = response_data
+                response.numeric_value = numeric_value
+                saved_responses[user_id].append(response)
+
+        try:
+            with transaction.atomic():
+                PollResponse.objects.bulk_create(new_responses)
+        except IntegrityError:
+            # A concurrent submission saved some of these answers first,
+            # so update the rows it created instead (upsert semantics).
+            # A locking read sees the latest committed rows; a plain read
+            # would use the snapshot of this transaction (REPEATABLE READ
+            # on MySQL) and miss them.
+            conflicting = {
+                (response.user_id, response.question_id): response
+                for response in PollResponse.objects.select_for_update().filter(
+                    user_id__in={response.user_id for response in new_responses},
+                    question_id__in={response.question_id for response in new_responses}
+                )
+            }
+            remaining = []
+            for response in new_responses:
+                current = conflicting.get((response.user_id, response.question_id))
+                if current is None:
+                    remaining.append(response)
+                    continue
+                # The concurrent submission already counted this participant
+                returning_users.add(response.user_id)
+                previous_data[(response.user_id, response.question_id)] = current.response_data
+                response.pk = current.pk
+                response._state.adding = False
+                response.created_at = current.created_at
+                updated_responses.append(response)
+            new_responses = remaining
+            PollResponse.objects.bulk_create(new_responses)
+
+        if updated_responses:
+            PollResponse.objects.bulk_update(updated_responses, ['response_data', 'numeric_value'])
+
+        # Some backends (MySQL) do not return primary keys from bulk inserts
+        if any(response.pk is None for response in new_responses):
+            ids = {
+                (user_id, question_id): pk
+                for user_id, question_id, pk in PollResponse.objects.filter(
+                    user_id__in={response.user_id for response in new_responses},
+                    question_id__in={response.question_id for response in new_responses}
+                ).values_list('user_id', 'question_id', 'id')
+            }
+            for response in new_responses:
+                response.pk = ids[(response.user_id, response.question_id)]
+
+        all_responses = [response for responses in saved_responses.values() for response in responses]
+        save_selections({
+            response.pk: selected_choices[(response.user_id, response.question_id)]
+            for response in all_responses
+        })
+        changes = [
+            (
+                response.question_id,
+                response.question.question_type_slug,
+                previous_data.get((response.user_id, response.question_id)),
+                response.response_data
+            )
+            for response in all_responses
+        ]
+        deltas = record_responses(changes)
+        record_answers(changes)
+
+        new_participants = set(saved_responses) - returning_users
+        poll.count_submissions(len(new_responses), len(new_participants))
+        # Edits of existing answers are not new submissions
+        submitters = {response.user_id for response in new_responses}
+        if submitters:
+            record_submissions(poll.id, submissions=len(submitters), participants=len(new_participants))
+
+        # Drop results cached against the previous set of responses
+        # and push the new counts to anyone watching the results live
+        poll_id = poll.id
+        transaction.on_commit(lambda: bump_poll_version(poll_id))
+        transaction.on_commit(lambda: publish_tally_deltas(poll_id, deltas))
+
+    return dict(saved_responses)
+
+
+def has_pending_submission(poll, user):
+    """Whether answers of the user to a poll are still waiting in the queue"""
+    return PendingSubmission.objects.filter(poll=poll, user=user).exists()
+
+
+def flush_pending_submissions(batch_size=FLUSH_BATCH_SIZE):
+    """
+    Write a batch of queued submissions to PollResponse.
+
+    Rows are claimed with SKIP LOCKED where the database supports it, so
+    several workers can flush the queue at the same time. Each poll's
+    submissions are saved under their own savepoint; when a group fails,
+    its submissions are retried one by one and the failing ones are kept
+    with their error. After ``MAX_FLUSH_ATTEMPTS`` failures a submission
+    is no longer claimed, so it cannot hold up the queue.
+
+    Returns:
+        The number of submissions written.
+    """
+    with transaction.atomic():
+        pending = list(
+            PendingSubmission.objects.select_for_update(skip_locked=True).filter(
+                attempts__lt=MAX_FLUSH_ATTEMPTS
+            ).order_by('id')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        by_poll = defaultdict(list)
+        for submission in pending:
+            by_poll[submission.poll_id].append(submission)
+
+        polls = Poll.objects.in_bulk(by_poll.keys())
+        saved = []
+        failed = []
+        for poll_id, poll_submissions in by_poll.items():
+            if len(poll_submissions) > 1:
+                try:
+                    with transaction.atomic():
+                        save_submissions(
+                            polls[poll_id],
+                            [(submission.user_id, submission.answers) for submission in poll_submissions]
+                        )
+                    saved.extend(poll_submissions)
+                    continue
+                except Exception:
+                    logger.warning('Flushing %s queued submissions to poll %s failed; retrying one by one',
+                                   len(poll_submissions), poll_id)
+
+            for submission in poll_submissions:
+                try:
+                    with transaction.atomic():
+                        save_submissions(polls[poll_id], [(submission.user_id, submission.answers)])
+                    saved.append(submission)
+                except Exception as e:
+                    logger.exception('Queued submission %s failed to flush', submission.pk)
+                    submission.attempts += 1
+                    submission.error = str(e)
+                    failed.append(submission)
+
+        PendingSubmission.objects.filter(pk__in=[submission.pk for submission in saved]).delete()
+        if failed:
+            PendingSubmission.objects.bulk_update(failed, ['attempts', 'error'])
+
+    return len(saved)
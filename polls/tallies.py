@@ -0,0 +1,198 @@
+import operator
+from collections import Counter, defaultdict
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .answers import CHOICE_TYPES, NUMERIC_TYPES, parse_answer
+from .models import PollResponse, Question, QuestionTally, ResponseChoice
+
+# Key of the per-question row counting every response, whatever its answer
+TOTAL_KEY = '_total'
+
+
+def numeric_key(value):
+    """Tally key of a numeric answer (rating values are whole numbers)"""
+    return str(int(value))
+
+
+def answer_keys(question_type, response_data):
+    """Return the tally keys an answer contributes to (choice ids or rated values)"""
+    choice_ids, numeric_value = parse_answer(question_type, response_data)
+    keys = [str(choice_id) for choice_id in choice_ids]
+    if numeric_value is not None:
+        keys.append(numeric_key(numeric_value))
+    return keys
+
+
+def tally_keys(question_type, response_data):
+    """Return every tally key a stored response counts towards"""
+    return [TOTAL_KEY] + answer_keys(question_type, response_data)
+
+
+def record_responses(changes):
+    """
+    Apply saved responses to the tally table.
+
+    Args:
+        changes: Iterable of (question_id, question_type, old_data, new_data)
+            tuples. ``old_data`` is None for a new response and ``new_data``
+            is None for a deleted one.
+
+    Returns:
+        Dict of the non-zero ``{(question_id, key): delta}`` changes applied.
+    """
+    deltas = Counter()
+    for question_id, question_type, old_data, new_data in changes:
+        if old_data is not None:
+            for key in tally_keys(question_type, old_data):
+                deltas[(question_id, key)] -= 1
+        if new_data is not None:
+            for key in tally_keys(question_type, new_data):
+                deltas[(question_id, key)] += 1
+
+    return apply_deltas(deltas)
+
+
+def apply_deltas(deltas):
+    """Add ``{(question_id, key): delta}`` to the stored counts in a few queries"""
+    deltas = {pair: delta for pair, delta in deltas.items() if delta}
+    if not deltas:
+        return deltas
+
+    # Make sure every row exists so the increment below is a plain UPDATE
+    QuestionTally.objects.bulk_create(
+        [QuestionTally(question_id=question_id, key=key) for question_id, key in sorted(deltas)],
+        ignore_conflicts=True
+    )
+
+    # A single UPDATE taking the row locks in (question, key) order, so
+    # concurrent submissions touching the same tallies cannot deadlock
+    keys_by_delta = defaultdict(list)
+    for (question_id, key), delta in sorted(deltas.items()):
+        keys_by_delta[(question_id, delta)].append(key)
+    conditions = [
+        (Q(question_id=question_id, key__in=keys), delta)
+        for (question_id, delta), keys in keys_by_delta.items()
+    ]
+
+    QuestionTally.objects.filter(
+        reduce(operator.or_, (condition for condition, _ in conditions))
+    ).order_by('question_id', 'key').update(
+        # Never drive a count below zero if the table drifted out of sync
+        count=Greatest(
+            F('count') + Case(
+                *[When(condition, then=Value(delta)) for condition, delta in conditions],
+                output_field=IntegerField()
+            ),
+            0
+        )
+    )
+
+    return deltas
+
+
+def rebuild_tallies(questions):
+    """Recompute the tallies of the given questions with grouped counts"""
+    question_ids = list(questions.values_list('id', flat=True))
+    if not question_ids:
+        return 0
+
+    counts = Counter()
+    responses = PollResponse.objects.filter(question_id__in=question_ids)
+
+    totals = responses.values_list('question_id').annotate(count=Count('id')).order_by()
+    for question_id, count in totals:
+        counts[(question_id, TOTAL_KEY)] += count
+
+    choice_counts = ResponseChoice.objects.filter(
+        response__question_id__in=question_ids
+    ).values_list('response__question_id', 'choice_id').annotate(count=Count('id')).order_by()
+    for question_id, choice_id, count in choice_counts:
+        counts[(question_id, str(choice_id))] += count
+
+    numeric_counts = responses.filter(
+        numeric_value__isnull=False
+    ).values_list('question_id', 'numeric_value').annotate(count=Count('id')).order_by()
+    for question_id, numeric_value, count in numeric_counts:
+        counts[(question_id, numeric_key(numeric_value))] += count
+
+    with transaction.atomic():
+        QuestionTally.objects.filter(question_id__in=question_ids).delete()
+        QuestionTally.objects.bulk_create(
+            [
+                QuestionTally(question_id=question_id, key=key, count=count)
+                for (question_id, key), count in counts.items()
+            ],
+            batch_size=1000
+        )
+
+    return len(counts)
+
+
+def rebuild_poll_tallies(poll):
+    """Recompute the tallies of every question of a poll"""
+    return rebuild_tallies(poll.questions.all())
+
+
+def get_poll_tallies(poll):
+    """Return ``{question_id: {key: count}}`` for all questions of a poll in one query"""
+    tallies = defaultdict(dict)
+    rows = QuestionTally.objects.filter(question__poll=poll).values_list('question_id', 'key', 'count')
+    for question_id, key, count in rows:
+        tallies[question_id][key] = count
+    return tallies
+
+
+def get_question_tally(question):
+    """Return ``{key: count}`` for a single question"""
+    return dict(question.tallies.values_list('key', 'count'))
+
+
+def tally_poll(poll):
+    """
+    Return ``{question_id: response_data}`` for every question of a poll.
+
+    Runs a fixed number of queries (questions, choices, tallies, top
+    answer terms and text answers) whatever the number of questions and
+    responses.
+    """
+    questions = Question.objects.filter(poll=poll).with_tallies().with_text_responses()
+    return {question.id: question.response_data for question in questions}
+
+
+def labelled_counts(question, tally):
+    """Map a question tally onto its choice texts or rating values"""
+    question_type = question.question_type_slug
+
+    if question_type in CHOICE_TYPES:
+        return {choice.text: tally.get(str(choice.id), 0) for choice in question.choices.all()}
+
+    if question_type in NUMERIC_TYPES:
+        min_value = question.min_value if question.min_value is not None else 1
+        max_value = question.max_value if question.max_value is not None else 5
+        return {value: tally.get(str(value), 0) for value in range(min_value, max_value + 1)}
+
+    return {}
+
+
+def tally_total(tally):
+    """Number of responses recorded in a question tally"""
+    return tally.get(TOTAL_KEY, 0)
+
+
+def tally_average(tally):
+    """Weighted average of the numeric keys of a tally, or None if empty"""
+    total = 0
+    weight = 0
+    for key, count in tally.items():
+        if key == TOTAL_KEY:
+            continue
+        try:
+            total += float(key) * count
+        except ValueError:
+            continue
+        weight += count
+    return total / weight if weight else None
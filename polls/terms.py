@@ -0,0 +1,134 @@
+import operator
+from collections import Counter, defaultdict
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Prefetch, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .answers import TEXT_TYPES
+from .models import PollResponse, QuestionTerm
+from .text import term_counts
+
+# Terms shown per question in results and analytics
+TOP_TERMS = 50
+
+
+def record_answers(changes):
+    """
+    Apply saved text answers to the term index.
+
+    Args:
+        changes: Iterable of (question_id, question_type, old_data, new_data)
+            tuples, as for ``polls.tallies.record_responses``. Answers to
+            questions that are not free text are ignored.
+
+    Returns:
+        Dict of the non-zero ``{(question_id, term): delta}`` changes applied.
+    """
+    deltas = Counter()
+    for question_id, question_type, old_data, new_data in changes:
+        if question_type not in TEXT_TYPES:
+            continue
+        if old_data is not None:
+            for term, count in term_counts(old_data).items():
+                deltas[(question_id, term)] -= count
+        if new_data is not None:
+            for term, count in term_counts(new_data).items():
+                deltas[(question_id, term)] += count
+
+    return apply_deltas(deltas)
+
+
+def apply_deltas(deltas):
+    """Add ``{(question_id, term): delta}`` to the stored counts in a few queries"""
+    deltas = {pair: delta for pair, delta in deltas.items() if delta}
+    if not deltas:
+        return deltas
+
+    # Make sure every row exists so the increment below is a plain UPDATE
+    QuestionTerm.objects.bulk_create(
+        [
+            QuestionTerm(question_id=question_id, term=term, words=term.count(' ') + 1)
+            for question_id, term in sorted(deltas)
+        ],
+        ignore_conflicts=True,
+        batch_size=1000
+    )
+
+    # A single UPDATE taking the row locks in (question, term) order, so
+    # concurrent answers sharing terms cannot deadlock
+    terms_by_delta = defaultdict(list)
+    for (question_id, term), delta in sorted(deltas.items()):
+        terms_by_delta[(question_id, delta)].append(term)
+    conditions = [
+        (Q(question_id=question_id, term__in=terms), delta)
+        for (question_id, delta), terms in terms_by_delta.items()
+    ]
+
+    QuestionTerm.objects.filter(
+        reduce(operator.or_, (condition for condition, _ in conditions))
+    ).order_by('question_id', 'term').update(
+        # Never drive a count below zero if the index drifted out of sync
+        count=Greatest(
+            F('count') + Case(
+                *[When(condition, then=Value(delta)) for condition, delta in conditions],
+                output_field=IntegerField()
+            ),
+            0
+        )
+    )
+
+    return deltas
+
+
+def rebuild_terms(questions):
+    """Recompute the term index of the given questions from their text answers"""
+    question_ids = list(
+        questions.filter(question_type__slug__in=TEXT_TYPES).values_list('id', flat=True)
+    )
+    rows = 0
+    for question_id in question_ids:
+        counts = Counter()
+        answers = PollResponse.objects.filter(question_id=question_id).values_list('response_data', flat=True)
+        for text in answers.iterator(chunk_size=2000):
+            counts.update(term_counts(text))
+
+        with transaction.atomic():
+            QuestionTerm.objects.filter(question_id=question_id).delete()
+            QuestionTerm.objects.bulk_create(
+                [
+                    QuestionTerm(question_id=question_id, term=term, words=term.count(' ') + 1, count=count)
+                    for term, count in counts.items()
+                ],
+                batch_size=1000
+            )
+        rows += len(counts)
+
+    return rows
+
+
+def top_terms_queryset(words=None, exclude=()):
+    """Most frequent terms first; ``words`` keeps only single words (1) or phrases of that length"""
+    terms = QuestionTerm.objects.filter(count__gt=0)
+    if words is not None:
+        terms = terms.filter(words=words)
+    if exclude:
+        terms = terms.exclude(term__in=exclude)
+    return terms.order_by('-count', 'term')
+
+
+def top_terms_prefetch(limit=TOP_TERMS):
+    """Prefetch the top terms of every question in one query, as ``question.top_term_rows``"""
+    return Prefetch('terms', queryset=top_terms_queryset()[:limit], to_attr='top_term_rows')
+
+
+def top_terms(question, limit=TOP_TERMS, words=None, exclude=()):
+    """
+    Return the ``{term: count}`` of the most frequent words and phrases
+    in the answers to a question, most frequent first.
+    """
+    rows = getattr(question, 'top_term_rows', None)
+    if rows is None or words is not None or exclude:
+        rows = top_terms_queryset(words=words, exclude=exclude).filter(question=question)[:limit]
+    return {row.term: row.count for row in rows[:limit]}
@@ -1,3 +1,1050 @@
-from django.test import TestCase
+import csv
+import importlib
+import importlib.util
+import json
+import os
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+
+from .answers import parse_answer
+from .benchmarks import compare_reports
+from .archive import freeze_poll, get_archive, get_archived_results
+from .builder import questions_from_data, save_questions
+from .forms import QuestionTypeChoiceField
+from .cache import bump_poll_version, get_poll_version, get_results_snapshot
+from .correlations import MIN_RESPONSES, association, compute_correlations
+from .counters import reconcile_counters
+from .exports import CSV_HEADER, stream_csv, stream_json, stream_ndjson
+from .live import publish_tally_deltas, results_group
+from .models import (
+    Choice, ParticipantSketch, PendingSubmission, Poll, PollResponse, PollResultsArchive, Question, QuestionType,
+    ResponseChoice
+)
+from .pagination import CursorPaginator, encode_cursor
+from .registry import question_types
+from .routing import websocket_urlpatterns
+from . import search
+from .search import search_polls
+from .seeding import seed_database
+from .sketches import HyperLogLog, approximate_participants, rebuild_sketches
+from .submissions import MAX_FLUSH_ATTEMPTS, flush_pending_submissions, has_pending_submission, save_submissions
+from .tallies import TOTAL_KEY, apply_deltas, get_poll_tallies, rebuild_poll_tallies, tally_poll
+from .terms import rebuild_terms, top_terms
+from .timeline import get_timeline, rebuild_timeline
+from .views import PollAnalyticsView
+
+
+class PollTestCase(TestCase):
+    """A poll with a single choice, a rating scale and an open-ended question"""
+
+    @classmethod
+    def setUpTestData(cls):
+        types = {
+            slug: QuestionType.objects.get_or_create(slug=slug, defaults={'name': slug})[0]
+            for slug in ('single_choice', 'rating_scale', 'open_ended')
+        }
+        cls.creator = User.objects.create_user('creator', user_type='researcher')
+        cls.voters = [User.objects.create_user(f'voter{i}') for i in range(3)]
+        cls.poll = Poll.objects.create(title='Campus', description='d', creator=cls.creator, start_date=timezone.now())
+        cls.choice_question = Question.objects.create(
+            poll=cls.poll, text='Favourite', question_type=types['single_choice'], order=1
+        )
+        cls.yes, cls.no = [
+            Choice.objects.create(question=cls.choice_question, text=text, order=order)
+            for order, text in enumerate(['Yes', 'No'])
+        ]
+        cls.rating_question = Question.objects.create(
+            poll=cls.poll, text='Rate', question_type=types['rating_scale'], order=2, min_value=1, max_value=5
+        )
+        cls.text_question = Question.objects.create(
+            poll=cls.poll, text='Why', question_type=types['open_ended'], order=3
+        )
+
+    def answer(self, user, choice, rating=3, text='campus food'):
+        return save_submissions(self.poll, [(user.id, {
+            self.choice_question.id: str(choice.id),
+            self.rating_question.id: str(rating),
+            self.text_question.id: text,
+        })])
+
+
+class TallyTests(PollTestCase):
+
+    def test_submission_adds_to_tallies(self):
+        self.answer(self.voters[0], self.yes, rating=4)
+        self.answer(self.voters[1], self.no, rating=4)
+
+        tallies = get_poll_tallies(self.poll)
+        self.assertEqual(tallies[self.choice_question.id], {TOTAL_KEY: 2, str(self.yes.id): 1, str(self.no.id): 1})
+        self.assertEqual(tallies[self.rating_question.id], {TOTAL_KEY: 2, '4': 2})
+        self.assertEqual(tallies[self.text_question.id], {TOTAL_KEY: 2})
+
+    def test_edit_moves_count_between_choices(self):
+        self.answer(self.voters[0], self.yes, rating=2)
+        self.answer(self.voters[1], self.yes)
+        self.answer(self.voters[0], self.no, rating=4)
+
+        tallies = get_poll_tallies(self.poll)
+        self.assertEqual(tallies[self.choice_question.id], {TOTAL_KEY: 2, str(self.yes.id): 1, str(self.no.id): 1})
+        self.assertEqual(tallies[self.rating_question.id], {TOTAL_KEY: 2, '2': 0, '3': 1, '4': 1})
+
+    def test_matches_rebuilt_tallies(self):
+        for index, voter in enumerate(self.voters):
+            self.answer(voter, self.yes if index % 2 else self.no, rating=index + 1)
+        self.answer(self.voters[0], self.yes, rating=5)
+
+        live = {question_id: dict(tally) for question_id, tally in get_poll_tallies(self.poll).items()}
+        rebuild_poll_tallies(self.poll)
+        rebuilt = {question_id: dict(tally) for question_id, tally in get_poll_tallies(self.poll).items()}
+        # Rebuilt tallies have no rows for counts that dropped to zero
+        live = {
+            question_id: {key: count for key, count in tally.items() if count}
+            for question_id, tally in live.items()
+        }
+        self.assertEqual(live, rebuilt)
+
+    def test_decrements_stop_at_zero(self):
+        self.answer(self.voters[0], self.yes)
+
+        apply_deltas({(self.choice_question.id, str(self.yes.id)): -5})
+
+        self.assertEqual(get_poll_tallies(self.poll)[self.choice_question.id][str(self.yes.id)], 0)
+
+
+class AnswerTests(PollTestCase):
+
+    def test_parse_answer(self):
+        self.assertEqual(parse_answer('multiple_choice', '["1", "11", "1"]'), ([1, 11], None))
+        self.assertEqual(parse_answer('single_choice', '4.0'), ([4], None))
+        self.assertEqual(parse_answer('rating_scale', '3'), ([], 3.0))
+        self.assertEqual(parse_answer('multiple_choice', 'not json'), ([], None))
+        self.assertEqual(parse_answer('open_ended', '12'), ([], None))
+
+    def test_saved_answers_fill_the_indexed_columns(self):
+        self.answer(self.voters[0], self.yes, rating=4)
+
+        choice_response = PollResponse.objects.get(user=self.voters[0], question=self.choice_question)
+        rating_response = PollResponse.objects.get(user=self.voters[0], question=self.rating_question)
+        self.assertEqual(list(choice_response.response_choices.values_list('choice_id', flat=True)), [self.yes.id])
+        self.assertEqual(rating_response.numeric_value, 4)
+
+    def test_edit_replaces_selected_choices(self):
+        self.answer(self.voters[0], self.yes)
+        self.answer(self.voters[0], self.no)
+
+        self.assertEqual(
+            list(ResponseChoice.objects.filter(response__user=self.voters[0]).values_list('choice_id', flat=True)),
+            [self.no.id]
+        )
+
+
+class CorrelationTests(PollTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.second_question = Question.objects.create(
+            poll=cls.poll, text='Again', question_type=cls.choice_question.question_type, order=4
+        )
+        cls.again_yes, cls.again_no = [
+            Choice.objects.create(question=cls.second_question, text=text, order=order)
+            for order, text in enumerate(['Again yes', 'Again no'])
+        ]
+
+    def answer_both(self, count):
+        # Everyone answers the second question like the first one
+        voters = [User.objects.create_user(f'pair{i}') for i in range(count)]
+        save_submissions(self.poll, [
+            (voter.id, {
+                self.choice_question.id: str((self.yes if index % 2 else self.no).id),
+                self.second_question.id: str((self.again_yes if index % 2 else self.again_no).id),
+            })
+            for index, voter in enumerate(voters)
+        ])
+
+    def questions(self):
+        return list(self.poll.questions.prefetch_related('choices'))
+
+    def test_association(self):
+        stats = association([[10, 0], [0, 10]])
+        self.assertAlmostEqual(stats['chi_square'], 20.0)
+        self.assertEqual(stats['dof'], 1)
+        self.assertAlmostEqual(stats['cramers_v'], 1.0)
+        self.assertIsNone(association([[3, 4]]))
+
+    def test_choices_picked_together(self):
+        self.answer_both(12)
+
+        correlations = compute_correlations(self.questions())
+        first = {
+            (correlation['this_choice'], correlation['other_choice']): correlation['count']
+            for correlation in correlations[self.choice_question.id]
+        }
+        self.assertEqual(first, {('Yes', 'Again yes'): 6, ('No', 'Again no'): 6})
+        self.assertEqual(len(correlations[self.second_question.id]), 2)
+
+    def test_needs_enough_respondents(self):
+        self.answer_both(MIN_RESPONSES - 1)
+
+        self.assertEqual(compute_correlations(self.questions()), {})
+
+
+class SaveSubmissionsTests(PollTestCase):
+
+    def test_new_user_counts_responses_and_participant(self):
+        saved = self.answer(self.voters[0], self.yes)
+
+        self.assertEqual(len(saved[self.voters[0].id]), 3)
+        self.poll.refresh_from_db()
+        self.assertEqual((self.poll.response_count, self.poll.participant_count), (3, 1))
+
+    def test_returning_user_replaces_answers(self):
+        self.answer(self.voters[0], self.yes)
+        self.answer(self.voters[0], self.no, rating=5)
+
+        self.assertEqual(PollResponse.objects.filter(user=self.voters[0]).count(), 3)
+        response = PollResponse.objects.get(user=self.voters[0], question=self.choice_question)
+        self.assertEqual(response.response_data, str(self.no.id))
+        self.poll.refresh_from_db()
+        self.assertEqual((self.poll.response_count, self.poll.participant_count), (3, 1))
+
+    def test_several_users_in_one_call(self):
+        save_submissions(self.poll, [
+            (voter.id, {self.choice_question.id: str(self.yes.id)}) for voter in self.voters
+        ])
+
+        self.poll.refresh_from_db()
+        self.assertEqual((self.poll.response_count, self.poll.participant_count), (3, 3))
+
+    def test_concurrent_insert_becomes_an_update(self):
+        voter = self.voters[0]
+
+        def racing_parse_answer(question_type, response_data):
+            # Another request saves the same answer after the existing answers were read
+            if not PollResponse.objects.filter(user=voter).exists():
+                PollResponse.objects.create(question=self.choice_question, user=voter, response_data=str(self.no.id))
+            return parse_answer(question_type, response_data)
+
+        with mock.patch('polls.submissions.parse_answer', racing_parse_answer):
+            self.answer(voter, self.yes)
+
+        response = PollResponse.objects.get(user=voter, question=self.choice_question)
+        self.assertEqual(response.response_data, str(self.yes.id))
+        self.assertEqual(PollResponse.objects.filter(user=voter).count(), 3)
+
+
+class ExportTests(PollTestCase):
+
+    def setUp(self):
+        self.answer(self.voters[0], self.yes, text='first')
+        self.answer(self.voters[1], self.no, text='second')
+
+    def test_csv_has_a_row_per_response(self):
+        rows = list(csv.reader(''.join(stream_csv(self.poll)).splitlines()))
+
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(
+            sorted(row[4] for row in rows[1:] if row[0] == str(self.text_question.id)),
+            ['first', 'second']
+        )
+
+    def test_ndjson_and_json_agree(self):
+        lines = [json.loads(line) for line in stream_ndjson(self.poll)]
+        nested = json.loads(''.join(stream_json(self.poll)))
+
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(
+            sorted((line['question_id'], line['user_id'], line['response_data']) for line in lines),
+            sorted(
+                (question['question_id'], response['user_id'], response['response_data'])
+                for question in nested['questions'] for response in question['responses']
+            )
+        )
+        self.assertEqual([question['response_count'] for question in nested['questions']], [2, 2, 2])
+
+    def test_anonymous_polls_hide_users(self):
+        Poll.objects.filter(pk=self.poll.pk).update(poll_type='anonymous')
+        self.poll.refresh_from_db()
+
+        self.assertEqual({json.loads(line)['user_id'] for line in stream_ndjson(self.poll)}, {None})
+
+    def test_view_streams_to_the_creator_only(self):
+        url = reverse('polls:export_data', kwargs={'slug': self.poll.slug})
+
+        self.client.force_login(self.creator)
+        response = self.client.get(url, {'format': 'ndjson'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 6)
+
+        self.client.force_login(self.voters[0])
+        self.assertEqual(self.client.get(url, {'format': 'csv'}).status_code, 403)
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'polls-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, POLL_RESULTS_MAX_STALENESS=0)
+class ResultsCacheTests(PollTestCase):
+
+    def setUp(self):
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return {'build': self.builds}
+
+    def test_snapshot_is_reused_until_the_version_changes(self):
+        self.assertEqual(get_results_snapshot(self.poll, self.build), {'build': 1})
+        self.assertEqual(get_results_snapshot(self.poll, self.build), {'build': 1})
+
+        bump_poll_version(self.poll.id)
+        self.assertEqual(get_results_snapshot(self.poll, self.build), {'build': 2})
+
+    def test_submissions_bump_the_version(self):
+        version = get_poll_version(self.poll.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.answer(self.voters[0], self.yes)
+
+        self.assertNotEqual(get_poll_version(self.poll.id), version)
+
+    def test_recent_snapshot_served_within_staleness(self):
+        get_results_snapshot(self.poll, self.build)
+        bump_poll_version(self.poll.id)
+
+        with self.settings(POLL_RESULTS_MAX_STALENESS=60):
+            self.assertEqual(get_results_snapshot(self.poll, self.build), {'build': 1})
+
+    def test_edited_poll_is_rebuilt(self):
+        get_results_snapshot(self.poll, self.build)
+        self.poll.title = 'Renamed'
+        self.poll.save()
+
+        self.assertEqual(get_results_snapshot(self.poll, self.build), {'build': 2})
+
+
+class CacheSettingsTests(TestCase):
+
+    def load_settings(self, **environ):
+        path = os.path.join(settings.BASE_DIR, 'pulseconnect', 'settings.py')
+        spec = importlib.util.spec_from_file_location('pulseconnect_settings_under_test', path)
+        module = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(os.environ, environ):
+            spec.loader.exec_module(module)
+        return module
+
+    def test_redis_only_when_configured(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('REDIS_CACHE_URL', None)
+            local = self.load_settings()
+        redis = self.load_settings(REDIS_CACHE_URL='redis://cache:6379/2')
+
+        self.assertEqual(local.CACHES['default']['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+        self.assertEqual(redis.CACHES['default'], {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://cache:6379/2',
+        })
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    POLL_LIVE_RESULTS_INTERVAL_MS=10
+)
+class LiveResultsTests(PollTestCase):
+
+    def communicator(self, slug):
+        return WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/polls/poll/{slug}/results/')
+
+    async def test_deltas_are_merged_and_pushed(self):
+        communicator = self.communicator(self.poll.slug)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        question = self.choice_question.id
+        await sync_to_async(publish_tally_deltas)(self.poll.id, {(question, '_total'): 1, (question, '5'): 1})
+        await sync_to_async(publish_tally_deltas)(self.poll.id, {(question, '_total'): 1, (question, '5'): -1})
+
+        message = await communicator.receive_json_from(timeout=1)
+        self.assertEqual(message, {'type': 'tally_delta', 'deltas': {str(question): {'_total': 2}}})
+        await communicator.disconnect()
+
+    async def test_unknown_poll_is_refused(self):
+        connected, _ = await self.communicator('no-such-poll').connect()
+        self.assertFalse(connected)
+
+    def test_submission_publishes_its_deltas(self):
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(results_group(self.poll.id), channel)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.answer(self.voters[0], self.yes, rating=4)
+
+        message = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(message['deltas'][str(self.choice_question.id)], {'_total': 1, str(self.yes.id): 1})
+        self.assertEqual(message['deltas'][str(self.rating_question.id)], {'_total': 1, '4': 1})
+
+
+class AsgiExportTests(PollTestCase):
+
+    def setUp(self):
+        self.answer(self.voters[0], self.yes)
+        self.answer(self.voters[1], self.no)
+
+    async def test_exports_stream_asynchronously_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.creator)
+        url = reverse('polls:export_data', kwargs={'slug': self.poll.slug})
+
+        for export_format, stream in (('csv', stream_csv), ('ndjson', stream_ndjson)):
+            response = await client.get(url, {'format': export_format})
+            self.assertTrue(response.is_async)
+            body = b''.join([chunk async for chunk in response.streaming_content])
+            expected = await sync_to_async(lambda: ''.join(stream(self.poll)).encode())()
+            self.assertEqual(body, expected)
+
+
+class TimelineTests(PollTestCase):
+
+    def timeline(self):
+        return get_timeline(self.poll, resolution='hour')
+
+    def test_submissions_fill_the_current_hour(self):
+        self.answer(self.voters[0], self.yes)
+        self.answer(self.voters[1], self.no)
+
+        timeline = self.timeline()
+        self.assertEqual(timeline['dates'], [timezone.now().strftime('%Y-%m-%d %H:00')])
+        self.assertEqual((timeline['counts'], timeline['participants']), ([2], [2]))
+
+    def test_edits_are_not_new_submissions(self):
+        self.answer(self.voters[0], self.yes)
+        self.answer(self.voters[0], self.no)
+
+        self.assertEqual((self.timeline()['counts'], self.timeline()['participants']), ([1], [1]))
+
+    def test_matches_rebuilt_timeline(self):
+        for voter in self.voters:
+            self.answer(voter, self.yes)
+        self.answer(self.voters[0], self.no)
+        live = self.timeline()
+
+        rebuild_timeline(self.poll)
+        self.assertEqual(self.timeline(), live)
+
+    def test_daily_and_cumulative_views(self):
+        self.answer(self.voters[0], self.yes)
+        self.answer(self.voters[1], self.yes)
+
+        daily = get_timeline(self.poll, cumulative=True)
+        self.assertEqual(daily['dates'], [timezone.now().strftime('%Y-%m-%d')])
+        self.assertEqual(daily['counts'], [2])
+
+
+class PollCounterTests(PollTestCase):
+
+    def setUp(self):
+        for voter in self.voters[:2]:
+            self.answer(voter, self.yes)
+
+    def counters(self):
+        self.poll.refresh_from_db()
+        return self.poll.response_count, self.poll.participant_count
+
+    def test_full_save_keeps_counters(self):
+        stale = Poll.objects.get(pk=self.poll.pk)
+        self.answer(self.voters[2], self.no)
+
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self.counters(), (9, 3))
+
+    def test_deleted_response_is_uncounted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PollResponse.objects.filter(user=self.voters[0], question=self.text_question).get().delete()
+        self.assertEqual(self.counters(), (5, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PollResponse.objects.filter(user=self.voters[0]).delete()
+        self.assertEqual(self.counters(), (3, 1))
+
+    def test_deleted_user_is_uncounted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.voters[0].delete()
+        self.assertEqual(self.counters(), (3, 1))
+
+    def test_deleted_response_updates_tallies_and_terms(self):
+        version = get_poll_version(self.poll.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            PollResponse.objects.filter(user=self.voters[0]).delete()
+
+        self.assertEqual(self.choice_question.tally, {TOTAL_KEY: 1, str(self.yes.id): 1})
+        self.assertEqual(self.text_question.top_terms['campus food'], 1)
+        self.assertNotEqual(get_poll_version(self.poll.id), version)
+
+    def test_deleted_question_is_uncounted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.text_question.delete()
+        self.assertEqual(self.counters(), (4, 2))
+
+    def test_reconcile_repairs_drift(self):
+        Poll.objects.filter(pk=self.poll.pk).update(response_count=100, participant_count=0)
+
+        self.assertEqual([poll.pk for poll in reconcile_counters(Poll.objects.all())], [self.poll.pk])
+        self.assertEqual(self.counters(), (6, 2))
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        creator = User.objects.create_user('searcher')
+        polls = [
+            ('Renewable energy survey', 'Solar and wind power on campus'),
+            ('Campus food', 'Cafeteria menu and the energy drinks on sale'),
+            ('Library hours', 'When should the library open?'),
+        ]
+        cls.polls = {}
+        for title, description in polls:
+            poll = Poll(title=title, description=description, creator=creator, start_date=timezone.now())
+            poll.save()
+            cls.polls[title] = poll
+        search.rebuild_index()
+
+    def titles(self, query):
+        results = search_polls(Poll.objects.all(), query).order_by('-search_rank')
+        return [poll.title for poll in results]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.titles('energy'), ['Renewable energy survey', 'Campus food'])
+
+    def test_no_match_and_stopwords_only(self):
+        self.assertEqual(self.titles('parking'), [])
+        self.assertEqual(self.titles('the and of'), [])
+
+    def test_list_view_without_matches(self):
+        response = self.client.get(reverse('polls:poll_list'), {'q': 'parking', 'sort': 'relevance'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['polls']), [])
+
+    def test_saved_poll_is_reindexed(self):
+        poll = self.polls['Library hours']
+        poll.description = 'Opening hours during exams'
+        with self.captureOnCommitCallbacks(execute=True):
+            poll.save()
+
+        self.assertEqual(self.titles('exams'), ['Library hours'])
+        self.assertEqual(self.titles('open'), [])
+
+    def test_migration_tokenizer_matches_search(self):
+        migration = importlib.import_module('polls.migrations.0006_poll_search')
+        texts = [
+            "Campus food isn't great: the 2024 café_menu, a B-grade x!",
+            'Solar, WIND and renewable-energy   options',
+            '',
+            'a ' + 'x' * 80,
+        ]
+        for text in texts:
+            self.assertEqual(migration.tokenize(text), search.tokenize(text))
+
+
+class CursorPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        creator = User.objects.create_user('creator')
+        start = timezone.now()
+        polls = Poll.objects.bulk_create([
+            Poll(title=f'Poll {i}', slug=f'poll-{i}', description='d', creator=creator, start_date=start)
+            for i in range(7)
+        ])
+        # Pairs of polls share a creation time, so pages must break ties by id
+        for index, poll in enumerate(polls):
+            Poll.objects.filter(pk=poll.pk).update(created_at=start - timedelta(minutes=index // 2))
+        cls.expected = list(Poll.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def paginator(self):
+        return CursorPaginator(Poll.objects.all(), per_page=3)
+
+    def test_forward_pages_cover_every_row_once(self):
+        seen = []
+        page = self.paginator().page()
+        self.assertFalse(page.has_previous())
+        while True:
+            seen.extend(poll.id for poll in page)
+            if not page.has_next():
+                break
+            page = self.paginator().page(after=page.next_cursor)
+
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_to_earlier_page(self):
+        first = self.paginator().page()
+        second = self.paginator().page(after=first.next_cursor)
+
+        back = self.paginator().page(before=second.previous_cursor)
+        self.assertEqual([poll.id for poll in back], [poll.id for poll in first])
+        self.assertEqual([poll.id for poll in second], self.expected[3:6])
+
+    def test_invalid_cursor_gives_first_page(self):
+        for cursor in ('not-a-cursor', encode_cursor([1])):
+            page = self.paginator().page(after=cursor)
+            self.assertEqual([poll.id for poll in page], self.expected[:3])
+
+    def test_approximate_total_stops_at_limit(self):
+        paginator = CursorPaginator(Poll.objects.all(), per_page=3, approximate_total=True)
+        self.assertEqual(paginator.count, 7)
+        self.assertTrue(paginator.count_is_exact)
+
+        with mock.patch('polls.pagination.APPROXIMATE_COUNT_LIMIT', 5):
+            paginator = CursorPaginator(Poll.objects.all(), per_page=3, approximate_total=True)
+            self.assertEqual(paginator.count, 5)
+            self.assertFalse(paginator.count_is_exact)
+
+    def test_list_view_links_keep_filters(self):
+        with mock.patch('polls.views.PollListView.paginate_by', 3):
+            response = self.client.get(reverse('polls:poll_list'), {'type': 'public'})
+            page = response.context['page_obj']
+            self.assertIn('type=public', page.next_query)
+
+            response = self.client.get(reverse('polls:poll_list') + '?' + page.next_query)
+        self.assertEqual([poll.id for poll in response.context['polls']], self.expected[3:6])
+
+
+class MyResponsesTests(PollTestCase):
+
+    def page(self, query=''):
+        # Only the context is checked, the view renders a project template
+        with mock.patch('polls.views.render', return_value=HttpResponse()) as render:
+            self.client.get(reverse('polls:my_responses') + query)
+        return render.call_args.args[2]['page_obj']
+
+    def test_one_row_per_answered_poll(self):
+        other = Poll.objects.create(title='Other', description='d', creator=self.creator, start_date=timezone.now())
+        question = Question.objects.create(
+            poll=other, text='Why', question_type=self.text_question.question_type, order=1
+        )
+        self.answer(self.voters[0], self.yes)
+        save_submissions(other, [(self.voters[0].id, {question.id: 'later'})])
+        PollResponse.objects.filter(question=question).update(created_at=timezone.now() + timedelta(minutes=1))
+        self.answer(self.voters[1], self.no)
+
+        self.client.force_login(self.voters[0])
+        rows = [(row['poll'], row['answer_count']) for row in self.page()]
+        self.assertEqual(rows, [(other, 1), (self.poll, 3)])
+
+    def test_pages_follow_latest_response(self):
+        start = timezone.now()
+        for index in range(12):
+            poll = Poll.objects.create(title=f'Poll {index}', description='d', creator=self.creator, start_date=start)
+            question = Question.objects.create(
+                poll=poll, text='Why', question_type=self.text_question.question_type, order=1
+            )
+            save_submissions(poll, [(self.voters[0].id, {question.id: 'answer'})])
+            PollResponse.objects.filter(question=question).update(created_at=start - timedelta(minutes=index))
+
+        self.client.force_login(self.voters[0])
+        first = self.page()
+        second = self.page('?' + first.next_query)
+
+        titles = [row['poll'].title for row in first] + [row['poll'].title for row in second]
+        self.assertEqual(titles, [f'Poll {index}' for index in range(12)])
+        self.assertFalse(second.has_next())
+
+
+class BuilderTests(PollTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for slug in ('true_false', 'likert_scale'):
+            QuestionType.objects.get_or_create(slug=slug, defaults={'name': slug})
+
+    def template_questions(self, count):
+        return [
+            {'text': f'Question {i}', 'question_type': 'single_choice', 'order': i,
+             'choices': [{'text': 'B', 'order': 2}, {'text': 'A', 'order': 1}]}
+            for i in range(count)
+        ]
+
+    def choice_texts(self, question):
+        return list(question.choices.order_by('order').values_list('text', flat=True))
+
+    def test_template_questions_are_saved_with_ordered_choices(self):
+        poll = Poll.objects.create(title='New', description='d', creator=self.creator, start_date=timezone.now())
+        questions = save_questions(poll, questions_from_data(self.template_questions(2)))
+
+        self.assertEqual([question.text for question in poll.questions.order_by('order')], ['Question 0', 'Question 1'])
+        self.assertEqual(self.choice_texts(questions[0]), ['A', 'B'])
+
+    def test_default_choices(self):
+        poll = Poll.objects.create(title='New', description='d', creator=self.creator, start_date=timezone.now())
+        true_false, likert = save_questions(poll, questions_from_data([
+            {'text': 'True?', 'question_type': 'true_false'},
+            {'text': 'Agree?', 'question_type': 'likert_scale'},
+        ]))
+
+        self.assertEqual(self.choice_texts(true_false), ['True', 'False'])
+        self.assertEqual(len(self.choice_texts(likert)), 5)
+
+    def test_existing_questions_keep_or_replace_choices(self):
+        self.choice_question.text = 'Renamed'
+        self.rating_question.max_value = 10
+        save_questions(self.poll, [(self.choice_question, None), (self.rating_question, None)])
+        self.assertEqual(self.choice_texts(self.choice_question), ['Yes', 'No'])
+        self.choice_question.refresh_from_db()
+        self.assertEqual(self.choice_question.text, 'Renamed')
+
+        save_questions(self.poll, [(self.choice_question, ['Maybe'])])
+        self.assertEqual(self.choice_texts(self.choice_question), ['Maybe'])
+
+    def test_invalid_structure_saves_nothing(self):
+        poll = Poll.objects.create(title='New', description='d', creator=self.creator, start_date=timezone.now())
+        with self.assertRaises(ValidationError) as raised:
+            save_questions(poll, questions_from_data([
+                {'text': 'Fine', 'question_type': 'single_choice', 'choices': ['A']},
+                {'text': '', 'question_type': 'single_choice'},
+                {'text': 'Rate', 'question_type': 'rating_scale', 'min_value': 5, 'max_value': 1},
+            ]))
+
+        self.assertEqual(len(raised.exception.messages), 3)
+        self.assertFalse(poll.questions.exists())
+
+    def test_unknown_question_type(self):
+        with self.assertRaises(ValidationError):
+            questions_from_data([{'text': 'Odd', 'question_type': 'no_such_type'}])
+
+    def test_query_count_does_not_grow_with_questions(self):
+        def queries(count):
+            poll = Poll.objects.create(title='New', description='d', creator=self.creator, start_date=timezone.now())
+            entries = questions_from_data(self.template_questions(count))
+            with CaptureQueriesContext(connection) as captured:
+                save_questions(poll, entries)
+            return len(captured)
+
+        self.assertEqual(queries(3), queries(30))
+
+
+class QuestionTypeRegistryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.single_choice = QuestionType.objects.create(slug='single_choice', name='Single choice')
+
+    def tearDown(self):
+        # Rows of this test are rolled back, do not leave them in the registry
+        question_types.invalidate()
+
+    def created_elsewhere(self, slug):
+        # bulk_create sends no signals, like a save in another process
+        QuestionType.objects.bulk_create([QuestionType(slug=slug, name=slug)])
+        return QuestionType.objects.get(slug=slug)
+
+    def test_saved_type_is_seen_at_once(self):
+        question_types.all()
+        created = QuestionType.objects.create(slug='ranking', name='Ranking')
+        self.assertEqual(question_types.by_slug('ranking'), created)
+
+    def test_types_added_elsewhere_are_seen_after_check_interval(self):
+        question_types.all()
+        created = self.created_elsewhere('ranking')
+        self.assertIsNone(question_types.by_slug('ranking'))
+
+        with mock.patch('polls.registry.GENERATION_CHECK_INTERVAL', 0):
+            self.assertEqual(question_types.by_slug('ranking'), created)
+
+    def test_types_edited_elsewhere_are_seen_after_reload_interval(self):
+        question_types.all()
+        QuestionType.objects.filter(pk=self.single_choice.pk).update(name='Renamed')
+
+        with mock.patch('polls.registry.GENERATION_CHECK_INTERVAL', 0):
+            self.assertEqual(question_types.get(self.single_choice.pk).name, 'Single choice')
+            with mock.patch('polls.registry.RELOAD_INTERVAL', 0):
+                self.assertEqual(question_types.get(self.single_choice.pk).name, 'Renamed')
+
+    def test_form_field_accepts_type_added_elsewhere(self):
+        question_types.all()
+        created = self.created_elsewhere('ranking')
+
+        field = QuestionTypeChoiceField(queryset=QuestionType.objects.all())
+        self.assertEqual(field.clean(str(created.pk)), created)
+        with self.assertRaises(ValidationError):
+            field.clean(str(created.pk + 1))
+
+    def test_returned_mappings_are_read_only(self):
+        by_id, _ = question_types._load()
+        with self.assertRaises(TypeError):
+            by_id[0] = self.single_choice
+
+
+class FlushPendingSubmissionsTests(PollTestCase):
+
+    def enqueue(self, user, answers=None):
+        if answers is None:
+            answers = {str(self.choice_question.id): str(self.yes.id), str(self.rating_question.id): '4'}
+        return PendingSubmission.objects.create(poll=self.poll, user=user, answers=answers)
+
+    def test_queued_submissions_are_saved_together(self):
+        for voter in self.voters:
+            self.enqueue(voter)
+        self.assertTrue(has_pending_submission(self.poll, self.voters[0]))
+
+        self.assertEqual(flush_pending_submissions(), 3)
+
+        self.assertFalse(PendingSubmission.objects.exists())
+        self.assertFalse(has_pending_submission(self.poll, self.voters[0]))
+        self.assertEqual(PollResponse.objects.filter(question=self.choice_question).count(), 3)
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.participant_count, 3)
+
+    def test_failing_submission_does_not_hold_back_others(self):
+        self.enqueue(self.voters[0])
+        broken = self.enqueue(self.voters[1], {'not-a-question': 'x'})
+        self.enqueue(self.voters[2])
+
+        with self.assertLogs('polls.submissions', 'WARNING'):
+            self.assertEqual(flush_pending_submissions(), 2)
+
+        self.assertEqual(list(PendingSubmission.objects.all()), [broken])
+        broken.refresh_from_db()
+        self.assertEqual(broken.attempts, 1)
+        self.assertTrue(broken.error)
+        self.assertEqual(
+            set(PollResponse.objects.values_list('user_id', flat=True)), {self.voters[0].id, self.voters[2].id}
+        )
+
+    def test_submission_is_left_aside_after_max_attempts(self):
+        broken = self.enqueue(self.voters[0], {'not-a-question': 'x'})
+
+        with self.assertLogs('polls.submissions', 'ERROR'):
+            for _ in range(MAX_FLUSH_ATTEMPTS):
+                flush_pending_submissions()
+        self.assertEqual(flush_pending_submissions(), 0)
+
+        broken.refresh_from_db()
+        self.assertEqual(broken.attempts, MAX_FLUSH_ATTEMPTS)
+
+
+class TallyPollTests(PollTestCase):
+
+    def setUp(self):
+        self.answer(self.voters[0], self.yes, rating=5, text='campus food')
+        self.answer(self.voters[1], self.no, rating=5, text='food prices')
+
+    def test_distribution_of_every_question(self):
+        with self.assertNumQueries(5):
+            data = tally_poll(self.poll)
+
+        self.assertEqual(data[self.choice_question.id], {'Yes': 1, 'No': 1})
+        self.assertEqual(data[self.rating_question.id][5], 2)
+        self.assertEqual(data[self.text_question.id], ['campus food', 'food prices'])
+
+    def test_text_answers_and_top_terms_are_separate(self):
+        question = Question.objects.with_tallies().get(pk=self.text_question.pk)
+
+        self.assertEqual(sorted(question.response_data), ['campus food', 'food prices'])
+        self.assertEqual(question.top_terms['food'], 2)
+
+        analytics = {row['type']: row['data'] for row in PollAnalyticsView().get_question_analytics(self.poll)}
+        self.assertEqual(analytics['open_ended']['food'], 2)
+
+
+class ArchiveTests(PollTestCase):
+
+    def setUp(self):
+        self.answer(self.voters[0], self.yes)
+        self.poll.refresh_from_db()
+
+    def close(self):
+        Poll.objects.filter(pk=self.poll.pk).update(status='closed')
+        self.poll.refresh_from_db()
+
+    def test_active_poll_is_not_frozen(self):
+        self.assertIsNone(freeze_poll(self.poll))
+
+    def test_archive_of_closed_poll(self):
+        self.close()
+
+        self.assertIsNotNone(freeze_poll(self.poll))
+        results = get_archived_results(self.poll)
+        self.assertEqual(results['tallies'][self.choice_question.id][str(self.yes.id)], 1)
+
+    def test_new_responses_make_archive_stale(self):
+        self.close()
+        freeze_poll(self.poll)
+
+        self.answer(self.voters[1], self.no)
+        self.poll.refresh_from_db()
+        self.assertIsNone(get_archive(self.poll))
+
+    def test_closing_and_reopening_from_the_view(self):
+        self.client.force_login(self.creator)
+        url = reverse('polls:change_status', args=[self.poll.pk])
+
+        self.client.post(url, {'status': 'closed'})
+        self.poll.refresh_from_db()
+        self.assertIsNotNone(get_archive(self.poll))
+
+        self.client.post(url, {'status': 'active'})
+        self.assertFalse(PollResultsArchive.objects.filter(poll=self.poll).exists())
+
+    def test_command_archives_only_missing_or_stale(self):
+        self.close()
+        call_command('archive_poll_results', stdout=StringIO())
+        archive = get_archive(self.poll)
+
+        output = StringIO()
+        call_command('archive_poll_results', stdout=output)
+        self.assertIn('0 poll results archived', output.getvalue())
+        self.assertEqual(get_archive(self.poll).pk, archive.pk)
+
+
+class SeedAndBenchmarkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.counts = seed_database(users=6, polls=2, questions=4, choices=3, respondents=5, seed=1, prefix='t')
+
+    def test_seeded_rows(self):
+        self.assertEqual(
+            {key: self.counts[key] for key in ('users', 'polls', 'questions')},
+            {'users': 6, 'polls': 2, 'questions': 8}
+        )
+        self.assertEqual(PollResponse.objects.count(), self.counts['responses'])
+        self.assertEqual(self.counts['responses'], 2 * 4 * 5)
+
+    def test_derived_data_is_built(self):
+        poll = Poll.objects.filter(slug__startswith='t').first()
+        tallies = {key: dict(value) for key, value in get_poll_tallies(poll).items()}
+        rebuild_poll_tallies(poll)
+
+        self.assertEqual(tallies, {key: dict(value) for key, value in get_poll_tallies(poll).items()})
+        self.assertEqual(reconcile_counters(), [])
+        self.assertEqual(poll.participant_count, 5)
+
+    def test_benchmark_command_rolls_back_submissions(self):
+        output = StringIO()
+        call_command('benchmark_polls', repeat=1, stdout=output, stderr=StringIO())
+
+        report = json.loads(output.getvalue())
+        self.assertIn('submit', report['scenarios'])
+        self.assertEqual(report['scenarios']['submit']['runs'], 1)
+        self.assertEqual(PollResponse.objects.count(), self.counts['responses'])
+
+    def test_compare_reports(self):
+        previous = {'scenarios': {'list': {'median_ms': 10.0, 'queries': 8}}}
+        current = {'scenarios': {
+            'list': {'median_ms': 7.5, 'queries': 5},
+            'results': {'median_ms': 3.0, 'queries': 4},
+        }}
+        self.assertEqual(compare_reports(previous, current), {'list': {'median_ms': -2.5, 'queries': -3}})
+
+
+class HyperLogLogTests(TestCase):
+
+    def test_small_counts_are_near_exact(self):
+        sketch = HyperLogLog()
+        sketch.update(range(100))
+        self.assertAlmostEqual(sketch.count(), 100, delta=2)
+
+    def test_large_counts_within_error_bound(self):
+        sketch = HyperLogLog()
+        sketch.update(range(50000))
+        # About 1.6% standard error at the default precision; allow three
+        self.assertAlmostEqual(sketch.count(), 50000, delta=50000 * 0.05)
+
+    def test_duplicates_are_counted_once(self):
+        sketch = HyperLogLog()
+        sketch.update(list(range(1000)) * 3)
+        self.assertAlmostEqual(sketch.count(), 1000, delta=1000 * 0.05)
+
+    def test_merge_counts_the_union(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        first.update(range(0, 6000))
+        second.update(range(4000, 10000))
+
+        merged = HyperLogLog.from_bytes(first.to_bytes()).merge(second)
+        self.assertAlmostEqual(merged.count(), 10000, delta=10000 * 0.05)
+
+
+class ParticipantSketchTests(PollTestCase):
+
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.yesterday = self.today - timedelta(days=1)
+        for voter in self.voters:
+            self.answer(voter, self.yes)
+        # voter0 and voter1 answered yesterday; voter1 answered another question today
+        PollResponse.objects.filter(user__in=self.voters[:2]).update(created_at=timezone.now() - timedelta(days=1))
+        PollResponse.objects.filter(user=self.voters[1], question=self.text_question).update(created_at=timezone.now())
+
+    def test_submissions_do_not_write_sketches(self):
+        self.assertFalse(ParticipantSketch.objects.exists())
+
+    def test_days_count_active_participants(self):
+        self.assertEqual(rebuild_sketches(self.poll), 2)
+
+        self.assertEqual(approximate_participants([self.poll.id], start=self.today), 2)
+        self.assertEqual(approximate_participants([self.poll.id], end=self.yesterday), 2)
+        self.assertEqual(approximate_participants([self.poll.id]), 3)
+
+    def test_recent_days_only(self):
+        rebuild_sketches(self.poll)
+        PollResponse.objects.filter(user=self.voters[0]).update(created_at=timezone.now())
+
+        call_command('rebuild_participant_sketches', days=1, stdout=StringIO())
+        self.assertEqual(approximate_participants([self.poll.id], start=self.today), 3)
+        # Earlier days are kept as they were
+        self.assertEqual(approximate_participants([self.poll.id], end=self.yesterday), 2)
+
+
+class TermIndexTests(PollTestCase):
+
+    def test_answers_add_terms(self):
+        self.answer(self.voters[0], self.yes, text='Campus food is great')
+        self.answer(self.voters[1], self.yes, text='campus parking')
+
+        terms = top_terms(self.text_question)
+        self.assertEqual(terms['campus'], 2)
+        self.assertEqual(terms['campus food'], 1)
+        self.assertNotIn('is', terms)
+
+    def test_edited_answer_subtracts_old_terms(self):
+        self.answer(self.voters[0], self.yes, text='campus food')
+        self.answer(self.voters[0], self.yes, text='library hours')
+
+        terms = top_terms(self.text_question)
+        self.assertNotIn('campus', terms)
+        self.assertEqual(terms['library hours'], 1)
+
+    def test_words_and_exclude_filters(self):
+        self.answer(self.voters[0], self.yes, text='campus food')
+
+        self.assertEqual(top_terms(self.text_question, words=1, exclude=['food']), {'campus': 1})
+        self.assertEqual(top_terms(self.text_question, words=2), {'campus food': 1})
+
+    def test_matches_rebuilt_index(self):
+        for index, voter in enumerate(self.voters):
+            self.answer(voter, self.yes, text=f'campus food option {index}')
+        self.answer(self.voters[1], self.yes, text='food trucks')
+
+        live = top_terms(self.text_question, limit=100)
+        rebuild_terms(Question.objects.filter(id=self.text_question.id))
+        self.assertEqual(live, top_terms(self.text_question, limit=100))
@@ -0,0 +1,52 @@
+import re
+from collections import Counter
+
+# Common English words that carry no meaning on their own
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same
+she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself
+yourselves
+""".split())
+
+WORD_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+
+# Longest term kept in the indexes
+MAX_TERM_LENGTH = 64
+
+# Longest phrase (in words) counted by the answer term index
+MAX_NGRAM = 2
+
+
+def tokenize(text, stopwords=STOPWORDS):
+    """
+    Split text into lowercase words.
+
+    Single characters, numbers-only tokens and stopwords are dropped.
+    """
+    if not text:
+        return []
+    return [
+        word[:MAX_TERM_LENGTH]
+        for word in WORD_RE.findall(text.lower())
+        if len(word) > 1 and not word.isdigit() and word not in stopwords
+    ]
+
+
+def ngrams(tokens, n):
+    """Runs of ``n`` consecutive tokens joined by spaces"""
+    return [' '.join(tokens[start:start + n]) for start in range(len(tokens) - n + 1)]
+
+
+def term_counts(text, max_n=MAX_NGRAM, stopwords=STOPWORDS):
+    """Occurrences of every word and phrase of up to ``max_n`` words in a text"""
+    tokens = tokenize(text, stopwords)
+    counts = Counter(tokens)
+    for n in range(2, max_n + 1):
+        counts.update(ngrams(tokens, n))
+    return counts
@@ -0,0 +1,120 @@
+from collections import Counter
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import F, Min, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from .models import PollResponse, PollTimelineBucket
+
+
+def hour_bucket(moment):
+    """Start of the hour a moment falls in"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record_submissions(poll_id, submissions=1, participants=0, when=None):
+    """Count submissions (and new participants) in the current hour"""
+    hour = hour_bucket(when or timezone.now())
+
+    PollTimelineBucket.objects.bulk_create(
+        [PollTimelineBucket(poll_id=poll_id, hour=hour)],
+        ignore_conflicts=True
+    )
+    PollTimelineBucket.objects.filter(poll_id=poll_id, hour=hour).update(
+        submissions=F('submissions') + submissions,
+        participants=F('participants') + participants
+    )
+
+
+def rebuild_timeline(poll):
+    """
+    Recompute the hourly buckets of a poll from its stored responses.
+
+    A submission is counted for every participant in each hour they
+    saved new answers, and a participant in the hour of their first
+    answer, as ``save_submissions`` records them. Edits keep the time
+    the answer was first saved, so they were never counted.
+    """
+    responses = PollResponse.objects.filter(question__poll=poll)
+    submitters = responses.annotate(
+        bucket=TruncHour('created_at', tzinfo=dt_timezone.utc)
+    ).values_list('user', 'bucket').distinct().order_by()
+    submissions = Counter(bucket for _, bucket in submitters.iterator(chunk_size=2000))
+    first_answers = responses.values('user').annotate(first=Min('created_at')).order_by().values_list('first', flat=True)
+    participants = Counter(hour_bucket(first) for first in first_answers.iterator(chunk_size=2000))
+
+    with transaction.atomic():
+        PollTimelineBucket.objects.filter(poll=poll).delete()
+        PollTimelineBucket.objects.bulk_create(
+            [
+                PollTimelineBucket(poll=poll, hour=hour, submissions=count, participants=participants[hour])
+                for hour, count in submissions.items()
+            ],
+            batch_size=1000
+        )
+
+    return len(submissions)
+
+
+def get_timeline(poll, resolution='day', cumulative=False, fill_gaps=False):
+    """
+    Submission timeline of a poll read from its hourly buckets.
+
+    Args:
+        poll: Poll to chart.
+        resolution: 'day' or 'hour'.
+        cumulative: Return running totals instead of per-period counts.
+        fill_gaps: Include empty periods up to the current time.
+
+    Returns:
+        Dict with 'dates', 'counts' (submissions) and 'participants' lists.
+    """
+    buckets = PollTimelineBucket.objects.filter(poll=poll)
+
+    if resolution == 'hour':
+        rows = buckets.values_list('hour', 'submissions', 'participants').order_by('hour')
+        step = timedelta(hours=1)
+        date_format = '%Y-%m-%d %H:00'
+        current = hour_bucket(timezone.now())
+    else:
+        rows = buckets.annotate(
+            day=TruncDate('hour')
+        ).values('day').annotate(
+            total_submissions=Sum('submissions'),
+            total_participants=Sum('participants')
+        ).values_list('day', 'total_submissions', 'total_participants').order_by('day')
+        step = timedelta(days=1)
+        date_format = '%Y-%m-%d'
+        current = timezone.now().date()
+
+    periods = {period: (submissions, participants) for period, submissions, participants in rows}
+    timeline = {'dates': [], 'counts': [], 'participants': []}
+    if not periods:
+        return timeline
+
+    if fill_gaps:
+        keys = []
+        period = min(periods)
+        while period <= max(current, max(periods)):
+            keys.append(period)
+            period += step
+    else:
+        keys = sorted(periods)
+
+    total_submissions = 0
+    total_participants = 0
+    for period in keys:
+        submissions, participants = periods.get(period, (0, 0))
+        if cumulative:
+            total_submissions += submissions
+            total_participants += participants
+            submissions, participants = total_submissions, total_participants
+
+        timeline['dates'].append(period.strftime(date_format))
+        timeline['counts'].append(submissions)
+        timeline['participants'].append(participants)
+
+    return timeline
@@ -1,6 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse, reverse_lazy
-from django.http import HttpResponseForbidden, JsonResponse
+from django.http import HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import (
@@ -10,16 +10,35 @@ from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-from django.db.models import Count, Q
-from django.core.paginator import Paginator
+from django.db.models import Count, Max, Q
 from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
 
 from .models import (
     Poll, PollComment, Question, Choice, PollResponse, 
     PollTemplate, PollCategory, QuestionType
 )
+from .answers import TEXT_TYPES
+from .archive import discard_archive, freeze_poll, get_archived_results
+from .builder import needs_choices, questions_from_data, save_questions, validate_questions
+from .cache import FROZEN_STATUSES, get_results_snapshot
+from .correlations import get_poll_correlations
+from .exports import stream_async, stream_csv, stream_json, stream_ndjson
+from .tallies import (
+    get_poll_tallies, get_question_tally, tally_total, tally_average
+)
+from .pagination import CursorPaginationMixin, CursorPaginator
+from .registry import question_types as question_type_registry
+from .search import search_polls
+from .sketches import approximate_participants
+from .submissions import has_pending_submission
+from .terms import top_terms, top_terms_prefetch
+from .timeline import get_timeline
 from .forms import (
     PollCommentForm, PollForm, QuestionForm, ChoiceForm, 
     QuestionFormSet, ChoiceFormSet, 
@@ -27,12 +46,20 @@ from .forms import (
     PollCategoryForm, QuestionTypeForm
 )
 
-class PollListView(ListView):
+class PollListView(CursorPaginationMixin, ListView):
     model = Poll
     template_name = 'polls/poll_list.html'
     context_object_name = 'polls'
     paginate_by = 12
     
+    # Orderings per sort option, each ending in a unique field for keyset pagination
+    sort_orderings = {
+        'relevance': ('-search_rank', '-created_at', '-id'),
+        'popular': ('-response_count', '-id'),
+        'ending_soon': ('end_date', 'id'),
+        'recent': ('-created_at', '-id'),
+    }
+    
     def get_queryset(self):
         queryset = Poll.objects.filter(status='active')
         
@@ -44,11 +71,7 @@ class PollListView(ListView):
         # Filter by search query if provided
         search_query = self.request.GET.get('q', '')
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) | 
-                Q(description__icontains=search_query) |
-                Q(tags__name__icontains=search_query)
-            ).distinct()
+            queryset = search_polls(queryset, search_query)
         
         # Filter by poll type
         poll_type = self.request.GET.get('type', '')
@@ -61,15 +84,20 @@ class PollListView(ListView):
             queryset = queryset.filter(restricted_to_institution=user_institution)
         
         # Sort options
-        sort_by = self.request.GET.get('sort', 'recent')
-        if sort_by == 'popular':
-            queryset = queryset.annotate(response_count=Count('questions__responses')).order_by('-response_count')
-        elif sort_by == 'ending_soon':
-            queryset = queryset.filter(end_date__isnull=False).order_by('end_date')
-        else:  # Default to recent
-            queryset = queryset.order_by('-created_at')
+        if self.get_sort_by() == 'ending_soon':
+            queryset = queryset.filter(end_date__isnull=False)
         
-        return queryset
+        return queryset.order_by(*self.get_paginate_ordering())
+    
+    def get_sort_by(self):
+        default = 'relevance' if self.request.GET.get('q') else 'recent'
+        sort_by = self.request.GET.get('sort', default)
+        if sort_by not in self.sort_orderings or (sort_by == 'relevance' and default != 'relevance'):
+            return 'recent'
+        return sort_by
+    
+    def get_paginate_ordering(self):
+        return self.sort_orderings[self.get_sort_by()]
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -80,11 +108,24 @@ class PollListView(ListView):
         context['current_category'] = self.kwargs.get('category_slug', '')
         context['search_query'] = self.request.GET.get('q', '')
         context['current_type'] = self.request.GET.get('type', '')
-        context['sort_by'] = self.request.GET.get('sort', 'recent')
+        context['sort_by'] = self.get_sort_by()
         
         return context
 
 
+def get_response_state(poll, user):
+    """
+    Whether a user has responded to a poll, and whether that response is
+    still queued for saving (buffered submissions).
+    """
+    if not user.is_authenticated:
+        return False, False
+    if PollResponse.objects.filter(question__poll=poll, user=user).exists():
+        return True, False
+    pending = has_pending_submission(poll, user)
+    return pending, pending
+
+
 class PollDetailView(DetailView):
     model = Poll
     template_name = 'polls/poll_detail.html'
@@ -95,14 +136,9 @@ class PollDetailView(DetailView):
         poll = self.get_object()
         
         # Check if user has already responded
-        user_responded = False
-        if self.request.user.is_authenticated:
-            user_responded = PollResponse.objects.filter(
-                question__poll=poll,
-                user=self.request.user
-            ).exists()
-        
+        user_responded, response_pending = get_response_state(poll, self.request.user)
         context['user_responded'] = user_responded
+        context['response_pending'] = response_pending
         
         # If user has not responded and poll is active, show response form
         if not user_responded and poll.status == 'active' and self.request.user.is_authenticated:
@@ -128,6 +164,31 @@ class PollDetailView(DetailView):
         
         return context
 
+
+def get_posted_choices(data, prefix):
+    """Choice texts submitted for a question in the poll builder"""
+    # Choices may be posted as a list or as indexed fields
+    choices_key = f'{prefix}_choices'
+    if choices_key in data:
+        return [text.strip() for text in data.getlist(choices_key) if text.strip()]
+    
+    choices = []
+    choice_index = 0
+    while f'{prefix}_choice_{choice_index}' in data:
+        choice_value = data[f'{prefix}_choice_{choice_index}'].strip()
+        if choice_value:
+            choices.append(choice_value)
+        choice_index += 1
+    
+    # If no choices were found using the index approach, try the older method
+    if not choices:
+        for key, value in data.items():
+            if key.startswith(f'{prefix}_choice_') and value.strip():
+                choices.append(value.strip())
+    
+    return choices
+
+
 # Poll Creation
 @method_decorator(login_required, name='dispatch')
 class PollCreateView(CreateView):
@@ -150,14 +211,14 @@ class PollCreateView(CreateView):
             context['question_formset'] = QuestionFormSet(instance=self.object)
         
         # Add all question types for the UI
-        context['question_types'] = QuestionType.objects.all()
+        context['question_types'] = question_type_registry.all()
         
         # Group question types by category for better UX
         question_types_by_category = {
-            'basic': QuestionType.objects.filter(slug__in=['single_choice', 'multiple_choice', 'open_ended', 'short_answer', 'true_false']),
-            'choice': QuestionType.objects.filter(slug__in=['single_choice', 'multiple_choice']),
-            'scale': QuestionType.objects.filter(slug__in=['rating_scale', 'likert_scale']),
-            'text': QuestionType.objects.filter(slug__in=['essay']),
+            'basic': question_type_registry.with_slugs(['single_choice', 'multiple_choice', 'open_ended', 'short_answer', 'true_false']),
+            'choice': question_type_registry.with_slugs(['single_choice', 'multiple_choice']),
+            'scale': question_type_registry.with_slugs(['rating_scale', 'likert_scale']),
+            'text': question_type_registry.with_slugs(['essay']),
         }
         context['question_types_by_category'] = question_types_by_category
         
@@ -174,87 +235,32 @@ class PollCreateView(CreateView):
         if not question_formset.is_valid():
             return self.form_invalid(form)
         
+        # Collect and validate the whole structure before saving anything
+        entries = []
+        for i, question_form in enumerate(question_formset):
+            if not question_form.has_changed() or question_form.cleaned_data.get('DELETE', False):
+                continue
+            question = question_form.save(commit=False)
+            choices = None
+            if needs_choices(question.question_type):
+                choices = get_posted_choices(self.request.POST, f"question_{i}") or None
+            entries.append((question, choices))
+        
+        try:
+            validate_questions(entries)
+        except ValidationError as error:
+            for message in error.messages:
+                messages.error(self.request, message)
+            return self.form_invalid(form)
+        
         # Save the poll with the creator
         self.object = form.save(commit=False)
         self.object.creator = self.request.user
         self.object.save()
         form.save_m2m()  # Save tags and other M2M relationships
         
-        # Process and save questions
-        questions = question_formset.save(commit=False)
-        for i, question_form in enumerate(question_formset):
-            if question_form.is_valid() and not question_form.cleaned_data.get('DELETE', False):
-                question = question_form.save(commit=False)
-                question.poll = self.object
-                question.save()
-                
-                # Process question type specific requirements
-                question_type = question.question_type
-                question_slug = question_type.slug
-                
-                # Handle question types that need choices
-                if question_type.requires_choices or question_slug in ['single_choice', 'multiple_choice', 'true_false']:
-                    # For true/false, add predefined choices if none exist
-                    if question_slug == 'true_false':
-                        Choice.objects.create(question=question, text=_('True'), order=1)
-                        Choice.objects.create(question=question, text=_('False'), order=2)
-                    else:
-                        # Get choices from the POST data
-                        choice_prefix = f"question_{i}"
-                        
-                        # Extract all choice fields for this question
-                        choices_data = []
-                        choice_index = 0
-                        
-                        # Keep looking for choices until we don't find any more
-                        while f'{choice_prefix}_choice_{choice_index}' in self.request.POST:
-                            choice_value = self.request.POST[f'{choice_prefix}_choice_{choice_index}'].strip()
-                            if choice_value:
-                                choices_data.append(choice_value)
-                            choice_index += 1
-                        
-                        # If no choices were found using the index approach, try the older method
-                        if not choices_data:
-                            for key, value in self.request.POST.items():
-                                if key.startswith(f'{choice_prefix}_choice_') and value.strip():
-                                    choices_data.append(value.strip())
-                        
-                        # Create choices
-                        for j, choice_text in enumerate(choices_data):
-                            Choice.objects.create(
-                                question=question,
-                                text=choice_text,
-                                order=j + 1
-                            )
-                
-                # Handle Likert scale default options if no custom options provided
-                if question_slug == 'likert_scale' and not question.choices.exists():
-                    likert_options = [
-                        (_('Strongly Disagree'), 1),
-                        (_('Disagree'), 2),
-                        (_('Neutral'), 3),
-                        (_('Agree'), 4),
-                        (_('Strongly Agree'), 5)
-                    ]
-                    for text, order in likert_options:
-                        Choice.objects.create(
-                            question=question,
-                            text=text,
-                            order=order
-                        )
-                
-                # Handle rating scale default values if not provided
-                if question_slug == 'rating_scale':
-                    if question.min_value is None:
-                        question.min_value = 1
-                    if question.max_value is None:
-                        question.max_value = 5
-                    question.save()
-        
-        # Handle deleted questions
-        for deleted_form in question_formset.deleted_forms:
-            if deleted_form.instance.pk:
-                deleted_form.instance.delete()
+        # Questions and their choices are created with bulk queries
+        save_questions(self.object, entries)
         
         messages.success(self.request, _('Poll created successfully!'))
         return redirect(self.get_success_url())
@@ -299,15 +305,14 @@ class PollCreateView(CreateView):
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             type_id = request.GET.get('type_id')
             if type_id:
-                try:
-                    question_type = QuestionType.objects.get(id=type_id)
-                    return JsonResponse({
-                        'requires_choices': question_type.requires_choices,
-                        'slug': question_type.slug,
-                        'name': question_type.name,
-                    })
-                except QuestionType.DoesNotExist:
+                question_type = question_type_registry.get(type_id)
+                if question_type is None:
                     return JsonResponse({'error': 'Question type not found'}, status=404)
+                return JsonResponse({
+                    'requires_choices': question_type.requires_choices,
+                    'slug': question_type.slug,
+                    'name': question_type.name,
+                })
         
         return JsonResponse({'error': 'Invalid request'}, status=400)
 
@@ -346,14 +351,14 @@ class PollUpdateView(UserPassesTestMixin, SuccessMessageMixin, UpdateView):
                     question_form.choices = choices
         
         # Add all question types for the UI
-        context['question_types'] = QuestionType.objects.all()
+        context['question_types'] = question_type_registry.all()
         
         # Group question types by category for better UX
         question_types_by_category = {
-            'basic': QuestionType.objects.filter(slug__in=['single_choice', 'multiple_choice', 'open_ended', 'short_answer', 'true_false']),
-            'choice': QuestionType.objects.filter(slug__in=['single_choice', 'multiple_choice']),
-            'scale': QuestionType.objects.filter(slug__in=['rating_scale', 'likert_scale']),
-            'text': QuestionType.objects.filter(slug__in=['essay']),
+            'basic': question_type_registry.with_slugs(['single_choice', 'multiple_choice', 'open_ended', 'short_answer', 'true_false']),
+            'choice': question_type_registry.with_slugs(['single_choice', 'multiple_choice']),
+            'scale': question_type_registry.with_slugs(['rating_scale', 'likert_scale']),
+            'text': question_type_registry.with_slugs(['essay']),
         }
         context['question_types_by_category'] = question_types_by_category
         
@@ -370,91 +375,41 @@ class PollUpdateView(UserPassesTestMixin, SuccessMessageMixin, UpdateView):
         if not question_formset.is_valid():
             return self.form_invalid(form)
         
-        self.object = form.save()
+        # Collect and validate the whole structure before saving anything
+        entries = []
+        for i, question_form in enumerate(question_formset.forms):
+            # Unchanged questions are kept too, their choices may have been edited
+            if question_form.instance.pk is None and not question_form.has_changed():
+                continue
+            if question_form.cleaned_data.get('DELETE', False):
+                continue
+            question = question_form.save(commit=False)
+            choices = None
+            if needs_choices(question.question_type):
+                choice_prefix = f"question_{i if not question.id else question.id}"
+                choices = get_posted_choices(self.request.POST, choice_prefix) or None
+            entries.append((question, choices))
+        
+        try:
+            validate_questions(entries)
+        except ValidationError as error:
+            for message in error.messages:
+                messages.error(self.request, message)
+            return self.form_invalid(form)
         
-        # Process and save questions
-        questions = question_formset.save(commit=False)
+        self.object = form.save()
         
-        # Track deleted questions to handle their choices
-        for deleted_form in question_formset.deleted_forms:
-            if deleted_form.instance.pk:
-                deleted_form.instance.delete()
+        # Delete removed questions along with their choices
+        deleted = [
+            deleted_form.instance.pk
+            for deleted_form in question_formset.deleted_forms
+            if deleted_form.instance.pk
+        ]
+        if deleted:
+            Question.objects.filter(poll=self.object, pk__in=deleted).delete()
         
-        # Process each question form
-        for i, question_form in enumerate(question_formset.forms):
-            if question_form.is_valid() and not question_form.cleaned_data.get('DELETE', False):
-                question = question_form.save(commit=False)
-                question.poll = self.object
-                question.save()
-                
-                # Process question type specific requirements
-                question_type = question.question_type
-                question_slug = question_type.slug
-                
-                # Handle choices based on the form data
-                choice_prefix = f"question_{i if not question.id else question.id}"
-                
-                # If question type requires choices
-                if question_type.requires_choices or question_slug in ['single_choice', 'multiple_choice', 'true_false', 'likert_scale']:
-                    # For true/false, add predefined choices if none exist
-                    if question_slug == 'true_false' and not Choice.objects.filter(question=question).exists():
-                        Choice.objects.filter(question=question).delete()  # Clear any existing choices
-                        Choice.objects.create(question=question, text=_('True'), order=1)
-                        Choice.objects.create(question=question, text=_('False'), order=2)
-                    elif question_slug == 'likert_scale' and not Choice.objects.filter(question=question).exists():
-                        # Handle Likert scale default options
-                        likert_options = [
-                            (_('Strongly Disagree'), 1),
-                            (_('Disagree'), 2),
-                            (_('Neutral'), 3),
-                            (_('Agree'), 4),
-                            (_('Strongly Agree'), 5)
-                        ]
-                        for text, order in likert_options:
-                            Choice.objects.create(
-                                question=question,
-                                text=text,
-                                order=order
-                            )
-                    else:
-                        # Extract all choice fields for this question
-                        choices_data = []
-                        choice_index = 0
-                        
-                        # Extract choices either by name pattern or direct array
-                        choices_key = f'{choice_prefix}_choices'
-                        if choices_key in self.request.POST:
-                            # If choices were submitted as an array
-                            choices_data = self.request.POST.getlist(choices_key, [])
-                        else:
-                            # Try to find choices by indexed naming pattern
-                            while f'{choice_prefix}_choice_{choice_index}' in self.request.POST:
-                                choice_value = self.request.POST[f'{choice_prefix}_choice_{choice_index}'].strip()
-                                if choice_value:
-                                    choices_data.append(choice_value)
-                                choice_index += 1
-                        
-                        # If we found choices, update them
-                        if choices_data:
-                            # First delete existing choices
-                            Choice.objects.filter(question=question).delete()
-                            
-                            # Then create new ones
-                            for j, choice_text in enumerate(choices_data):
-                                if choice_text.strip():
-                                    Choice.objects.create(
-                                        question=question,
-                                        text=choice_text.strip(),
-                                        order=j + 1
-                                    )
-                
-                # Handle rating scale specific fields
-                if question_slug == 'rating_scale':
-                    if question.min_value is None:
-                        question.min_value = 1
-                    if question.max_value is None:
-                        question.max_value = 5
-                    question.save()
+        # Questions and their choices are saved with bulk queries
+        save_questions(self.object, entries)
         
         messages.success(self.request, self.success_message)
         return redirect(self.get_success_url())
@@ -497,15 +452,14 @@ class PollUpdateView(UserPassesTestMixin, SuccessMessageMixin, UpdateView):
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             type_id = request.GET.get('type_id')
             if type_id:
-                try:
-                    question_type = QuestionType.objects.get(id=type_id)
-                    return JsonResponse({
-                        'requires_choices': question_type.requires_choices,
-                        'slug': question_type.slug,
-                        'name': question_type.name,
-                    })
-                except QuestionType.DoesNotExist:
+                question_type = question_type_registry.get(type_id)
+                if question_type is None:
                     return JsonResponse({'error': 'Question type not found'}, status=404)
+                return JsonResponse({
+                    'requires_choices': question_type.requires_choices,
+                    'slug': question_type.slug,
+                    'name': question_type.name,
+                })
         
         return JsonResponse({'error': 'Invalid request'}, status=400)
 
@@ -529,9 +483,12 @@ from django.utils.translation import gettext_lazy as _
 def submit_poll_response(request, slug):
     poll = get_object_or_404(Poll, slug=slug, status='active')
 
-    # Check if the user has already responded
+    # Check if the user has already responded, or has a response waiting to be saved
     # Fixed query: Accessing poll through question instead of directly
-    if PollResponse.objects.filter(question__poll=poll, user=request.user).exists():
+    if (
+        PollResponse.objects.filter(question__poll=poll, user=request.user).exists()
+        or has_pending_submission(poll, request.user)
+    ):
         messages.error(request, _('You have already responded to this poll.'))
         return redirect('polls:detail', slug=slug)
 
@@ -544,6 +501,16 @@ def submit_poll_response(request, slug):
         form = PollResponseForm(request.POST, poll=poll, user=request.user)
         
         if form.is_valid():
+            if getattr(settings, 'POLL_BUFFERED_SUBMISSIONS', False):
+                # Queue the answers; a flush_poll_submissions worker saves them in batches
+                try:
+                    form.enqueue()
+                except IntegrityError:
+                    messages.error(request, _('You have already responded to this poll.'))
+                    return redirect('polls:detail', slug=slug)
+                messages.success(request, _('Your response has been received and will appear in the results shortly. Thank you for participating!'))
+                return redirect('polls:detail', slug=slug)
+            
             form.save()
             messages.success(request, _('Your response has been recorded. Thank you for participating!'))
             return redirect('polls:results', slug=slug)
@@ -554,7 +521,7 @@ def submit_poll_response(request, slug):
     rating_ranges = {
         question.id: range(question.min_value or 1, (question.max_value or 5) + 1)
         for question in poll.questions.all()
-        if question.question_type.slug == 'rating_scale'
+        if question.question_type_slug == 'rating_scale'
     }
 
     return render(request, 'polls/poll_respond.html', {
@@ -581,16 +548,39 @@ class PollResultsView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        poll = self.get_object()
+        poll = self.object
+        
+        # Everything derived from responses is served from a snapshot that is
+        # rebuilt only after new responses, or from the archive stored when
+        # the poll was closed
+        archived = get_archived_results(poll)
+        if archived is not None:
+            context.update(archived['results'])
+        else:
+            context.update(get_results_snapshot(poll, lambda: self.get_results_data(poll)))
+        
+        # Request-specific data is never cached
+        context.update({
+            'is_active': poll.status == 'active',
+            'end_date': poll.end_date,
+            'days_remaining': (poll.end_date - timezone.now()).days if poll.end_date and poll.end_date > timezone.now() else 0,
+            'can_export': self.request.user == poll.creator or (hasattr(self.request.user, 'user_type') and self.request.user.user_type == 'researcher'),
+        })
         
+        return context
+    
+    def get_results_data(self, poll):
+        """Compute the response-derived part of the results page"""
         # Basic poll statistics
         total_responses = poll.total_responses
         total_participants = poll.total_participants
         
         # Calculate completion rate (if poll has multiple questions)
+        questions = list(poll.questions.prefetch_related('choices', top_terms_prefetch()))
+        question_count = len(questions)
         completion_rate = 0
-        if poll.questions.count() > 0:
-            completion_rate = (total_responses / (poll.questions.count() * total_participants)) * 100 if total_participants > 0 else 0
+        if question_count > 0:
+            completion_rate = (total_responses / (question_count * total_participants)) * 100 if total_participants > 0 else 0
         
         # Get time-based metrics
         response_timeline = self.get_response_timeline(poll)
@@ -603,60 +593,57 @@ class PollResultsView(DetailView):
         # Prepare detailed data for each question
         questions_data = []
         
-        for question in poll.questions.all():
+        # All answer counts for the poll come from the tally table in one query
+        poll_tallies = get_poll_tallies(poll)
+        correlations = self.get_correlations(poll, questions) if question_count > 1 else {}
+        
+        for question in questions:
+            tally = poll_tallies.get(question.id, {})
             question_data = {
                 'id': question.id,
                 'text': question.text,
-                'type': question.question_type.slug,
-                'response_count': question.responses.count(),
-                'chart_data': self.prepare_chart_data(question),
-                'statistics': self.get_question_statistics(question),
-                'correlations': self.get_correlations(question, poll) if poll.questions.count() > 1 else {},
+                'type': question.question_type_slug,
+                'response_count': tally_total(tally),
+                'chart_data': self.prepare_chart_data(question, tally),
+                'statistics': self.get_question_statistics(question, tally),
+                'correlations': correlations.get(question.id, []),
             }
             questions_data.append(question_data)
         
-        # Add data to context
-        context.update({
+        return {
             'total_responses': total_responses,
             'total_participants': total_participants,
             'completion_rate': completion_rate,
             'response_timeline': response_timeline,
             'demographics': demographics,
             'questions_data': questions_data,
-            'has_correlations': poll.questions.count() > 1,
+            'has_correlations': question_count > 1,
             'average_completion_time': self.get_average_completion_time(poll),
-            'is_active': poll.status == 'active',
-            'end_date': poll.end_date,
-            'days_remaining': (poll.end_date - timezone.now()).days if poll.end_date and poll.end_date > timezone.now() else 0,
-            'can_export': self.request.user == poll.creator or (hasattr(self.request.user, 'user_type') and self.request.user.user_type == 'researcher'),
-        })
-        
-        return context
+        }
     
-    def prepare_chart_data(self, question):
+    def prepare_chart_data(self, question, tally=None):
         """Prepare data for charts based on question type"""
-        question_type = question.question_type.slug
+        if tally is None:
+            tally = get_question_tally(question)
+        question_type = question.question_type_slug
         chart_data = {
             'labels': [],
+            'keys': [],  # Tally key of each label, for live updates
             'datasets': [],
             'chart_type': 'bar'  # Default chart type
         }
         
         if question_type in ['single_choice', 'multiple_choice', 'true_false']:
             # Count responses for each choice
-            choices = Choice.objects.filter(question=question).order_by('order')
+            choices = sorted(question.choices.all(), key=lambda choice: choice.order)
             response_counts = []
             
             for choice in choices:
                 chart_data['labels'].append(choice.text)
+                chart_data['keys'].append(str(choice.id))
                 
                 # Count responses that include this choice
-                count = PollResponse.objects.filter(
-                    question=question,
-                    response_data__contains=str(choice.id)
-                ).count()
-                
-                response_counts.append(count)
+                response_counts.append(tally.get(str(choice.id), 0))
             
             chart_data['datasets'].append({
                 'label': 'Responses',
@@ -671,15 +658,10 @@ class PollResultsView(DetailView):
             
             for value in range(min_value, max_value + 1):
                 chart_data['labels'].append(str(value))
+                chart_data['keys'].append(str(value))
                 
             # Count responses for each rating value
-            counts = []
-            for value in range(min_value, max_value + 1):
-                count = PollResponse.objects.filter(
-                    question=question,
-                    response_data=str(value)
-                ).count()
-                counts.append(count)
+            counts = [tally.get(str(value), 0) for value in range(min_value, max_value + 1)]
             
             chart_data['datasets'].append({
                 'label': 'Rating Distribution',
@@ -689,16 +671,13 @@ class PollResultsView(DetailView):
             
         elif question_type == 'likert_scale':
             # Similar to rating but with text labels
-            choices = Choice.objects.filter(question=question).order_by('order')
+            choices = sorted(question.choices.all(), key=lambda choice: choice.order)
             response_counts = []
             
             for choice in choices:
                 chart_data['labels'].append(choice.text)
-                count = PollResponse.objects.filter(
-                    question=question,
-                    response_data=str(choice.id)
-                ).count()
-                response_counts.append(count)
+                chart_data['keys'].append(str(choice.id))
+                response_counts.append(tally.get(str(choice.id), 0))
             
             chart_data['datasets'].append({
                 'label': 'Responses',
@@ -709,7 +688,14 @@ class PollResultsView(DetailView):
         elif question_type in ['open_ended', 'short_answer', 'essay']:
             # For text responses, provide word frequency data
             chart_data['chart_type'] = 'wordcloud'
-            # Word frequency would be calculated in the template or via an API
+            # Read from the term index maintained as answers are saved
+            terms = top_terms(question)
+            chart_data['labels'] = list(terms)
+            chart_data['keys'] = list(terms)
+            chart_data['datasets'].append({
+                'label': 'Word Frequency',
+                'data': list(terms.values()),
+            })
             
         return chart_data
     
@@ -736,32 +722,8 @@ class PollResultsView(DetailView):
         return colors
     
     def get_response_timeline(self, poll):
-        """Get response data over time"""
-        # Get all responses for this poll
-        responses = PollResponse.objects.filter(question__poll=poll).order_by('created_at')
-        
-        if not responses.exists():
-            return {'dates': [], 'counts': []}
-        
-        # Get response counts by date
-        from collections import Counter
-        from django.db.models.functions import TruncDate
-        
-        date_counts = responses.annotate(date=TruncDate('created_at')).values('date').annotate(count=Count('id')).order_by('date')
-        
-        dates = []
-        counts = []
-        cumulative_count = 0
-        
-        for item in date_counts:
-            dates.append(item['date'].strftime('%Y-%m-%d'))
-            cumulative_count += item['count']
-            counts.append(cumulative_count)
-        
-        return {
-            'dates': dates,
-            'counts': counts
-        }
+        """Get cumulative submissions per day from the hourly timeline buckets"""
+        return get_timeline(poll, resolution='day', cumulative=True)
     
     def get_demographic_data(self, poll):
         """Get demographic information of poll respondents if available"""
@@ -774,40 +736,37 @@ class PollResultsView(DetailView):
         
         # Example: Get gender distribution
         # Requires User model to have a gender field
-        responses = PollResponse.objects.filter(question__poll=poll).select_related('user').distinct('user')
+        # (DISTINCT ON fields is PostgreSQL only, so respondents are selected by id)
+        respondents = get_user_model().objects.filter(
+            id__in=PollResponse.objects.filter(question__poll=poll).values('user')
+        )
         
         # This is commented out because it depends on your specific User model
-        # gender_counts = responses.values('user__gender').annotate(count=Count('user__gender'))
+        # gender_counts = respondents.values('gender').annotate(count=Count('id'))
         # for item in gender_counts:
-        #     if item['user__gender']:
-        #         demographics['gender'][item['user__gender']] = item['count']
+        #     if item['gender']:
+        #         demographics['gender'][item['gender']] = item['count']
         
         return demographics
     
-    def get_question_statistics(self, question):
+    def get_question_statistics(self, question, tally=None):
         """Get statistical data for the question responses"""
+        if tally is None:
+            tally = get_question_tally(question)
+        
         stats = {
-            'count': question.responses.count(),
+            'count': tally_total(tally),
             'skip_rate': 0,
         }
         
-        question_type = question.question_type.slug
+        question_type = question.question_type_slug
         
         # Add type-specific statistics
         if question_type in ['rating_scale', 'likert_scale']:
             # For numeric ratings
             if question_type == 'rating_scale':
-                # Try to calculate average rating
-                try:
-                    # Assuming response_data contains numeric values
-                    avg_rating = PollResponse.objects.filter(question=question).exclude(
-                        response_data=''
-                    ).aggregate(avg=Avg('response_data'))['avg']
-                    
-                    if avg_rating is not None:
-                        stats['average'] = float(avg_rating)
-                except:
-                    stats['average'] = None
+                # Average rating weighted by the count of each rated value
+                stats['average'] = tally_average(tally)
             
         elif question_type in ['single_choice', 'multiple_choice']:
             # Most common response
@@ -815,10 +774,7 @@ class PollResultsView(DetailView):
             max_count = 0
             
             for choice in question.choices.all():
-                count = PollResponse.objects.filter(
-                    question=question,
-                    response_data__contains=str(choice.id)
-                ).count()
+                count = tally.get(str(choice.id), 0)
                 
                 if count > max_count:
                     max_count = count
@@ -828,15 +784,11 @@ class PollResultsView(DetailView):
             stats['most_common_count'] = max_count
             
             # Calculate diversity of answers (how spread out the responses are)
-            total = question.responses.count()
+            total = tally_total(tally)
             if total > 0:
                 choice_counts = []
                 for choice in question.choices.all():
-                    count = PollResponse.objects.filter(
-                        question=question,
-                        response_data__contains=str(choice.id)
-                    ).count()
-                    choice_counts.append(count / total)
+                    choice_counts.append(tally.get(str(choice.id), 0) / total)
                 
                 # Calculate entropy as a measure of diversity
                 import math
@@ -848,48 +800,11 @@ class PollResultsView(DetailView):
         
         return stats
     
-    def get_correlations(self, question, poll):
-        """Find correlations between this question and others"""
-        correlations = []
-        
-        # Skip for text questions or if there are too few responses
-        question_type = question.question_type.slug
-        if question_type in ['open_ended', 'short_answer', 'essay'] or question.responses.count() < 10:
-            return correlations
-        
-        # Look for correlations with other questions
-        for other_question in poll.questions.exclude(id=question.id):
-            other_type = other_question.question_type.slug
-            
-            # Skip text questions
-            if other_type in ['open_ended', 'short_answer', 'essay']:
-                continue
-            
-            # Simple correlation check: do people who choose X for question 1 tend to choose Y for question 2?
-            # This is a simplified example
-            if question_type in ['single_choice', 'multiple_choice'] and other_type in ['single_choice', 'multiple_choice']:
-                for choice in question.choices.all():
-                    for other_choice in other_question.choices.all():
-                        # Count how many selected both choices
-                        joint_count = PollResponse.objects.filter(
-                            question=question,
-                            response_data__contains=str(choice.id),
-                            user__in=PollResponse.objects.filter(
-                                question=other_question,
-                                response_data__contains=str(other_choice.id)
-                            ).values('user')
-                        ).count()
-                        
-                        # If significant correlation
-                        if joint_count >= 3:  # Arbitrary threshold
-                            correlations.append({
-                                'question': other_question.text,
-                                'this_choice': choice.text,
-                                'other_choice': other_choice.text,
-                                'count': joint_count
-                            })
-        
-        return correlations
+    def get_correlations(self, poll, questions):
+        """Find correlations between the choice questions of the poll"""
+        # Pairwise contingency tables for every question are built from a
+        # single query and cached until the next response comes in
+        return get_poll_correlations(poll, questions)
     
     def get_average_completion_time(self, poll):
         """Estimate average time to complete the poll"""
@@ -911,7 +826,7 @@ class PollResultsView(DetailView):
         
         total_seconds = 0
         for question in poll.questions.all():
-            q_type = question.question_type.slug
+            q_type = question.question_type_slug
             total_seconds += avg_seconds_per_question.get(q_type, 20)  # Default 20 seconds
         
         # Return as minutes
@@ -929,39 +844,46 @@ def my_polls(request):
         polls = polls.filter(status=status_filter)
     
     # Pagination
-    paginator = Paginator(polls, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = CursorPaginator(polls, 10, approximate_total=True).page_for_request(request)
     
     return render(request, 'polls/my_polls.html', {
         'page_obj': page_obj,
         'status_filter': status_filter,
+        # Distinct users across all of these polls, estimated from daily sketches
+        'audience_reached': approximate_participants(polls.order_by()),
     })
 
 
 @login_required
 def my_responses(request):
     """View for displaying polls the user has responded to"""
-    responses = PollResponse.objects.filter(user=request.user).select_related('question__poll').order_by('-created_at')
-    
-    # Group by poll
-    polls_responded = {}
-    for response in responses:
-        poll = response.question.poll
-        if poll.id not in polls_responded:
-            polls_responded[poll.id] = {
-                'poll': poll,
-                'responded_at': response.created_at
-            }
+    # One row per poll, grouped by the database
+    answered_polls = PollResponse.objects.filter(
+        user=request.user
+    ).values(
+        'question__poll'
+    ).annotate(
+        answer_count=Count('id'),
+        responded_at=Max('created_at')
+    )
     
-    # Convert to list and sort by response date
-    polls_list = list(polls_responded.values())
-    polls_list.sort(key=lambda x: x['responded_at'], reverse=True)
+    # Pagination, newest response first
+    page_obj = CursorPaginator(
+        answered_polls, 10, ordering=('-responded_at', '-question__poll')
+    ).page_for_request(request)
     
-    # Pagination
-    paginator = Paginator(polls_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    polls = Poll.objects.select_related('category', 'creator').in_bulk(
+        [row['question__poll'] for row in page_obj.object_list]
+    )
+    page_obj.object_list = [
+        {
+            'poll': polls[row['question__poll']],
+            'responded_at': row['responded_at'],
+            'answer_count': row['answer_count']
+        }
+        for row in page_obj.object_list
+        if row['question__poll'] in polls
+    ]
     
     return render(request, 'polls/my_responses.html', {
         'page_obj': page_obj,
@@ -982,6 +904,13 @@ def change_poll_status(request, pk):
     if new_status in dict(Poll.POLL_STATUS_CHOICES).keys():
         poll.status = new_status
         poll.save()
+        
+        # Results of closed polls no longer change, so they are computed
+        # once now; reopened polls drop their archive
+        if new_status in FROZEN_STATUSES:
+            freeze_poll(poll)
+        else:
+            discard_archive(poll)
         messages.success(request, _('Poll status updated successfully!'))
     else:
         messages.error(request, _('Invalid status.'))
@@ -1016,7 +945,7 @@ def save_as_template(request, slug):
             for question in poll.questions.all():
                 q_data = {
                     'text': question.text,
-                    'question_type': question.question_type.slug,
+                    'question_type': question.question_type_slug,
                     'is_required': question.is_required,
                     'order': question.order,
                     'min_value': question.min_value,
@@ -1060,37 +989,24 @@ def create_from_template(request, pk):
         return HttpResponseForbidden()
     
     if request.method == 'POST':
-        form = PollForm(request.POST, user=request.user)
+        form = PollForm(request.POST, creator=request.user)
         if form.is_valid():
+            try:
+                entries = questions_from_data(template.template_data.get('questions', []))
+                validate_questions(entries)
+            except ValidationError as error:
+                for message in error.messages:
+                    messages.error(request, message)
+                return redirect('polls:template_list')
+            
             with transaction.atomic():
                 poll = form.save(commit=False)
                 poll.creator = request.user
                 poll.save()
                 form.save_m2m()  # Save tags
                 
-                # Create questions and choices from template
-                template_data = template.template_data
-                for q_data in template_data.get('questions', []):
-                    question_type = QuestionType.objects.get(slug=q_data['question_type'])
-                    
-                    question = Question.objects.create(
-                        poll=poll,
-                        text=q_data['text'],
-                        question_type=question_type,
-                        is_required=q_data.get('is_required', True),
-                        order=q_data.get('order', 0),
-                        min_value=q_data.get('min_value'),
-                        max_value=q_data.get('max_value'),
-                        step_value=q_data.get('step_value'),
-                        settings=q_data.get('settings')
-                    )
-                    
-                    for c_data in q_data.get('choices', []):
-                        Choice.objects.create(
-                            question=question,
-                            text=c_data['text'],
-                            order=c_data.get('order', 0)
-                        )
+                # Create questions and choices from template in bulk
+                save_questions(poll, entries)
                 
                 # Award points for poll creation
                 from gamification.models import award_points
@@ -1107,7 +1023,7 @@ def create_from_template(request, pk):
             'poll_type': template_data.get('poll_type', 'public'),
             'category': template.category
         }
-        form = PollForm(user=request.user, initial=initial)
+        form = PollForm(creator=request.user, initial=initial)
     
     return render(request, 'polls/create_from_template.html', {
         'form': form,
@@ -1116,7 +1032,7 @@ def create_from_template(request, pk):
     })
 
 
-class TemplateListView(LoginRequiredMixin, ListView):
+class TemplateListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = PollTemplate
     template_name = 'polls/template_list.html'
     context_object_name = 'templates'
@@ -1150,67 +1066,27 @@ def export_poll_data(request, slug):
     
     export_format = request.GET.get('format', 'json')
     
-    # Prepare data for export
-    poll_data = {
-        'poll_id': poll.id,
-        'title': poll.title,
-        'description': poll.description,
-        'creator': poll.creator.username,
-        'category': poll.category.name if poll.category else None,
-        'poll_type': poll.poll_type,
-        'status': poll.status,
-        'created_at': poll.created_at.isoformat(),
-        'questions': []
+    # Exports are streamed straight from a single query so that large polls
+    # never have to be held in memory
+    export_formats = {
+        'json': (stream_json, 'application/json', 'json'),
+        'csv': (stream_csv, 'text/csv', 'csv'),
+        'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
     }
     
-    for question in poll.questions.all():
-        q_data = {
-            'question_id': question.id,
-            'text': question.text,
-            'type': question.question_type.slug,
-            'is_required': question.is_required,
-            'responses': []
-        }
-        
-        for response in question.responses.all():
-            r_data = {
-                'user_id': response.user.id if poll.poll_type != 'anonymous' else None,
-                'response_data': response.response_data,
-                'created_at': response.created_at.isoformat()
-            }
-            q_data['responses'].append(r_data)
-        
-        poll_data['questions'].append(q_data)
-    
-    # Generate response based on format
-    if export_format == 'json':
-        return JsonResponse(poll_data)
-    elif export_format == 'csv':
-        # Implementation for CSV export
-        import csv
-        from django.http import HttpResponse
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{poll.slug}_data.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Question ID', 'Question Text', 'Question Type', 'User ID', 'Response', 'Timestamp'])
-        
-        for question in poll_data['questions']:
-            for response in question['responses']:
-                writer.writerow([
-                    question['question_id'],
-                    question['text'],
-                    question['type'],
-                    response['user_id'],
-                    response['response_data'],
-                    response['created_at']
-                ])
-        
-        return response
-    else:
+    if export_format not in export_formats:
         messages.error(request, _('Unsupported export format.'))
         return redirect('polls:detail', slug=slug)
+    
+    stream, content_type, extension = export_formats[export_format]
+    lines = stream(poll)
+    if isinstance(request, ASGIRequest):
+        lines = stream_async(lines)
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    if export_format != 'json':
+        response['Content-Disposition'] = f'attachment; filename="{poll.slug}_data.{extension}"'
+    
+    return response
 
 
 class PollAnalyticsView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
@@ -1236,46 +1112,38 @@ class PollAnalyticsView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
             'total_participants': total_participants,
         })
         
-        # Response rate over time
-        responses = PollResponse.objects.filter(question__poll=poll).order_by('created_at')
-        response_dates = responses.values_list('created_at', flat=True)
+        # Submissions over time, per day or per hour (?resolution=hour)
+        resolution = 'hour' if self.request.GET.get('resolution') == 'hour' else 'day'
+        context['timeline_resolution'] = resolution
         
-        from collections import Counter
-        import datetime
+        # Closed polls are read from their archive
+        archived = get_archived_results(poll)
+        if archived is not None:
+            context['response_timeline'] = archived['timelines'][resolution]
+            context['question_analytics'] = archived['question_analytics']
+            return context
         
-        date_counts = Counter([d.date() for d in response_dates])
-        date_range = []
-        count_range = []
-        
-        if response_dates.exists():
-            start_date = response_dates.first().date()
-            end_date = timezone.now().date()
-            
-            current_date = start_date
-            while current_date <= end_date:
-                date_range.append(current_date.strftime('%Y-%m-%d'))
-                count_range.append(date_counts.get(current_date, 0))
-                current_date += datetime.timedelta(days=1)
-        
-        context['response_timeline'] = {
-            'dates': date_range,
-            'counts': count_range
-        }
+        context['response_timeline'] = get_timeline(poll, resolution=resolution, fill_gaps=True)
         
         # Question-specific analytics
+        context['question_analytics'] = self.get_question_analytics(poll)
+        
+        return context
+    
+    def get_question_analytics(self, poll):
+        """Answer distribution of every question, in a fixed number of queries"""
         question_analytics = []
-        for question in poll.questions.all():
+        for question in poll.questions.with_tallies():
+            question_type = question.question_type_slug
             analytics = {
                 'question': question.text,
-                'type': question.question_type.slug,
-                'total_responses': question.responses.count(),
-                'data': question.response_data
+                'type': question_type,
+                'total_responses': question.total_responses,
+                # Text answers are summarized by their most frequent words and phrases
+                'data': question.top_terms if question_type in TEXT_TYPES else question.response_data
             }
             question_analytics.append(analytics)
-        
-        context['question_analytics'] = question_analytics
-        
-        return context
+        return question_analytics
 
 
 # Category management views
@@ -1413,6 +1281,9 @@ class PollDetailWithCommentsView(DetailView):
         # Comments for the poll
         context['comments'] = PollComment.objects.filter(poll=poll).order_by('-created_at')
         
+        # Response state, including answers still waiting in the submission queue
+        context['user_responded'], context['response_pending'] = get_response_state(poll, self.request.user)
+        
         # Include the comment form in context
         context['comment_form'] = PollCommentForm()
         
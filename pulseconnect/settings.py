@@ -17,6 +17,7 @@ ALLOWED_HOSTS = config('ALLOWED_HOSTS', '').split(',')
 
 # Application definition
 INSTALLED_APPS = [
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -253,6 +254,49 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache shared by all workers (poll result snapshots and response versions).
+# Without REDIS_CACHE_URL each process keeps its own in-memory cache, which is
+# only suitable for development or a single worker
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default='')
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds an active poll may serve results that miss its latest responses
+POLL_RESULTS_MAX_STALENESS = 10
+
+# Live results pages receive tally changes batched over this many milliseconds
+POLL_LIVE_RESULTS_INTERVAL_MS = 500
+
+# Queue poll submissions and save them in batches with flush_poll_submissions
+# instead of writing each one during the request (for high-volume campaigns)
+POLL_BUFFERED_SUBMISSIONS = config('POLL_BUFFERED_SUBMISSIONS', default=False, cast=bool)
+
+# Where new analytics datasets keep their responses: 'json' (in the database row)
+# or 'arrow' (memory-mapped Arrow files under MEDIA_ROOT/datasets, requires pyarrow)
+ANALYTICS_DATASET_STORAGE = config('ANALYTICS_DATASET_STORAGE', default='json')
+
+# Datasets of polls with more responses than this are built by run_dataset_jobs
+# instead of during the create request
+ANALYTICS_DATASET_JOB_THRESHOLD = config('ANALYTICS_DATASET_JOB_THRESHOLD', default=50000, cast=int)
+
+# Seconds a response must have existed before it is included in a dataset; newer
+# ones wait for the next refresh, as slower transactions may commit lower ids later
+ANALYTICS_DATASET_REFRESH_LAG = config('ANALYTICS_DATASET_REFRESH_LAG', default=30, cast=int)
+
+# Bytes of parsed dataset DataFrames each process keeps for reports and exports
+ANALYTICS_DATAFRAME_CACHE_BYTES = config('ANALYTICS_DATAFRAME_CACHE_BYTES', default=256 * 1024 * 1024, cast=int)
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'